@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 批次參數掃描
+以參數軸的笛卡兒積定義掃描，分區塊計算並匯出；
+可設定記憶體預算，依每列佔用量決定區塊大小並在超出時即時縮小
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from storage import DEFAULT_PRECISION, PRECISIONS, pack_results, record_dtype
+from validation import (
+    ERROR_MESSAGES,
+    compute_checked,
+    error_counts,
+    error_histogram,
+)
+
+# 掃描的參數軸；cf 與 tau 為選用（未指定時為 NaN，依 compute_patches 的規則選擇模式）
+AXES = ("rho", "mu", "u", "y", "L", "cf", "tau")
+
+# 輸出欄位
+OUTPUT_COLUMNS = ("re_x", "cf", "u_tau", "tau_w", "y_plus", "regime", "mode")
+
+CSV_HEADER = [
+    "密度 ρ",
+    "動力粘度 μ",
+    "流速 U",
+    "第一層高度 y",
+    "特徵長度 L",
+    "輸入 Cf",
+    "輸入 τw",
+    "雷諾數 Re_x",
+    "摩擦系數 Cf",
+    "摩擦速度 u_τ",
+    "剪應力 τw",
+    "y+",
+    "網格評估",
+]
+
+# 未設定記憶體預算時的固定區塊列數
+DEFAULT_CHUNK_ROWS = 1 << 16
+
+# 估算每列佔用量的校正區塊列數
+_CALIBRATION_ROWS = 4096
+
+# 區塊列數的下限，避免縮小到固定開銷主導
+MIN_CHUNK_ROWS = 1024
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(text):
+    """解析記憶體大小，例如 "2G"、"512M"、"1.5GiB" 或位元組數"""
+    value = str(text).strip().upper().removesuffix("B").removesuffix("I")
+    unit = value[-1:] if value[-1:] in _SIZE_UNITS else ""
+    try:
+        number = float(value[: len(value) - len(unit)])
+    except ValueError:
+        raise ValueError(f"無法解析記憶體大小：{text}") from None
+    if number <= 0:
+        raise ValueError("記憶體大小必須為正數")
+    return int(number * _SIZE_UNITS[unit])
+
+
+def parse_axis(text):
+    """
+    解析參數軸
+
+    逗號分隔的數值清單（"1e-6,1e-5"），或 "起點:終點:點數" 等距取點，
+    最後加上 ":log" 時為對數等距（"1e-6:1e-3:50:log"）。
+    """
+    parts = str(text).split(":")
+    if len(parts) == 1:
+        return np.array([float(v) for v in parts[0].split(",")], dtype=np.float64)
+    if len(parts) not in (3, 4) or (len(parts) == 4 and parts[3] != "log"):
+        raise ValueError(f"無法解析參數軸：{text}")
+    start, stop, count = float(parts[0]), float(parts[1]), int(parts[2])
+    if len(parts) == 4:
+        return np.geomspace(start, stop, count)
+    return np.linspace(start, stop, count)
+
+
+class Sweep:
+    """
+    參數掃描：各參數軸的笛卡兒積
+
+    不展開整個乘積，`rows(start, stop)` 只產生指定範圍的列，
+    列的順序固定（最後一個軸變化最快），可依列號分區塊或分散計算。
+    """
+
+    def __init__(self, **axes):
+        unknown = set(axes) - set(AXES)
+        if unknown:
+            raise ValueError(f"未知的參數軸：{', '.join(sorted(unknown))}")
+        missing = [key for key in AXES[:5] if key not in axes]
+        if missing:
+            raise ValueError(f"缺少參數軸：{', '.join(missing)}")
+        self.axes = {
+            key: np.atleast_1d(np.asarray(axes.get(key, np.nan), dtype=np.float64))
+            for key in AXES
+        }
+        self.shape = tuple(len(values) for values in self.axes.values())
+
+    def __len__(self):
+        return math.prod(self.shape)
+
+    def rows(self, start, stop):
+        """列號 [start, stop) 的輸入欄位字典"""
+        index = np.unravel_index(np.arange(start, stop), self.shape)
+        return {key: self.axes[key][i] for key, i in zip(AXES, index)}
+
+    def to_dict(self):
+        """可 JSON 序列化的掃描定義"""
+        return {key: values.tolist() for key, values in self.axes.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def compute_chunk(columns, fast_cf=False, errors=None):
+    """
+    驗證並計算一個區塊，回傳輸入與輸出欄位合併的字典（同名的 cf 為計算結果）
+
+    無效列不進入計算，結果為 NaN；`error` 為每列的錯誤代碼。
+    `errors` 為 256 格的次數分佈陣列時累加本區塊的錯誤代碼。
+    """
+    result = compute_checked(
+        columns["rho"],
+        columns["mu"],
+        columns["u"],
+        columns["y"],
+        columns["L"],
+        cf=columns["cf"],
+        tau=columns["tau"],
+        fast_cf=fast_cf,
+    )
+    if errors is not None:
+        error_histogram(result["error"], out=errors)
+    return {**columns, **{key: result[key] for key in OUTPUT_COLUMNS + ("error",)}}
+
+
+def _current_rss():
+    """目前的常駐記憶體（位元組）；無法取得時回傳 None"""
+    try:
+        with open("/proc/self/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class MemoryBudget:
+    """
+    記憶體預算與區塊大小控制
+
+    每隔 `sample_every` 個區塊以 tracemalloc 量測一次配置峰值
+    （NumPy 陣列亦會回報），更新每列佔用量；其餘區塊只以每列佔用量估算，
+    避免 tracemalloc 對大量小物件的額外成本。每個區塊結束時另取樣常駐記憶體
+    （RSS）。任一項超出預算時依超出比例縮小後續區塊，遠低於預算時逐步放大。
+    """
+
+    # 區塊大小的目標使用率，保留空間給量測誤差與其他配置
+    target = 0.8
+
+    def __init__(self, limit, sample_every=8):
+        self.limit = parse_size(limit) if isinstance(limit, str) else int(limit)
+        self.sample_every = sample_every
+        self.row_bytes = None
+        self.peak = 0
+        self.shrinks = 0
+        self._count = 0
+
+    def measure(self, func, rows, *args):
+        """執行 func（處理 `rows` 列）並回傳 (結果, 估計或量測的峰值)"""
+        sample = self.row_bytes is None or self._count % self.sample_every == 0
+        self._count += 1
+        rss_before = _current_rss()
+        if sample:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(1)
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            try:
+                result = func(*args)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                if started:
+                    tracemalloc.stop()
+            used = max(peak - base, 0)
+            self.row_bytes = used / max(rows, 1)
+        else:
+            result = func(*args)
+            used = int(rows * self.row_bytes)
+
+        rss = _current_rss()
+        if rss is not None and rss_before is not None:
+            # RSS 取樣涵蓋 tracemalloc 看不到的配置（例如擴充模組的緩衝區）；
+            # 只計入本區塊期間的成長，已釋放但未歸還系統的記憶體無法靠縮小區塊減少
+            used = max(used, rss - rss_before)
+        self.peak = max(self.peak, used)
+        return result, used
+
+    def initial_rows(self):
+        """依每列佔用量決定區塊列數"""
+        rows = self.limit * self.target / max(self.row_bytes or 1.0, 1.0)
+        return max(int(rows), MIN_CHUNK_ROWS)
+
+    def adjust(self, rows, used):
+        """依本區塊的峰值調整下一個區塊的列數"""
+        if used > self.limit:
+            self.shrinks += 1
+            return max(int(rows * self.limit * self.target / used), MIN_CHUNK_ROWS)
+        if used < self.limit * self.target / 2:
+            return min(int(rows * 1.25) + 1, self.initial_rows())
+        return rows
+
+
+def iter_chunks(
+    sweep, start=0, stop=None, process=compute_chunk, budget=None, rows=None
+):
+    """
+    依序產生 (起始列, 處理結果)
+
+    `process` 接收輸入欄位字典（通常為計算加上格式化）。
+    指定 `budget` 時以校正區塊量測每列佔用量決定區塊大小，
+    之後每個區塊量測峰值並即時調整；否則使用固定的 `rows`。
+    """
+    stop = len(sweep) if stop is None else stop
+    if budget is None:
+        rows = rows or DEFAULT_CHUNK_ROWS
+        for begin in range(start, stop, rows):
+            yield begin, process(sweep.rows(begin, min(begin + rows, stop)))
+        return
+
+    begin = start
+    if rows is None and budget.row_bytes is not None:
+        # 預算已校正過（例如上一個分片），沿用每列佔用量
+        rows = budget.initial_rows()
+    if rows is None:
+        end = min(begin + _CALIBRATION_ROWS, stop)
+        result, _ = budget.measure(
+            _process_rows, end - begin, process, sweep, begin, end
+        )
+        yield begin, result
+        rows = budget.initial_rows()
+        begin = end
+    while begin < stop:
+        end = min(begin + rows, stop)
+        result, used = budget.measure(
+            _process_rows, end - begin, process, sweep, begin, end
+        )
+        yield begin, result
+        rows = budget.adjust(end - begin, used)
+        begin = end
+
+
+def _process_rows(process, sweep, begin, end):
+    return process(sweep.rows(begin, end))
+
+
+def format_csv_chunk(columns, fast_cf=False, errors=None):
+    """將一個區塊計算並格式化為 CSV 文字（整塊一次寫入）"""
+    return format_csv_rows(columns, compute_chunk(columns, fast_cf, errors))
+
+
+def format_csv_rows(inputs, outputs):
+    """將輸入欄位與計算結果格式化為 CSV 文字"""
+    labels = [DEFAULT_BANDS.label(code) or "" for code in range(256)]
+    # 輸入欄位取自 inputs：輸出的 cf 與輸入的 cf 同名
+    lists = [inputs[key].tolist() for key in AXES]
+    lists += [outputs[key].tolist() for key in OUTPUT_COLUMNS[:-2]]
+    lists.append([labels[code] for code in outputs["regime"].tolist()])
+    line = ",".join(["%.6g"] * (len(lists) - 1)) + ",%s\r\n"
+    return "".join([line % row for row in zip(*lists)])
+
+
+def run_sweep(
+    sweep,
+    output,
+    max_memory=None,
+    chunk_rows=None,
+    progress=None,
+    fast_cf=False,
+    precision=DEFAULT_PRECISION,
+):
+    """
+    計算整個掃描並匯出
+
+    副檔名為 .npy 時寫入結構化記錄（storage.record_dtype，含輸入欄位），
+    數值欄位依 `precision` 儲存，可直接以 np.load(..., mmap_mode="r") 開啟；
+    其餘匯出為 CSV。計算與寫入在同一個區塊內完成，記憶體用量受區塊大小限制。
+    `fast_cf` 為 True 時 Blasius 模式以查表內插計算 Cf。
+    無效的輸入列不會中斷掃描，其結果為 NaN 並依錯誤代碼計數。
+    回傳統計字典：rows、chunks、seconds、errors（validation.error_counts），
+    以及有預算時的 peak 與 shrinks。
+    """
+    budget = MemoryBudget(max_memory) if max_memory else None
+    started = time.perf_counter()
+    errors = np.zeros(256, dtype=np.int64)
+    compute = {"fast_cf": fast_cf, "errors": errors}
+    if str(output).lower().endswith(".npy"):
+        chunks = _write_records(
+            sweep, output, budget, chunk_rows, progress, compute, precision
+        )
+    else:
+        chunks = _write_csv(sweep, output, budget, chunk_rows, progress, compute)
+
+    stats = {
+        "rows": len(sweep),
+        "chunks": chunks,
+        "seconds": time.perf_counter() - started,
+        "errors": error_counts(histogram=errors),
+    }
+    if budget is not None:
+        stats["peak"] = budget.peak
+        stats["shrinks"] = budget.shrinks
+    return stats
+
+
+def _write_csv(sweep, output, budget, chunk_rows, progress, compute):
+    chunks = 0
+    with open(output, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerow(CSV_HEADER)
+        for begin, text in iter_chunks(
+            sweep,
+            process=partial(format_csv_chunk, **compute),
+            budget=budget,
+            rows=chunk_rows,
+        ):
+            f.write(text)
+            chunks += 1
+            if progress is not None:
+                progress(begin, len(sweep))
+    return chunks
+
+
+def _compute_with_inputs(columns, fast_cf=False, errors=None):
+    return columns, compute_chunk(columns, fast_cf, errors)
+
+
+def fill_records(
+    records,
+    sweep,
+    start=0,
+    budget=None,
+    chunk_rows=None,
+    fast_cf=False,
+    errors=None,
+    progress=None,
+):
+    """
+    計算掃描第 start 列起的 len(records) 列並寫入記錄陣列（可為 memmap）
+
+    記錄型別需為 storage.record_dtype（含輸入欄位），儲存精度由型別判定。
+    回傳處理的區塊數。
+    """
+    precision = records.dtype["y_plus"].name
+    stop = start + len(records)
+    chunks = 0
+    for begin, (inputs, outputs) in iter_chunks(
+        sweep,
+        start,
+        stop,
+        process=partial(_compute_with_inputs, fast_cf=fast_cf, errors=errors),
+        budget=budget,
+        rows=chunk_rows,
+    ):
+        end = begin + len(outputs["y_plus"])
+        pack_results(
+            outputs, precision, inputs, out=records[begin - start : end - start]
+        )
+        chunks += 1
+        if progress is not None:
+            progress(begin, len(sweep))
+    return chunks
+
+
+def _write_records(sweep, output, budget, chunk_rows, progress, compute, precision):
+    records = np.lib.format.open_memmap(
+        output, mode="w+", dtype=record_dtype(precision), shape=(len(sweep),)
+    )
+    try:
+        chunks = fill_records(
+            records,
+            sweep,
+            budget=budget,
+            chunk_rows=chunk_rows,
+            progress=progress,
+            **compute,
+        )
+        records.flush()
+    finally:
+        del records
+    return chunks
+
+
+AXIS_HELP = "參數軸格式：1,2,3（清單）、0:10:11（等距）、1e-6:1e-3:50:log（對數）"
+
+
+def add_sweep_arguments(parser):
+    """加入各參數軸的命令列參數"""
+    for key, help_text in (
+        ("rho", "密度 ρ (kg/m³)"),
+        ("mu", "動力粘度 μ (Pa·s)"),
+        ("u", "流速 U (m/s)"),
+        ("y", "第一層高度 y (m)"),
+        ("L", "特徵長度 L (m)"),
+    ):
+        parser.add_argument(f"--{key}", required=True, help=help_text)
+    parser.add_argument("--cf", help="摩擦系數 Cf（選用，模式 B）")
+    parser.add_argument("--tau", help="壁面剪應力 τw (Pa)（選用，模式 C）")
+
+
+def sweep_from_args(args):
+    """由命令列參數建立掃描"""
+    return Sweep(
+        **{
+            key: parse_axis(getattr(args, key))
+            for key in AXES
+            if getattr(args, key) is not None
+        }
+    )
+
+
+def main(argv=None):
+    """命令列入口"""
+    parser = argparse.ArgumentParser(
+        description="y+ 批次參數掃描：各參數軸的笛卡兒積", epilog=AXIS_HELP
+    )
+    add_sweep_arguments(parser)
+    parser.add_argument(
+        "--out", required=True, help="輸出檔案（.csv，或 .npy 結構化記錄）"
+    )
+    parser.add_argument(
+        "--precision",
+        choices=sorted(PRECISIONS),
+        default=DEFAULT_PRECISION,
+        help=".npy 輸出的數值精度（計算一律使用 float64）",
+    )
+    parser.add_argument("--max-memory", help="記憶體預算，例如 2G、512M")
+    parser.add_argument("--chunk-rows", type=int, help="固定區塊列數")
+    parser.add_argument(
+        "--fast-cf",
+        action="store_true",
+        help="以查表內插計算 Blasius Cf（相對誤差約 1e-7）",
+    )
+    args = parser.parse_args(argv)
+
+    sweep = sweep_from_args(args)
+    stats = run_sweep(
+        sweep,
+        args.out,
+        args.max_memory,
+        args.chunk_rows,
+        fast_cf=args.fast_cf,
+        precision=args.precision,
+    )
+    print(
+        f"✓ 已計算 {stats['rows']} 列（{stats['chunks']} 個區塊，"
+        f"{stats['seconds']:.2f} 秒）→ {args.out}"
+    )
+    if stats["errors"]["invalid"]:
+        print(f"⚠ {stats['errors']['invalid']} 列輸入無效（結果為 NaN）：")
+        for flag, message in ERROR_MESSAGES.items():
+            if stats["errors"][flag]:
+                print(f"   {message}：{stats['errors'][flag]} 列")
+    if "peak" in stats:
+        print(
+            f"   區塊峰值記憶體 {stats['peak'] / (1 << 20):.1f} MiB，"
+            f"縮小區塊 {stats['shrinks']} 次"
+        )
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(1)
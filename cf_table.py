@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 摩擦系數查表
+以預先計算的 Cf(Re_x) 表格與線性內插取代 Blasius-Schlichting 公式中的
+log10 與分數次方，並提供保證的相對誤差上限
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import math
+import time
+from functools import cache
+
+import numpy as np
+
+from yplus_core import LAMINAR_RE_LIMIT, blasius_cf
+
+# 湍流分支 C_f = A·(log₁₀Re)^(-P)
+_A = 0.455
+_P = 2.58
+
+# 查表時每次處理的元素數（暫存陣列約 128 KiB）
+_BLOCK = 1 << 14
+
+
+def _cf_second_derivative(re_x):
+    """Blasius-Schlichting C_f 對 Re 的二階導數（兩個分支皆為正且遞減）"""
+    re_x = np.asarray(re_x, dtype=np.float64)
+    ln10 = math.log(10.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_re = np.log10(re_x)
+        turbulent = (
+            _P
+            * _A
+            / (ln10 * re_x**2)
+            * ((_P + 1) / ln10 * log_re ** (-_P - 2) + log_re ** (-_P - 1))
+        )
+        laminar = 0.75 * 0.664 * re_x**-2.5
+    return np.where(re_x < LAMINAR_RE_LIMIT, laminar, turbulent)
+
+
+class CfTable:
+    """
+    Blasius-Schlichting 摩擦系數查表
+
+    float64 的位元排列依序為符號、指數與尾數，將位元右移到只剩指數與尾數的
+    最高 log₂(`per_octave`) 位元，即得到 Re 所在段的編號：每個八度（2 倍）
+    依尾數等分為 `per_octave` 段，不需計算對數。每段在 Re 上線性內插
+    C_f ≈ c₀ + c₁·Re，節點值為精確公式。
+
+    線性內插在 [a, b] 的誤差不超過 (b−a)²/8 · max|C_f''|；C_f'' 為正且遞減，
+    最大值在 a，C_f 最小值在 b，因此每段的相對誤差上限可解析計算，
+    `error_bound` 為所有段的最大值（另加浮點捨入）。
+    跨越層流/湍流轉換點的那一段、超出表格範圍與無效的 Re 改用精確公式。
+    """
+
+    def __init__(self, re_min=1.0, re_max=1e12, per_octave=1024):
+        if per_octave < 1 or per_octave & (per_octave - 1):
+            raise ValueError("per_octave 必須為 2 的次方")
+        self.per_octave = per_octave
+        self._shift = 52 - (per_octave.bit_length() - 1)
+
+        first = self._segment(re_min)
+        last = self._segment(re_max)
+        codes = np.arange(first, last + 2, dtype=np.int64) << self._shift
+        nodes = codes.view(np.float64)
+        left, right = nodes[:-1], nodes[1:]
+        values = blasius_cf(nodes)
+        slope = np.diff(values) / (right - left)
+
+        # 跨越轉換點的段（同一段內公式不連續）
+        straddle = self._segment(LAMINAR_RE_LIMIT) - first
+
+        bound = (right - left) ** 2 / 8.0 * _cf_second_derivative(left)
+        bound /= values[1:]
+        bound[straddle] = 0.0
+        # 內插運算本身與係數的浮點捨入（數個 ulp）
+        self.error_bound = float(bound.max()) + 16 * np.finfo(np.float64).eps
+        self.re_min = float(nodes[0])
+        self.re_max = float(nodes[-1])
+
+        # 前後各加一個 NaN 哨兵：超出範圍的編號經 clip 後落在哨兵上，
+        # 與轉換段（同樣設為 NaN）一起以 isnan 找出並改用精確公式
+        self._offset = first - 1
+        self.slope = np.full(len(slope) + 2, np.nan)
+        self.intercept = np.full(len(slope) + 2, np.nan)
+        self.slope[1:-1] = slope
+        self.intercept[1:-1] = values[:-1] - slope * left
+        self.slope[straddle + 1] = np.nan
+        self.intercept[straddle + 1] = np.nan
+
+    def _segment(self, re_x):
+        """純量 Re 的段編號（位元排列右移）"""
+        return int(np.float64(re_x).view(np.int64)) >> self._shift
+
+    @property
+    def nbytes(self):
+        return self.slope.nbytes + self.intercept.nbytes
+
+    def __call__(self, re_x):
+        """查表計算 C_f；相對誤差不超過 `error_bound`"""
+        re_x = np.asarray(re_x, dtype=np.float64)
+        flat = np.ascontiguousarray(re_x).ravel()
+        bits = flat.view(np.int64)
+        cf = np.empty_like(flat)
+        # 分塊處理，暫存陣列留在快取中，避免整個陣列大小的中間結果
+        index = np.empty(min(len(flat), _BLOCK), dtype=np.int64)
+        scratch = np.empty(len(index))
+        for start in range(0, len(flat), _BLOCK):
+            stop = min(start + _BLOCK, len(flat))
+            i, tmp, out = index[: stop - start], scratch[: stop - start], cf[start:stop]
+            # 負數（符號位元）與 NaN/inf（指數全為 1）的編號都會超出表格範圍
+            np.right_shift(bits[start:stop], self._shift, out=i)
+            i -= self._offset
+            np.take(self.slope, i, mode="clip", out=out)
+            out *= flat[start:stop]
+            np.take(self.intercept, i, mode="clip", out=tmp)
+            out += tmp
+        fallback = np.isnan(cf)
+        if fallback.any():
+            cf[fallback] = blasius_cf(flat[fallback])
+        cf = cf.reshape(re_x.shape)
+        return cf if cf.ndim else cf[()]
+
+
+@cache
+def default_table():
+    """預設表格（Re 1 至 1e12，每八度 1024 段，約 0.6 MB），第一次使用時建立"""
+    return CfTable()
+
+
+def benchmark(count=10_000_000, seed=0):
+    """比較查表與精確公式的速度與誤差；Re 在 1e3 至 1e9 對數均勻分佈"""
+    table = default_table()
+    re_x = 10 ** np.random.default_rng(seed).uniform(3.0, 9.0, count)
+    timings = {}
+    for name, func in (("exact", blasius_cf), ("table", table)):
+        func(re_x[:1000])
+        started = time.perf_counter()
+        result = func(re_x)
+        timings[name] = time.perf_counter() - started
+        if name == "exact":
+            exact = result
+    max_error = float(np.max(np.abs(result / exact - 1.0)))
+    return {
+        "count": count,
+        "exact": timings["exact"],
+        "table": timings["table"],
+        "speedup": timings["exact"] / timings["table"],
+        "max_error": max_error,
+        "error_bound": table.error_bound,
+    }
+
+
+def main(argv=None):
+    """命令列入口：執行基準測試"""
+    parser = argparse.ArgumentParser(description="摩擦系數查表的速度與誤差基準測試")
+    parser.add_argument("--count", type=int, default=10_000_000)
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.count)
+    print(f"點數：{result['count']}")
+    print(f"精確公式：{result['exact']:.3f} 秒")
+    print(f"查表內插：{result['table']:.3f} 秒（{result['speedup']:.1f} 倍）")
+    print(f"實測最大相對誤差：{result['max_error']:.3e}")
+    print(f"保證相對誤差上限：{result['error_bound']:.3e}")
+
+
+if __name__ == "__main__":
+    main()
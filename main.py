@@ -25,7 +25,22 @@ from PySide6.QtWidgets import (
     QMessageBox,
     QComboBox,
 )
-from math import log10
+
+from regime import DEFAULT_BANDS
+from report import DEFAULT_REPORTS, MODE_NAMES
+from validation import NON_FINITE, NON_POSITIVE, validate_patches
+from yplus_core import (
+    FLUID_PRESETS,
+    MODE_BLASIUS,
+    MODE_CF,
+    MODE_TAU,
+    MODE_WALL_LAW,
+    blasius_cf,
+    u_tau_from_cf,
+    u_tau_from_wall_law,
+    y_plus_from_tau,
+)
+from yplus_core import y_plus as calc_y_plus
 
 # 強制 UTF-8 編碼
 import io
@@ -39,15 +54,11 @@ class CFDYPlusCalculator(QMainWindow):
         super().__init__()
 
         # 預設流體
-        self.fluids = {
-            "空氣 (25°C)": {"rho": 1.184, "mu": 1.849e-5},
-            "空氣 (20°C)": {"rho": 1.204, "mu": 1.810e-5},
-            "水 (20°C)": {"rho": 998.2, "mu": 1.002e-3},
-            "水 (25°C)": {"rho": 997.0, "mu": 0.894e-3},
-        }
+        self.fluids = dict(FLUID_PRESETS)
 
         self.initUI()
         self.last_result = None
+        self.patch_window = None
 
     def initUI(self):
         self.setWindowTitle("CFD y+ 計算工具")
@@ -105,16 +116,19 @@ class CFDYPlusCalculator(QMainWindow):
         mode_blasius = QRadioButton("模式 A：Blasius 公式")
         mode_cf = QRadioButton("模式 B：直接輸入 Cf")
         mode_tau = QRadioButton("模式 C：直接輸入 τw 或 u_τ")
+        mode_wall_law = QRadioButton("模式 D：壁面定律反解")
 
         mode_blasius.setChecked(True)
 
         self.mode_group.addButton(mode_blasius, 0)
         self.mode_group.addButton(mode_cf, 1)
         self.mode_group.addButton(mode_tau, 2)
+        self.mode_group.addButton(mode_wall_law, 3)
 
         mode_layout.addWidget(mode_blasius)
         mode_layout.addWidget(mode_cf)
         mode_layout.addWidget(mode_tau)
+        mode_layout.addWidget(mode_wall_law)
         mode_layout.addStretch()
 
         mode_group.setLayout(mode_layout)
@@ -127,10 +141,16 @@ class CFDYPlusCalculator(QMainWindow):
         self.cf_input = QLineEdit("0.01")
         self.tau_input = QLineEdit("0.1")
         self.u_tau_input = QLineEdit("0.5")
+        self.u_p_input = QLineEdit("1.0")
+        self.wall_law_combo = QComboBox()
+        self.wall_law_combo.addItem("Spalding 定律", "spalding")
+        self.wall_law_combo.addItem("對數律", "log")
 
         mode_params_layout.addRow("模式 B - 摩擦系數 Cf:", self.cf_input)
         mode_params_layout.addRow("模式 C - 剪應力 τw (Pa):", self.tau_input)
         mode_params_layout.addRow("模式 C - 摩擦速度 u_τ (m/s):", self.u_tau_input)
+        mode_params_layout.addRow("模式 D - 第一層速度 U_p (m/s):", self.u_p_input)
+        mode_params_layout.addRow("模式 D - 壁面定律:", self.wall_law_combo)
 
         mode_params_group.setLayout(mode_params_layout)
         main_layout.addWidget(mode_params_group)
@@ -154,10 +174,14 @@ class CFDYPlusCalculator(QMainWindow):
         export_txt_button = QPushButton("匯出 TXT")
         export_txt_button.clicked.connect(self.export_txt)
 
+        patch_table_button = QPushButton("多 patch 表格")
+        patch_table_button.clicked.connect(self.open_patch_table)
+
         button_layout.addWidget(calc_button)
         button_layout.addWidget(clear_button)
         button_layout.addWidget(export_csv_button)
         button_layout.addWidget(export_txt_button)
+        button_layout.addWidget(patch_table_button)
 
         button_group.setLayout(button_layout)
         main_layout.addWidget(button_group)
@@ -196,10 +220,14 @@ class CFDYPlusCalculator(QMainWindow):
             y = float(self.y_input.text())
             L = float(self.L_input.text())
 
-            # 驗證基本參數
-            if any(v <= 0 for v in [rho, mu, u, y, L]):
+            # 驗證基本參數（與批次計算相同的向量化規則，inf/NaN 亦視為無效）
+            code = int(validate_patches(rho, mu, u, y, L))
+            if code & NON_POSITIVE:
                 self.show_error("所有參數必須為正數")
                 return
+            if code & NON_FINITE:
+                self.show_error("所有參數必須為有限數值")
+                return
 
             # 動力學粘度
             nu = mu / rho
@@ -208,19 +236,29 @@ class CFDYPlusCalculator(QMainWindow):
             mode = self.mode_group.checkedId()
 
             if mode == 0:  # Blasius 模式
-                result_text = self._calculate_blasius(rho, mu, u, y, L, nu)
+                record = self._calculate_blasius(rho, mu, u, y, L, nu)
             elif mode == 1:  # 直接輸入 Cf 模式
                 cf = float(self.cf_input.text())
                 if cf <= 0:
                     self.show_error("摩擦系數 Cf 必須為正數")
                     return
-                result_text = self._calculate_cf_mode(cf, u, y, nu)
+                record = self._calculate_cf_mode(rho, mu, cf, u, y, L, nu)
             elif mode == 2:  # 直接輸入 τw 或 u_τ 模式
-                result_text = self._calculate_tau_mode(rho, mu, u, y, L, nu)
+                record = self._calculate_tau_mode(rho, mu, u, y, L, nu)
+            elif mode == 3:  # 由第一層速度反解壁面定律
+                u_p = float(self.u_p_input.text())
+                if u_p <= 0:
+                    self.show_error("第一層速度 U_p 必須為正數")
+                    return
+                law = self.wall_law_combo.currentData()
+                record = self._calculate_wall_law_mode(rho, mu, u, y, L, nu, u_p, law)
             else:
                 self.show_error("模式選擇錯誤")
                 return
+            if record is None:
+                return
 
+            result_text = DEFAULT_REPORTS.body(record)
             self.result_display.setText(result_text)
             self.last_result = {
                 "rho": rho,
@@ -230,6 +268,7 @@ class CFDYPlusCalculator(QMainWindow):
                 "L": L,
                 "result": result_text,
                 "mode": mode,
+                "record": record,
             }
 
         except ValueError as e:
@@ -238,113 +277,33 @@ class CFDYPlusCalculator(QMainWindow):
             self.show_error(f"計算錯誤：{str(e)}")
 
     def _calculate_blasius(self, rho, mu, u, y, L, nu):
-        """Blasius 公式計算模式"""
+        """Blasius 公式計算模式，回傳報告記錄"""
         # 計算雷諾數
         Re_x = rho * u * L / mu
 
-        # 使用 Blasius-Schlichting 公式估算摩擦系數（湍流）
-        if Re_x < 5e5:
-            # 層流邊界層
-            Cf = 0.664 / (Re_x**0.5)
-        else:
-            # 湍流邊界層
-            Cf = 0.455 / ((log10(Re_x)) ** 2.58)
+        # 使用 Blasius-Schlichting 公式估算摩擦系數（層流/湍流）
+        Cf = blasius_cf(Re_x)
 
         # 計算摩擦速度
-        u_tau = (Cf / 2) ** 0.5 * u
+        u_tau = u_tau_from_cf(Cf, u)
 
         # 計算 y+
-        y_plus = y * u_tau / nu
-
-        # 格式化結果
-        result = f"""
-計算結果（模式 A：Blasius 公式）
-═══════════════════════════════════════════
-【計算步驟】
-
-1. 流動參數：
-   - 密度 ρ = {rho:.4f} kg/m³
-   - 動力粘度 μ = {mu:.4e} Pa·s
-   - 動力學粘度 ν = {nu:.4e} m²/s
-   - 流速 U = {u:.4f} m/s
-   - 特徵長度 L = {L:.4f} m
-
-2. 雷諾數：
-   Re_x = ρ·U·L/μ = {Re_x:.4e}
-
-3. 摩擦系數（Blasius-Schlichting）：
-   C_f = 0.455 / (log₁₀(Re_x))^2.58
-   C_f = {Cf:.6e}
+        y_plus = calc_y_plus(y, u_tau, nu)
 
-4. 摩擦速度：
-   u_τ = √(C_f/2) · U = {u_tau:.6f} m/s
+        return self._record(MODE_BLASIUS, rho, mu, u, y, L, nu, Cf, u_tau, y_plus)
 
-5. y+ 計算：
-   y⁺ = y · u_τ / ν = {y_plus:.6f}
-
-═══════════════════════════════════════════
-【最終結果】
-y⁺ = {y_plus:.6f}
-
-【網格評估】
-"""
-        if y_plus < 1:
-            result += "✓ 精確解析邊界層（y⁺ < 1）\n   適用於 LES/DNS，需要精細網格"
-        elif 1 <= y_plus <= 5:
-            result += "✓ 標準精確解析範圍（1 ≤ y⁺ ≤ 5）\n   推薦用於精確的 RANS 模擬"
-        elif 5 < y_plus <= 30:
-            result += "⚠ 介於兩種方法之間（5 < y⁺ ≤ 30）\n   不推薦，建議調整網格"
-        elif 30 < y_plus <= 300:
-            result += "✓ 壁面函數適用範圍（30 < y⁺ ≤ 300）\n   適用於壁面函數法 RANS"
-        else:
-            result += "⚠ 過於粗糙的網格（y⁺ > 300）\n   需要更精細的邊界層網格"
-
-        return result
-
-    def _calculate_cf_mode(self, cf, u, y, nu):
-        """直接輸入 Cf 的計算模式"""
+    def _calculate_cf_mode(self, rho, mu, cf, u, y, L, nu):
+        """直接輸入 Cf 的計算模式，回傳報告記錄"""
         # 計算摩擦速度
-        u_tau = (cf / 2) ** 0.5 * u
+        u_tau = u_tau_from_cf(cf, u)
 
         # 計算 y+
-        y_plus = y * u_tau / nu
-
-        result = f"""
-計算結果（模式 B：直接輸入摩擦系數）
-═══════════════════════════════════════════
-【計算步驟】
-
-1. 輸入參數：
-   - 流速 U = {u:.4f} m/s
-   - 摩擦系數 C_f = {cf:.6e}
-   - 動力學粘度 ν = {nu:.4e} m²/s
-   - 第一層高度 y = {y:.4e} m
-
-2. 摩擦速度：
-   u_τ = √(C_f/2) · U = {u_tau:.6f} m/s
-
-3. y+ 計算：
-   y⁺ = y · u_τ / ν = {y_plus:.6f}
-
-═══════════════════════════════════════════
-【最終結果】
-y⁺ = {y_plus:.6f}
-
-【網格評估】
-"""
-        if y_plus < 1:
-            result += "✓ 精確解析邊界層（y⁺ < 1）"
-        elif 1 <= y_plus <= 5:
-            result += "✓ 標準精確解析範圍（1 ≤ y⁺ ≤ 5）"
-        elif 30 < y_plus <= 300:
-            result += "✓ 壁面函數適用範圍（30 < y⁺ ≤ 300）"
-        else:
-            result += "⚠ 建議調整網格或摩擦係數"
+        y_plus = calc_y_plus(y, u_tau, nu)
 
-        return result
+        return self._record(MODE_CF, rho, mu, u, y, L, nu, cf, u_tau, y_plus)
 
     def _calculate_tau_mode(self, rho, mu, u, y, L, nu):
-        """直接輸入剪應力或摩擦速度的計算模式"""
+        """直接輸入剪應力或摩擦速度的計算模式，回傳報告記錄"""
         use_tau = True
 
         try:
@@ -368,55 +327,73 @@ y⁺ = {y_plus:.6f}
                 return None
 
         if use_tau:
-            # 從剪應力計算摩擦速度
-            u_tau = (tau / rho) ** 0.5
-            tau_display = tau
+            # 從剪應力計算摩擦速度與 y+
+            u_tau, y_plus = y_plus_from_tau(tau, y, rho, mu)
         else:
             # 直接使用摩擦速度
-            tau_display = u_tau**2 * rho
-
-        # 計算 y+
-        y_plus = y * u_tau / nu
-
-        result = f"""
-計算結果（模式 C：直接輸入剪應力或摩擦速度）
-═══════════════════════════════════════════
-【計算步驟】
-
-1. 輸入參數：
-   - 密度 ρ = {rho:.4f} kg/m³
-   - 動力學粘度 ν = {nu:.4e} m²/s
-   - 第一層高度 y = {y:.4e} m
+            y_plus = calc_y_plus(y, u_tau, nu)
 
-2. 摩擦參數：
-"""
+        # 以 τw 反推 C_f = 2·τw/(ρ·U²)
+        cf = 2.0 * (u_tau / u) ** 2
+        record = self._record(MODE_TAU, rho, mu, u, y, L, nu, cf, u_tau, y_plus)
         if use_tau:
-            result += f"   - 剪應力 τ_w = {tau_display:.6e} Pa\n"
-            result += f"   - 摩擦速度 u_τ = √(τ_w/ρ) = {u_tau:.6f} m/s\n"
-        else:
-            result += f"   - 摩擦速度 u_τ = {u_tau:.6f} m/s\n"
-            result += f"   - 對應剪應力 τ_w = u_τ²·ρ = {tau_display:.6e} Pa\n"
+            record["tau_w"] = tau
+        record["source"] = "tau" if use_tau else "u_tau"
+        return record
+
+    def _calculate_wall_law_mode(self, rho, mu, u, y, L, nu, u_p, law):
+        """由第一層網格中心速度反解壁面定律的計算模式，回傳報告記錄"""
+        # y 為第一層網格中心到壁面的距離，與求解器的壁面函數一致
+        u_tau, y_plus, converged = u_tau_from_wall_law(u_p, y, nu, law)
+        if not converged:
+            self.show_error("壁面定律疊代未收斂，請檢查輸入參數")
+            return None
+
+        # 以 u_τ 反推 C_f = 2·(u_τ/U)²
+        cf = 2.0 * (u_tau / u) ** 2
+        record = self._record(MODE_WALL_LAW, rho, mu, u, y, L, nu, cf, u_tau, y_plus)
+        record["u_p"] = u_p
+        record["law"] = law
+        record["re_y"] = u_p * y / nu
+        record["u_plus"] = u_p / float(u_tau)
+        return record
+
+    @staticmethod
+    def _record(mode, rho, mu, u, y, L, nu, cf, u_tau, y_plus):
+        """組成報告產生器使用的數值記錄"""
+        return {
+            "mode": mode,
+            "rho": rho,
+            "mu": mu,
+            "nu": nu,
+            "u": u,
+            "y": y,
+            "L": L,
+            "re_x": rho * u * L / mu,
+            "cf": float(cf),
+            "u_tau": float(u_tau),
+            "tau_w": float(u_tau) ** 2 * rho,
+            "y_plus": float(y_plus),
+            "regime": DEFAULT_BANDS.classify_one(float(y_plus)),
+        }
 
-        result += f"""
-3. y+ 計算：
-   y⁺ = y · u_τ / ν = {y_plus:.6f}
+    def open_patch_table(self):
+        """開啟多 patch 表格，使用目前的密度與粘度"""
+        try:
+            rho = float(self.rho_input.text())
+            mu = float(self.mu_input.text())
+        except ValueError:
+            self.show_error("請先輸入有效的密度 ρ 與動力粘度 μ")
+            return
 
-═══════════════════════════════════════════
-【最終結果】
-y⁺ = {y_plus:.6f}
+        if self.patch_window is None:
+            from patch_table import PatchTableWindow
 
-【網格評估】
-"""
-        if y_plus < 1:
-            result += "✓ 精確解析邊界層（y⁺ < 1）"
-        elif 1 <= y_plus <= 5:
-            result += "✓ 標準精確解析範圍（1 ≤ y⁺ ≤ 5）"
-        elif 30 < y_plus <= 300:
-            result += "✓ 壁面函數適用範圍（30 < y⁺ ≤ 300）"
+            self.patch_window = PatchTableWindow(rho, mu)
         else:
-            result += "⚠ 建議調整網格"
-
-        return result
+            self.patch_window.set_fluid(rho, mu)
+        self.patch_window.show()
+        self.patch_window.raise_()
 
     def show_error(self, message):
         """顯示錯誤信息"""
@@ -432,6 +409,7 @@ y⁺ = {y_plus:.6f}
         self.cf_input.setText("0.01")
         self.tau_input.setText("0.1")
         self.u_tau_input.setText("0.5")
+        self.u_p_input.setText("1.0")
         self.result_display.setText("")
         self.last_result = None
 
@@ -469,14 +447,7 @@ y⁺ = {y_plus:.6f}
                     writer.writerow(["特徵長度 L", self.last_result["L"], "m"])
 
                     writer.writerow([])
-                    writer.writerow(
-                        [
-                            "計算模式",
-                            ["Blasius 公式", "直接輸入 Cf", "直接輸入 τw/u_τ"][
-                                self.last_result["mode"]
-                            ],
-                        ]
-                    )
+                    writer.writerow(["計算模式", MODE_NAMES[self.last_result["mode"]]])
                     writer.writerow([])
 
                     # 寫入結果文本
@@ -490,43 +461,22 @@ y⁺ = {y_plus:.6f}
                 QMessageBox.critical(self, "錯誤", f"匯出失敗：{str(e)}")
 
     def export_txt(self):
-        """匯出為文字檔案"""
+        """匯出為報告檔案（文字、Markdown 或 HTML，依副檔名決定）"""
         if not self.last_result:
             QMessageBox.warning(self, "警告", "請先執行計算")
             return
 
         file_path, _ = QFileDialog.getSaveFileName(
-            self, "儲存文字檔案", "", "文字檔案 (*.txt)"
+            self,
+            "儲存報告檔案",
+            "",
+            "文字檔案 (*.txt);;Markdown (*.md);;HTML (*.html)",
         )
 
         if file_path:
             try:
-                # 明確指定 UTF-8 編碼
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write("═" * 50 + "\n")
-                    f.write("CFD y+ 計算工具 - 詳細報告\n")
-                    f.write(
-                        f"生成時間：{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    )
-                    f.write("═" * 50 + "\n\n")
-
-                    f.write("【輸入參數】\n")
-                    f.write(f"密度 ρ: {self.last_result['rho']:.6f} kg/m³\n")
-                    f.write(f"動力粘度 μ: {self.last_result['mu']:.6e} Pa·s\n")
-                    f.write(f"流速 U: {self.last_result['u']:.6f} m/s\n")
-                    f.write(f"第一層高度 y: {self.last_result['y']:.6e} m\n")
-                    f.write(f"特徵長度 L: {self.last_result['L']:.6f} m\n")
-                    f.write(
-                        f"計算模式: {['Blasius 公式', '直接輸入 Cf', '直接輸入 τw/u_τ'][self.last_result['mode']]}\n\n"
-                    )
-
-                    f.write("【計算結果】\n")
-                    f.write(self.last_result["result"])
-                    f.write("\n\n")
-
-                    f.write("═" * 50 + "\n")
-                    f.write("報告結束\n")
-                    f.write("═" * 50 + "\n")
+                # 報告產生器明確使用 UTF-8 編碼寫出
+                DEFAULT_REPORTS.write(file_path, self.last_result["record"])
 
                 QMessageBox.information(self, "成功", f"已匯出到：{file_path}")
 
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 第一層高度最佳化
+對一組運轉點（流速、流體、特徵長度）找出使所有點的 y+ 都落在目標範圍內的
+最大第一層高度，並可估算邊界層網格的成長率
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import csv
+import math
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from yplus_core import FLUID_PRESETS, boundary_layer_thickness, compute_patches
+
+# 成長率二分法的疊代次數（區間縮小約 2^-60）
+_GROWTH_ITERATIONS = 60
+
+
+def operating_points(points):
+    """
+    將運轉點清單轉為欄位陣列
+
+    每個運轉點為字典：`u`、`L`，流體以 `fluid`（FLUID_PRESETS 的名稱）或
+    `rho` 與 `mu` 指定；`cf` 與 `name` 為選用。
+    """
+    columns = {key: [] for key in ("rho", "mu", "u", "L", "cf")}
+    names = []
+    for i, point in enumerate(points):
+        fluid = point.get("fluid")
+        if fluid:
+            if fluid not in FLUID_PRESETS:
+                raise ValueError(f"未知的流體：{fluid}")
+            rho, mu = FLUID_PRESETS[fluid]["rho"], FLUID_PRESETS[fluid]["mu"]
+        else:
+            rho, mu = point["rho"], point["mu"]
+        for key, value in (("rho", rho), ("mu", mu), ("u", point["u"])):
+            columns[key].append(float(value))
+        columns["L"].append(float(point["L"]))
+        cf = point.get("cf")
+        columns["cf"].append(float(cf) if cf not in (None, "") else math.nan)
+        names.append(str(point.get("name") or f"#{i + 1}"))
+
+    result = {
+        key: np.array(values, dtype=np.float64) for key, values in columns.items()
+    }
+    if np.any(result["rho"] <= 0) or np.any(result["mu"] <= 0):
+        raise ValueError("密度與粘度必須為正數")
+    if np.any(result["u"] <= 0) or np.any(result["L"] <= 0):
+        raise ValueError("流速與特徵長度必須為正數")
+    result["name"] = names
+    return result
+
+
+def y_plus_per_meter(columns):
+    """
+    各運轉點每公尺第一層高度對應的 y+
+
+    y+ = y·u_τ/ν 對 y 為線性，故以 y = 1 m 一次向量化計算所有運轉點，
+    任意候選高度的 y+ 只需相乘。回傳 (y+/m, Re_x)。
+    """
+    result = compute_patches(
+        columns["rho"],
+        columns["mu"],
+        columns["u"],
+        1.0,
+        columns["L"],
+        cf=columns["cf"],
+    )
+    return result["y_plus"], result["re_x"]
+
+
+def y_plus_matrix(heights, columns):
+    """候選高度 × 運轉點的 y+ 矩陣，形狀 (高度數, 運轉點數)"""
+    per_meter, _ = y_plus_per_meter(columns)
+    return np.multiply.outer(np.asarray(heights, dtype=np.float64), per_meter)
+
+
+def stack_thickness(y, growth, layers):
+    """等比成長的邊界層網格總厚度 y·(r^N − 1)/(r − 1)"""
+    if growth == 1.0:
+        return y * layers
+    return y * (growth**layers - 1.0) / (growth - 1.0)
+
+
+def growth_ratio(y, layers, thickness, max_growth=1.3):
+    """
+    使 `layers` 層網格總厚度達到 `thickness` 的最小成長率
+
+    總厚度對成長率單調遞增，以二分法求解。超過 `max_growth` 時回傳 None。
+    """
+    if stack_thickness(y, 1.0, layers) >= thickness:
+        return 1.0
+    if stack_thickness(y, max_growth, layers) < thickness:
+        return None
+    lo, hi = 1.0, max_growth
+    for _ in range(_GROWTH_ITERATIONS):
+        mid = 0.5 * (lo + hi)
+        if stack_thickness(y, mid, layers) < thickness:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def layers_needed(y, growth, thickness):
+    """以固定成長率覆蓋 `thickness` 所需的最少層數"""
+    if growth == 1.0:
+        return math.ceil(thickness / y)
+    return math.ceil(math.log(1.0 + thickness * (growth - 1.0) / y) / math.log(growth))
+
+
+def optimize_first_cell(
+    points,
+    y_plus_range=(1.0, 5.0),
+    layers=None,
+    coverage=1.0,
+    max_growth=1.3,
+):
+    """
+    找出使所有運轉點的 y+ 都落在 `y_plus_range` 內的最大第一層高度
+
+    每個運轉點的可行高度為 [下限/(y+/m), 上限/(y+/m)]，所有點一次向量化計算，
+    取交集的上界即為最大高度；交集為空時 feasible 為 False。
+    指定 `layers` 時，另求使網格總厚度達到最厚邊界層 × `coverage` 的成長率。
+
+    回傳字典：y、y_min、y_max、feasible、limiting（決定上界的運轉點）、
+    y_plus（各點在 y 的 y+）、re_x、delta（邊界層厚度），以及成長率相關欄位。
+    """
+    columns = points if isinstance(points, dict) else operating_points(points)
+    lower, upper = y_plus_range
+    if not 0 <= lower < upper:
+        raise ValueError("y+ 範圍的下限必須小於上限")
+    if not math.isfinite(upper):
+        raise ValueError("y+ 範圍必須有上限")
+
+    per_meter, re_x = y_plus_per_meter(columns)
+    if not np.all(per_meter > 0):
+        raise ValueError("無法計算部分運轉點的 y+，請檢查輸入參數")
+    y_low = lower / per_meter
+    y_high = upper / per_meter
+    y_min = float(y_low.max())
+    y_max = float(y_high.min())
+    feasible = y_min <= y_max
+    y = y_max
+
+    delta = boundary_layer_thickness(re_x, columns["L"])
+    result = {
+        "y": y,
+        "y_min": y_min,
+        "y_max": y_max,
+        "feasible": feasible,
+        "limiting": int(np.argmin(y_high)),
+        "y_plus": y * per_meter,
+        "re_x": re_x,
+        "delta": delta,
+        "name": columns["name"],
+    }
+    if layers:
+        thickness = coverage * float(delta.max())
+        growth = growth_ratio(y, layers, thickness, max_growth)
+        result["thickness"] = thickness
+        result["growth"] = growth
+        result["layers_needed"] = (
+            layers if growth is not None else layers_needed(y, max_growth, thickness)
+        )
+    return result
+
+
+def read_points(path):
+    """讀取運轉點 CSV（欄位：name、u、L、fluid 或 rho/mu、cf）"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [
+            {key.strip(): value.strip() for key, value in row.items() if key}
+            for row in csv.DictReader(f)
+        ]
+
+
+def format_result(result):
+    """最佳化結果的文字摘要"""
+    lines = []
+    if result["feasible"]:
+        lines.append(f"✓ 最大第一層高度 y = {result['y']:.4e} m")
+        lines.append(f"   可行範圍下限 y_min = {result['y_min']:.4e} m")
+    else:
+        lines.append("⚠ 沒有任何第一層高度能讓所有運轉點落在目標範圍內")
+        lines.append(
+            f"   需要 y ≥ {result['y_min']:.4e} m 且 y ≤ {result['y_max']:.4e} m"
+        )
+    lines.append(f"   決定上限的運轉點：{result['name'][result['limiting']]}")
+    if "growth" in result:
+        if result["growth"] is not None:
+            lines.append(
+                f"   成長率 r = {result['growth']:.4f}"
+                f"（覆蓋邊界層厚度 {result['thickness']:.4e} m）"
+            )
+        else:
+            lines.append(
+                f"⚠ 成長率超過上限，需要至少 {result['layers_needed']} 層"
+                f"才能覆蓋 {result['thickness']:.4e} m"
+            )
+    lines.append("")
+    lines.append(f"{'運轉點':<12}{'Re_x':>12}{'y⁺':>12}{'δ (m)':>12}")
+    for name, re_x, y_plus, delta in zip(
+        result["name"], result["re_x"], result["y_plus"], result["delta"]
+    ):
+        lines.append(f"{name:<12}{re_x:>12.4e}{y_plus:>12.4f}{delta:>12.4e}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """命令列入口"""
+    parser = argparse.ArgumentParser(description="多運轉點第一層網格高度最佳化")
+    parser.add_argument("points", help="運轉點 CSV 檔案")
+    parser.add_argument(
+        "--band",
+        choices=DEFAULT_BANDS.labels,
+        help="以網格評估分區作為目標範圍（預設：標準精確）",
+    )
+    parser.add_argument("--y-plus-min", type=float)
+    parser.add_argument("--y-plus-max", type=float)
+    parser.add_argument("--layers", type=int, help="邊界層網格層數，用於估算成長率")
+    parser.add_argument(
+        "--coverage", type=float, default=1.0, help="覆蓋邊界層厚度的倍數"
+    )
+    parser.add_argument("--max-growth", type=float, default=1.3)
+    args = parser.parse_args(argv)
+
+    lower, upper = DEFAULT_BANDS.bounds(DEFAULT_BANDS.code_of(args.band or "標準精確"))
+    if args.y_plus_min is not None:
+        lower = args.y_plus_min
+    if args.y_plus_max is not None:
+        upper = args.y_plus_max
+
+    try:
+        result = optimize_first_cell(
+            read_points(args.points),
+            (lower, upper),
+            layers=args.layers,
+            coverage=args.coverage,
+            max_growth=args.max_growth,
+        )
+    except (OSError, ValueError) as e:
+        # 例如 --band 過於粗糙 沒有上限、運轉點檔案無法讀取或數值無效
+        parser.error(str(e))
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 共享記憶體平行計算
+將輸入與輸出欄位放在 multiprocessing.shared_memory 中，
+各工作程序直接就地計算互不重疊的區段，陣列不經過 pickle 複製
+此文件使用 UTF-8 編碼
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from storage import DEFAULT_PRECISION, storage_dtype, store_values
+from yplus_core import y_plus_from_tau
+
+# 少於此面數時直接在本程序計算，啟動工作程序的成本高於計算本身
+PARALLEL_THRESHOLD = 1 << 20
+
+# 每個工作項目最多處理的面數，使暫存陣列維持在數十 MB 以內
+MAX_TASK_SIZE = 1 << 21
+
+# 工作程序中已附加的共享欄位（由 _attach() 設定）
+_worker_columns = None
+
+# 附加區段時暫時取代 resource_tracker.register，避免多執行緒同時附加互相干擾
+_attach_lock = threading.Lock()
+
+
+def _open_segment(name):
+    """附加既有的共享記憶體區段，不交由 resource_tracker 管理其生命週期"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # 3.12 以前附加時也會向 resource_tracker 登記，附加者結束時可能刪除區段。
+    # 工作程序與建立者共用同一個 resource_tracker，事後 unregister 會連同
+    # 建立者的登記一起取消，因此改為附加期間略過登記
+    with _attach_lock:
+        register = resource_tracker.register
+
+        def register_others(resource, rtype):
+            if rtype != "shared_memory":
+                register(resource, rtype)
+
+        resource_tracker.register = register_others
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _release(segments):
+    """關閉並刪除所有區段；可重複呼叫"""
+    while segments:
+        segment = segments.pop()
+        try:
+            segment.close()
+        except BufferError:
+            # 呼叫端仍持有陣列視圖；對應在視圖釋放後才解除，刪除名稱不受影響
+            pass
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SharedColumns:
+    """
+    共享記憶體欄位集合
+
+    以 `create()` 建立具名的 NumPy 陣列，資料直接存放在共享記憶體中，
+    可直接由讀取器填入而不需先建立一般陣列。`descriptor()` 只包含區段名稱、
+    形狀與型別，傳給工作程序的成本與陣列大小無關。
+
+    建議以 with 使用：離開區塊（含例外與 Ctrl+C）時必定釋放所有區段；
+    物件被回收或直譯器結束時也會釋放，避免在 /dev/shm 留下殘檔。
+    """
+
+    def __init__(self):
+        self._segments = []
+        self._columns = {}
+        self._finalizer = weakref.finalize(self, _release, self._segments)
+
+    def create(self, name, shape, dtype=np.float64):
+        """建立新的共享欄位並回傳其陣列視圖（內容未初始化）"""
+        if name in self._columns:
+            raise ValueError(f"欄位已存在：{name}")
+        shape = tuple(np.atleast_1d(shape).astype(int).tolist())
+        dtype = np.dtype(dtype)
+        size = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        self._segments.append(segment)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        self._columns[name] = (segment.name, shape, dtype.str, array)
+        return array
+
+    def put(self, name, values, dtype=np.float64):
+        """建立共享欄位並複製既有陣列的內容"""
+        values = np.asarray(values)
+        array = self.create(name, values.shape, dtype)
+        array[...] = values
+        return array
+
+    def __getitem__(self, name):
+        return self._columns[name][3]
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def descriptor(self):
+        """可傳給工作程序的欄位描述：{名稱: (區段名稱, 形狀, 型別)}"""
+        return {
+            name: (segment, shape, dtype)
+            for name, (segment, shape, dtype, _) in self._columns.items()
+        }
+
+    def close(self):
+        """釋放所有共享記憶體區段；之後不可再使用先前回傳的陣列"""
+        self._columns.clear()
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(descriptor):
+    """
+    依描述附加共享欄位
+
+    回傳 (欄位陣列字典, 區段清單)；區段需保持存活直到不再使用陣列，
+    之後只需 close()，刪除由建立者負責。
+    """
+    segments, columns = [], {}
+    for name, (segment_name, shape, dtype) in descriptor.items():
+        segment = _open_segment(segment_name)
+        segments.append(segment)
+        columns[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    return columns, segments
+
+
+def _attach(descriptor):
+    """工作程序初始化：每個程序只附加一次"""
+    global _worker_columns
+    _worker_columns = attach(descriptor)
+
+
+def _evaluate_slice(start, stop, rho, mu, bands):
+    """在工作程序中就地計算 [start, stop) 區段"""
+    columns, _ = _worker_columns
+    evaluate_range(columns, start, stop, rho, mu, bands)
+    return stop - start
+
+
+def evaluate_range(columns, start, stop, rho, mu, bands=DEFAULT_BANDS):
+    """
+    計算欄位的一個區段並寫回輸出欄位
+
+    輸入：`tau`（N 或 N×3）、`y`（長度 1 表示所有面共用，或長度 N）。
+    輸出：`u_tau`、`y_plus`（float64 或 float32，以 float64 計算後寫入）與 `regime`（uint8 分區代碼）。
+    有 `flags` 欄位時，超出儲存型別範圍的面標記 storage.OUT_OF_RANGE。
+    """
+    y = columns["y"]
+    y = y[0] if len(y) == 1 else y[start:stop]
+    u_tau, y_plus = y_plus_from_tau(columns["tau"][start:stop], y, rho, mu)
+    flags = columns["flags"][start:stop] if "flags" in columns else None
+    if flags is not None:
+        flags[...] = 0
+    store_values(u_tau, columns["u_tau"][start:stop], flags)
+    store_values(y_plus, columns["y_plus"][start:stop], flags)
+    bands.classify(y_plus, out=columns["regime"][start:stop])
+
+
+def _task_ranges(count, workers):
+    """將 [0, count) 切成不重疊的區段，每個工作程序約分到 4 段以平衡負載"""
+    size = min(max(-(-count // (workers * 4)), 1), MAX_TASK_SIZE)
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def evaluate_shared(
+    shared, rho, mu, workers=None, bands=DEFAULT_BANDS, precision=DEFAULT_PRECISION
+):
+    """
+    以多個工作程序就地計算 SharedColumns 中的所有面
+
+    `shared` 需包含 `tau` 與 `y` 欄位；尚未建立的輸出欄位會自動建立，
+    數值欄位依 `precision` 儲存（計算仍使用 float64，寫入時捨入一次），
+    超出儲存型別範圍的數值寫為 ±inf/NaN 並標記於 `flags` 欄位。
+    工作程序只接收區段名稱與索引範圍。回傳 `shared` 本身。
+    """
+    count = len(shared["tau"])
+    dtype = storage_dtype(precision)
+    if "u_tau" not in shared:
+        shared.create("u_tau", count, dtype)
+    if "y_plus" not in shared:
+        shared.create("y_plus", count, dtype)
+    if "regime" not in shared:
+        shared.create("regime", count, np.uint8)
+    if "flags" not in shared:
+        shared.create("flags", count, np.uint8)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or count < PARALLEL_THRESHOLD:
+        columns = {name: shared[name] for name in shared.descriptor()}
+        evaluate_range(columns, 0, count, rho, mu, bands)
+        return shared
+
+    pool = multiprocessing.Pool(
+        workers, initializer=_attach, initargs=(shared.descriptor(),)
+    )
+    try:
+        tasks = [
+            (start, stop, rho, mu, bands)
+            for start, stop in _task_ranges(count, workers)
+        ]
+        pool.starmap(_evaluate_slice, tasks, chunksize=1)
+        pool.close()
+    except BaseException:
+        # 例外或中斷時立即終止工作程序，確保區段可被釋放
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return shared
+
+
+def parallel_y_plus(
+    tau, y, rho, mu, workers=None, bands=DEFAULT_BANDS, precision=DEFAULT_PRECISION
+):
+    """
+    平行計算逐面 y+ 的便利函數
+
+    輸入只複製一次到共享記憶體（記憶體複製，不經 pickle），結果複製回一般陣列；
+    `precision` 為 "float32" 時 u_τ 與 y+ 以 float32 儲存，記憶體減半；
+    超出 float32 範圍的值為 ±inf/NaN（逐面旗標見 evaluate_shared 的 `flags` 欄位）。
+    資料量極大時建議直接以 SharedColumns 讀入資料並呼叫 evaluate_shared()。
+    回傳 (u_τ, y+, 分區代碼)。
+    """
+    with SharedColumns() as shared:
+        shared.put("tau", tau)
+        shared.put("y", np.atleast_1d(np.asarray(y, dtype=np.float64)).ravel())
+        evaluate_shared(shared, rho, mu, workers, bands, precision)
+        return (
+            shared["u_tau"].copy(),
+            shared["y_plus"].copy(),
+            shared["regime"].copy(),
+        )
@@ -0,0 +1,462 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 多 patch 表格
+以 NumPy 欄位陣列為後端的虛擬化表格，排序與篩選皆在陣列上完成
+此文件使用 UTF-8 編碼
+"""
+
+import csv
+import io
+
+import numpy as np
+from PySide6.QtCore import QAbstractTableModel, Qt
+from PySide6.QtGui import QGuiApplication, QKeySequence
+from PySide6.QtWidgets import (
+    QComboBox,
+    QFileDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QLineEdit,
+    QMessageBox,
+    QPushButton,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
+)
+
+from regime import DEFAULT_BANDS
+from report import DEFAULT_REPORTS, batch_records
+from yplus_core import compute_patches
+
+# 輸入欄位（可編輯），依貼上/匯入的欄位順序
+INPUT_COLUMNS = ("name", "u", "y", "L", "cf", "tau")
+# 計算結果欄位
+OUTPUT_COLUMNS = ("re_x", "u_tau", "y_plus", "regime")
+
+COLUMN_TITLES = {
+    "name": "名稱",
+    "u": "U (m/s)",
+    "y": "y (m)",
+    "L": "L (m)",
+    "cf": "Cf",
+    "tau": "τw (Pa)",
+    "re_x": "Re_x",
+    "u_tau": "u_τ (m/s)",
+    "y_plus": "y⁺",
+    "regime": "網格評估",
+}
+
+COLUMN_FORMATS = {
+    "u": "{:.4f}",
+    "y": "{:.4e}",
+    "L": "{:.4f}",
+    "cf": "{:.6e}",
+    "tau": "{:.6e}",
+    "re_x": "{:.4e}",
+    "u_tau": "{:.6f}",
+    "y_plus": "{:.6f}",
+}
+
+
+def parse_patch_rows(text):
+    """
+    解析 Tab 或逗號分隔的 patch 文字（試算表貼上或 CSV 內容）
+
+    欄位順序：名稱, U, y, L, Cf, τw；Cf 與 τw 可留空。
+    第二欄無法轉為數值的列視為標題列並略過。
+    回傳輸入欄位陣列字典。
+    """
+    delimiter = "\t" if "\t" in text.split("\n", 1)[0] else ","
+    names = []
+    values = []
+    for row in csv.reader(io.StringIO(text), delimiter=delimiter):
+        if len(row) < 4:
+            continue
+        try:
+            float(row[1])
+        except ValueError:
+            continue
+        names.append(row[0].strip())
+        values.append(
+            [
+                float(cell) if cell.strip() else np.nan
+                for cell in (row[1:6] + [""] * (6 - len(row)))
+            ]
+        )
+
+    numeric = np.array(values, dtype=np.float64).reshape(-1, 5)
+    columns = {"name": np.array(names, dtype=object)}
+    for i, key in enumerate(INPUT_COLUMNS[1:]):
+        columns[key] = numeric[:, i].copy()
+    return columns
+
+
+class PatchTableModel(QAbstractTableModel):
+    """
+    以欄位陣列儲存所有 patch 的表格模型
+
+    `_view` 為目前顯示列在陣列中的索引，排序與篩選只重排此索引，
+    QTableView 只向模型查詢可見的儲存格。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.keys = INPUT_COLUMNS + OUTPUT_COLUMNS
+        self.rho = 1.204
+        self.mu = 1.810e-5
+        self._columns = {key: np.empty(0) for key in self.keys}
+        self._columns["name"] = np.empty(0, dtype=object)
+        self._columns["regime"] = np.empty(0, dtype=np.uint8)
+        self._view = np.empty(0, dtype=np.intp)
+        self._sort = None
+        self._filter = (None, None, None)
+
+    # ---------- Qt 介面 ----------
+
+    def rowCount(self, parent=None):
+        return 0 if parent is not None and parent.isValid() else len(self._view)
+
+    def columnCount(self, parent=None):
+        return 0 if parent is not None and parent.isValid() else len(self.keys)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return COLUMN_TITLES[self.keys[section]]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        key = self.keys[index.column()]
+        value = self._columns[key][self._view[index.row()]]
+
+        if role == Qt.DisplayRole or role == Qt.EditRole:
+            if key == "name":
+                return value
+            if key == "regime":
+                return DEFAULT_BANDS.label(value) or ""
+            if np.isnan(value):
+                return ""
+            return COLUMN_FORMATS[key].format(value)
+        if role == Qt.TextAlignmentRole and key != "name":
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and self.keys[index.column()] in INPUT_COLUMNS:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """
+        編輯單一儲存格並重新計算該列
+
+        編輯後的列保留在原位置，不重新套用篩選與排序，避免正在編輯的列
+        從畫面上移走；下次排序、篩選或重新計算時才會依新值調整。
+        """
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        key = self.keys[index.column()]
+        row = self._view[index.row()]
+        if key == "name":
+            self._columns[key][row] = str(value)
+        else:
+            text = str(value).strip()
+            try:
+                self._columns[key][row] = float(text) if text else np.nan
+            except ValueError:
+                return False
+            self._compute(np.array([row]))
+        self.dataChanged.emit(
+            self.index(index.row(), 0), self.index(index.row(), len(self.keys) - 1)
+        )
+        return True
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """只重排目前顯示的列（不重新篩選），並更新持久索引"""
+        self._sort = (self.keys[column], order)
+        self.layoutAboutToBeChanged.emit()
+        old_view = self._view
+        self._view = self._sorted(old_view)
+        # 陣列列號 → 新的顯示位置
+        position = np.empty(len(self._columns["u"]), dtype=np.intp)
+        position[self._view] = np.arange(len(self._view))
+        old_indexes = self.persistentIndexList()
+        new_indexes = [
+            self.index(int(position[old_view[index.row()]]), index.column())
+            for index in old_indexes
+        ]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # ---------- 陣列操作 ----------
+
+    def column(self, key):
+        """回傳完整（未篩選）的欄位陣列"""
+        return self._columns[key]
+
+    def visible_rows(self):
+        """回傳目前顯示列在欄位陣列中的索引"""
+        return self._view
+
+    def set_fluid(self, rho, mu):
+        """設定所有 patch 共用的流體性質並重新計算"""
+        self.rho = rho
+        self.mu = mu
+        self.recompute()
+
+    def set_patches(self, columns):
+        """以新的輸入欄位取代全部 patch"""
+        self.beginResetModel()
+        n = len(columns["u"])
+        for key in INPUT_COLUMNS:
+            self._columns[key] = columns[key]
+        for key in OUTPUT_COLUMNS:
+            self._columns[key] = np.full(n, np.nan)
+        self._columns["regime"] = np.zeros(n, dtype=np.uint8)
+        self._compute(slice(None))
+        self._view = self._filtered_rows()
+        self.endResetModel()
+
+    def append_patches(self, columns):
+        """在現有 patch 之後附加新的列"""
+        merged = {
+            key: np.concatenate([self._columns[key], columns[key]])
+            for key in INPUT_COLUMNS
+        }
+        self.set_patches(merged)
+
+    def recompute(self):
+        """以一次向量化呼叫重新計算所有列；結果改變後重新篩選與排序"""
+        self.beginResetModel()
+        self._compute(slice(None))
+        self._apply_view()
+        self.endResetModel()
+
+    def set_filter(self, y_plus_min=None, y_plus_max=None, regimes=None):
+        """依 y+ 範圍與網格評估分區篩選；None 表示不限制"""
+        self._filter = (y_plus_min, y_plus_max, regimes)
+        self.beginResetModel()
+        self._apply_view()
+        self.endResetModel()
+
+    def _compute(self, rows):
+        cols = self._columns
+        result = compute_patches(
+            self.rho,
+            self.mu,
+            cols["u"][rows],
+            cols["y"][rows],
+            cols["L"][rows],
+            cf=cols["cf"][rows],
+            tau=cols["tau"][rows],
+        )
+        for key in OUTPUT_COLUMNS:
+            cols[key][rows] = result[key]
+
+    def _filtered_rows(self):
+        y_plus_min, y_plus_max, regimes = self._filter
+        yp = self._columns["y_plus"]
+        mask = np.ones(len(yp), dtype=bool)
+        if y_plus_min is not None:
+            mask &= yp >= y_plus_min
+        if y_plus_max is not None:
+            mask &= yp <= y_plus_max
+        if regimes is not None:
+            mask &= np.isin(self._columns["regime"], list(regimes))
+        return np.flatnonzero(mask)
+
+    def _apply_view(self):
+        self._view = self._sorted(self._filtered_rows())
+
+    def _sorted(self, view):
+        """依目前的排序設定重排列索引"""
+        if self._sort is None:
+            return view
+        key, order = self._sort
+        values = self._columns[key][view]
+        if key == "name":
+            values = values.astype(str)
+            missing = np.zeros(len(values), dtype=bool)
+        else:
+            missing = np.isnan(values)
+        # 穩定排序，相等值維持原順序；NaN 不論升降冪都排在最後
+        present = np.flatnonzero(~missing)
+        present = present[_stable_order(values[present], order == Qt.DescendingOrder)]
+        return view[np.concatenate([present, np.flatnonzero(missing)])]
+
+
+def _stable_order(values, descending=False):
+    """穩定排序的索引；遞減時相等的值仍維持原本的先後順序"""
+    if not descending:
+        return np.argsort(values, kind="stable")
+    reverse = np.argsort(values[::-1], kind="stable")[::-1]
+    return len(values) - 1 - reverse
+
+
+class PatchTableView(QTableView):
+    """支援 Ctrl+V 從試算表貼上 patch 的表格"""
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Paste):
+            self.paste_from_clipboard()
+            return
+        super().keyPressEvent(event)
+
+    def paste_from_clipboard(self):
+        text = QGuiApplication.clipboard().text()
+        try:
+            columns = parse_patch_rows(text)
+        except ValueError as e:
+            QMessageBox.warning(
+                self, "警告", f"貼上的內容無效：{str(e)}\n請檢查數值格式"
+            )
+            return
+        if len(columns["u"]):
+            self.model().append_patches(columns)
+
+
+class PatchTableWindow(QWidget):
+    """多 patch y+ 計算視窗"""
+
+    def __init__(self, rho, mu, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("多 patch y+ 表格")
+        self.resize(1000, 700)
+
+        self.model = PatchTableModel(self)
+        self.model.rho = rho
+        self.model.mu = mu
+
+        layout = QVBoxLayout(self)
+
+        # ========== 操作列 ==========
+        tool_layout = QHBoxLayout()
+        import_button = QPushButton("匯入 CSV")
+        import_button.clicked.connect(self.import_csv)
+        paste_button = QPushButton("貼上")
+        paste_button.clicked.connect(lambda: self.view.paste_from_clipboard())
+        clear_button = QPushButton("清空")
+        clear_button.clicked.connect(self.clear_patches)
+        self.report_format = QComboBox()
+        self.report_format.addItem("TXT", "txt")
+        self.report_format.addItem("Markdown", "md")
+        self.report_format.addItem("HTML", "html")
+        report_button = QPushButton("匯出報告")
+        report_button.clicked.connect(self.export_reports)
+        self.count_label = QLabel()
+
+        tool_layout.addWidget(import_button)
+        tool_layout.addWidget(paste_button)
+        tool_layout.addWidget(clear_button)
+        tool_layout.addWidget(self.report_format)
+        tool_layout.addWidget(report_button)
+        tool_layout.addStretch()
+        tool_layout.addWidget(self.count_label)
+        layout.addLayout(tool_layout)
+
+        # ========== 篩選列 ==========
+        filter_layout = QHBoxLayout()
+        self.y_min_input = QLineEdit()
+        self.y_min_input.setPlaceholderText("y⁺ 下限")
+        self.y_max_input = QLineEdit()
+        self.y_max_input.setPlaceholderText("y⁺ 上限")
+        self.regime_combo = QComboBox()
+        self.regime_combo.addItem("全部評估")
+        self.regime_combo.addItems(DEFAULT_BANDS.labels)
+        filter_button = QPushButton("篩選")
+        filter_button.clicked.connect(self.apply_filter)
+
+        filter_layout.addWidget(QLabel("y⁺ 範圍："))
+        filter_layout.addWidget(self.y_min_input)
+        filter_layout.addWidget(self.y_max_input)
+        filter_layout.addWidget(self.regime_combo)
+        filter_layout.addWidget(filter_button)
+        filter_layout.addStretch()
+        layout.addLayout(filter_layout)
+
+        # ========== 表格 ==========
+        self.view = PatchTableView()
+        self.view.setModel(self.model)
+        self.view.setSortingEnabled(True)
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        # 固定列高，避免大量列時逐列量測尺寸
+        vertical = self.view.verticalHeader()
+        vertical.setSectionResizeMode(QHeaderView.Fixed)
+        vertical.setDefaultSectionSize(22)
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        layout.addWidget(self.view)
+
+        self.model.modelReset.connect(self.update_count)
+        self.model.layoutChanged.connect(self.update_count)
+        self.update_count()
+
+    def set_fluid(self, rho, mu):
+        self.model.set_fluid(rho, mu)
+
+    def import_csv(self):
+        """匯入 CSV 檔案中的 patch"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "匯入 patch CSV", "", "CSV 檔案 (*.csv *.txt)"
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, encoding="utf-8-sig") as f:
+                columns = parse_patch_rows(f.read())
+            self.model.append_patches(columns)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "錯誤", f"匯入失敗：{str(e)}")
+
+    def export_reports(self):
+        """為目前顯示的每個 patch 各匯出一份報告到選定的資料夾"""
+        rows = self.model.visible_rows()
+        if len(rows) == 0:
+            QMessageBox.warning(self, "警告", "沒有可匯出的 patch")
+            return
+        directory = QFileDialog.getExistingDirectory(self, "選擇報告資料夾")
+        if not directory:
+            return
+        column = self.model.column
+        try:
+            records = batch_records(
+                self.model.rho,
+                self.model.mu,
+                column("u")[rows],
+                column("y")[rows],
+                column("L")[rows],
+                cf=column("cf")[rows],
+                tau=column("tau")[rows],
+                names=column("name")[rows],
+            )
+            paths = DEFAULT_REPORTS.write_batch(
+                records, directory, self.report_format.currentData()
+            )
+            QMessageBox.information(
+                self, "成功", f"已匯出 {len(paths)} 份報告到：{directory}"
+            )
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "錯誤", f"匯出失敗：{str(e)}")
+
+    def clear_patches(self):
+        self.model.set_patches(parse_patch_rows(""))
+
+    def apply_filter(self):
+        """套用 y+ 範圍與網格評估篩選"""
+        try:
+            y_min = float(self.y_min_input.text()) if self.y_min_input.text() else None
+            y_max = float(self.y_max_input.text()) if self.y_max_input.text() else None
+        except ValueError:
+            QMessageBox.warning(self, "警告", "y⁺ 範圍必須為數值")
+            return
+        regime_index = self.regime_combo.currentIndex()
+        regimes = None if regime_index == 0 else [regime_index - 1]
+        self.model.set_filter(y_min, y_max, regimes)
+
+    def update_count(self):
+        total = len(self.model.column("u"))
+        self.count_label.setText(f"顯示 {self.model.rowCount()} / {total} 列")
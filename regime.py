@@ -0,0 +1,281 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 網格評估分區
+以可設定的 y+ 分區邊界對整個陣列分類，回傳緊湊的整數代碼，
+並提供各分區計數、面積加權比例與直方圖
+此文件使用 UTF-8 編碼
+"""
+
+import itertools
+import math
+
+import numpy as np
+
+# 無效 y+（NaN）的分區代碼
+INVALID = 255
+
+# 分區塊處理的元素數，使比較用的暫存陣列留在 CPU 快取中
+_CHUNK = 1 << 16
+
+
+class RegimeBands:
+    """
+    y+ 分區定義
+
+    `edges` 為遞增的分區邊界，共 len(edges)+1 個分區。
+    y+ 恰好等於邊界時預設歸入下方分區；`lower_inclusive[i]` 為 True 時
+    改歸入上方分區（例如 1 ≤ y+ ≤ 5 的下邊界）。
+    """
+
+    def __init__(self, name, edges, labels, messages=None, lower_inclusive=None):
+        if len(labels) != len(edges) + 1:
+            raise ValueError("分區名稱數量必須比邊界數量多 1")
+        if any(b <= a for a, b in itertools.pairwise(edges)):
+            raise ValueError("分區邊界必須遞增")
+        if len(edges) >= INVALID:
+            raise ValueError("分區數量過多")
+        self.name = name
+        self.edges = tuple(float(edge) for edge in edges)
+        self.labels = tuple(labels)
+        self.messages = tuple(messages) if messages is not None else self.labels
+        self.lower_inclusive = tuple(
+            lower_inclusive if lower_inclusive is not None else [False] * len(edges)
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    def classify(self, y_plus, out=None):
+        """
+        將 y+ 陣列轉為 uint8 分區代碼；NaN 為 INVALID
+
+        `out` 可指定既有的連續 uint8 陣列（例如共享記憶體）直接寫入。
+        """
+        values = np.asarray(y_plus)
+        codes = np.empty(values.shape, dtype=np.uint8) if out is None else out
+        flat_values = values.reshape(-1)
+        flat_codes = codes.reshape(-1)
+        scratch = np.empty(min(len(flat_values), _CHUNK), dtype=bool)
+        for start in range(0, len(flat_values), _CHUNK):
+            stop = start + _CHUNK
+            self._classify_chunk(
+                flat_values[start:stop], flat_codes[start:stop], scratch
+            )
+        return codes
+
+    def _classify_chunk(self, values, codes, scratch):
+        # 每個邊界一次比較並累加，區塊大小使暫存陣列留在快取中
+        mask = scratch[: len(values)]
+        codes[...] = 0
+        for edge, inclusive in zip(self.edges, self.lower_inclusive):
+            compare = np.greater_equal if inclusive else np.greater
+            compare(values, edge, out=mask)
+            np.add(codes, mask.view(np.uint8), out=codes)
+        np.isnan(values, out=mask)
+        if mask.any():
+            codes[mask] = INVALID
+
+    def classify_one(self, y_plus):
+        """單一 y+ 的分區代碼（純量版 classify）"""
+        if math.isnan(y_plus):
+            return INVALID
+        code = 0
+        for edge, inclusive in zip(self.edges, self.lower_inclusive):
+            code += y_plus >= edge if inclusive else y_plus > edge
+        return code
+
+    def bounds(self, code):
+        """分區的 y+ 範圍 (下限, 上限)；兩端分區以 0 與 inf 表示"""
+        edges = (0.0,) + self.edges + (np.inf,)
+        return edges[code], edges[code + 1]
+
+    def code_of(self, label):
+        """分區名稱對應的代碼"""
+        return self.labels.index(label)
+
+    def label(self, code):
+        """分區代碼對應的名稱；無效代碼回傳 None"""
+        return self.labels[code] if code < len(self.labels) else None
+
+    def message(self, code):
+        """分區代碼對應的網格評估說明"""
+        if code >= len(self.messages):
+            return "⚠ y⁺ 無效，請檢查輸入參數"
+        return self.messages[code]
+
+    def counts(self, codes):
+        """各分區的數量（不含無效值）"""
+        return _chunked_bincount(codes.reshape(-1))[: len(self)].astype(np.int64)
+
+    def fractions(self, codes, weights=None):
+        """
+        各分區所佔比例
+
+        `weights` 為面積等權重時回傳面積加權比例；分母只計有效的 y+。
+        """
+        codes = codes.reshape(-1)
+        if weights is not None:
+            weights = _flat_weights(weights, codes.shape)
+        totals = _chunked_bincount(codes, weights)[: len(self)]
+        total = totals.sum()
+        return totals / total if total else np.zeros(len(self))
+
+    def summarize(self, y_plus, weights=None):
+        """
+        一次走訪完成分類、各分區計數、比例與（若有權重）加權比例
+
+        回傳字典：codes、counts、invalid、fractions，以及 weighted_fractions。
+        """
+        values = np.asarray(y_plus)
+        codes = np.empty(values.shape, dtype=np.uint8)
+        flat_values = values.reshape(-1)
+        flat_codes = codes.reshape(-1)
+        if weights is not None:
+            weights = _flat_weights(weights, values.shape)
+        scratch = np.empty(min(len(flat_values), _CHUNK), dtype=bool)
+        counts = np.zeros(INVALID + 1, dtype=np.int64)
+        weighted = np.zeros(INVALID + 1)
+
+        for start in range(0, len(flat_values), _CHUNK):
+            stop = start + _CHUNK
+            chunk = flat_codes[start:stop]
+            self._classify_chunk(flat_values[start:stop], chunk, scratch)
+            counts += np.bincount(chunk, minlength=INVALID + 1)
+            if weights is not None:
+                weighted += np.bincount(
+                    chunk, weights[start:stop], minlength=INVALID + 1
+                )
+
+        valid = counts[: len(self)]
+        summary = {
+            "codes": codes,
+            "counts": valid,
+            "invalid": int(counts[INVALID]),
+            "fractions": valid / valid.sum() if valid.sum() else np.zeros(len(self)),
+        }
+        if weights is not None:
+            total = weighted[: len(self)].sum()
+            summary["weighted_fractions"] = (
+                weighted[: len(self)] / total if total else np.zeros(len(self))
+            )
+        return summary
+
+
+def _flat_weights(weights, shape):
+    """
+    將權重轉為與代碼等長的一維 float64 陣列
+
+    形狀已相符時直接使用（不複製）；唯讀的 broadcast_to 視圖會讓
+    bincount 每個區塊重新複製權重，因此需廣播時建立實體陣列。
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != shape:
+        weights = np.array(np.broadcast_to(weights, shape))
+    return weights.reshape(-1)
+
+
+def _chunked_bincount(codes, weights=None):
+    """分區塊對 uint8 代碼計數，避免一次轉換整個陣列為 intp"""
+    totals = np.zeros(
+        INVALID + 1, dtype=np.float64 if weights is not None else np.int64
+    )
+    for start in range(0, len(codes), _CHUNK):
+        stop = start + _CHUNK
+        chunk_weights = None if weights is None else weights[start:stop]
+        totals += np.bincount(codes[start:stop], chunk_weights, minlength=INVALID + 1)
+    return totals
+
+
+def histogram(y_plus, bins=60, y_range=(1e-3, 1e4), weights=None):
+    """
+    y+ 的對數間距直方圖
+
+    以 log10(y+) 計算等寬分箱的索引後用 bincount 累加，
+    超出範圍的值計入兩端分箱。回傳 (計數, 分箱邊界)。
+    分區塊計算，暫存陣列只有 _CHUNK 個元素，不隨 y+ 陣列大小成長。
+    """
+    values = np.asarray(y_plus, dtype=np.float64)
+    if weights is not None:
+        weights = _flat_weights(weights, values.shape)
+    values = values.reshape(-1)
+    lo, hi = np.log10(y_range[0]), np.log10(y_range[1])
+    scale = bins / (hi - lo)
+    counts = np.zeros(bins, dtype=np.float64 if weights is not None else np.int64)
+    position = np.empty(min(len(values), _CHUNK))
+    valid = np.empty(len(position), dtype=bool)
+
+    for start in range(0, len(values), _CHUNK):
+        stop = start + _CHUNK
+        chunk = position[: len(values[start:stop])]
+        chunk_valid = valid[: len(chunk)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            np.log10(values[start:stop], out=chunk)
+        np.subtract(chunk, lo, out=chunk)
+        np.multiply(chunk, scale, out=chunk)
+        np.clip(chunk, 0, bins - 1, out=chunk)
+        np.isnan(chunk, out=chunk_valid)
+        np.logical_not(chunk_valid, out=chunk_valid)
+        chunk_weights = None
+        if weights is not None:
+            chunk_weights = weights[start:stop][chunk_valid]
+        counts += np.bincount(
+            chunk[chunk_valid].astype(np.intp), chunk_weights, minlength=bins
+        )
+    return counts, np.logspace(lo, hi, bins + 1)
+
+
+# ========== 預設分區 ==========
+
+# 網格評估：y+ < 1、1 ≤ y+ ≤ 5、5 < y+ ≤ 30、30 < y+ ≤ 300、y+ > 300
+DEFAULT_BANDS = RegimeBands(
+    "default",
+    (1.0, 5.0, 30.0, 300.0),
+    ("精確解析", "標準精確", "緩衝層", "壁面函數", "過於粗糙"),
+    (
+        "✓ 精確解析邊界層（y⁺ < 1）\n   適用於 LES/DNS，需要精細網格",
+        "✓ 標準精確解析範圍（1 ≤ y⁺ ≤ 5）\n   推薦用於精確的 RANS 模擬",
+        "⚠ 介於兩種方法之間（5 < y⁺ ≤ 30）\n   不推薦，建議調整網格",
+        "✓ 壁面函數適用範圍（30 < y⁺ ≤ 300）\n   適用於壁面函數法 RANS",
+        "⚠ 過於粗糙的網格（y⁺ > 300）\n   需要更精細的邊界層網格",
+    ),
+    lower_inclusive=(True, False, False, False),
+)
+
+PRESETS = {
+    "default": DEFAULT_BANDS,
+    # 低雷諾數模型（k-ω SST、Spalart-Allmaras 等）直接解析黏性底層
+    "low_re": RegimeBands(
+        "low_re",
+        (1.0, 5.0),
+        ("解析黏性底層", "可接受", "過於粗糙"),
+        (
+            "✓ 解析黏性底層（y⁺ ≤ 1）\n   適用於低雷諾數湍流模型",
+            "⚠ 可接受（1 < y⁺ ≤ 5）\n   熱傳或分離預測可能降低精度",
+            "⚠ 過於粗糙（y⁺ > 5）\n   低雷諾數模型需要更細的第一層網格",
+        ),
+    ),
+    # 標準壁面函數（k-ε）需要第一層位於對數區
+    "wall_function": RegimeBands(
+        "wall_function",
+        (30.0, 300.0),
+        ("過細", "對數區", "過於粗糙"),
+        (
+            "⚠ 第一層過細（y⁺ < 30）\n   標準壁面函數在緩衝層內失準",
+            "✓ 位於對數區（30 ≤ y⁺ ≤ 300）\n   適用於標準壁面函數",
+            "⚠ 過於粗糙（y⁺ > 300）\n   超出對數區，需要更細的網格",
+        ),
+        lower_inclusive=(True, False),
+    ),
+    # y+ 不敏感壁面處理（Enhanced Wall Treatment、all-y+）
+    "all_y_plus": RegimeBands(
+        "all_y_plus",
+        (1.0, 5.0, 30.0),
+        ("解析黏性底層", "黏性底層", "緩衝層（混合處理）", "對數區"),
+        (
+            "✓ 解析黏性底層（y⁺ ≤ 1）",
+            "✓ 黏性底層（1 < y⁺ ≤ 5）",
+            "⚠ 緩衝層（5 < y⁺ ≤ 30）\n   由混合壁面處理過渡，精度較差",
+            "✓ 對數區（y⁺ > 30）\n   以壁面函數處理",
+        ),
+    ),
+}
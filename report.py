@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 報告產生器
+以預先解析的範本（TXT、Markdown、HTML）由數值結果記錄產生計算報告，
+並以多執行緒批次寫出大量報告檔案
+此文件使用 UTF-8 編碼
+"""
+
+import html
+import os
+import re
+import string
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from yplus_core import (
+    KAPPA,
+    MODE_BLASIUS,
+    MODE_CF,
+    MODE_TAU,
+    MODE_WALL_LAW,
+    WALL_E,
+    compute_patches,
+    y_plus_lam,
+)
+
+# 計算模式名稱（與主視窗的模式按鈕 ID 一致）
+MODE_NAMES = {
+    MODE_BLASIUS: "Blasius 公式",
+    MODE_CF: "直接輸入 Cf",
+    MODE_TAU: "直接輸入 τw/u_τ",
+    MODE_WALL_LAW: "壁面定律反解",
+}
+
+# 壁面定律名稱與公式（模式 D 報告）
+WALL_LAW_TEXT = {
+    "spalding": (
+        "Spalding 定律",
+        "y⁺ = u⁺ + [exp(κu⁺) − 1 − κu⁺ − (κu⁺)²/2 − (κu⁺)³/6] / E",
+    ),
+    "log": (
+        "對數律",
+        f"u⁺ = ln(E·y⁺)/κ（y⁺ < {y_plus_lam():.2f} 時 u⁺ = y⁺）",
+    ),
+}
+
+# 報告格式與副檔名
+FORMATS = {"txt": ".txt", "md": ".md", "html": ".html"}
+
+# 每個寫入工作一次處理的報告數，降低執行緒排程成本
+_WRITE_BATCH = 64
+
+_LINE = "═" * 43
+_RULE = "═" * 50
+
+_RESULT_TAIL = """
+═══════════════════════════════════════════
+【最終結果】
+y⁺ = {y_plus:.6f}
+
+【網格評估】
+{assessment}"""
+
+_TAU_HEAD = f"""
+計算結果（模式 C：直接輸入剪應力或摩擦速度）
+{_LINE}
+【計算步驟】
+
+1. 輸入參數：
+   - 密度 ρ = {{rho:.4f}} kg/m³
+   - 動力學粘度 ν = {{nu:.4e}} m²/s
+   - 第一層高度 y = {{y:.4e}} m
+
+2. 摩擦參數：
+"""
+
+_TAU_STEP = """
+3. y+ 計算：
+   y⁺ = y · u_τ / ν = {y_plus:.6f}
+"""
+
+# 計算步驟（主視窗結果區與各格式報告共用）；鍵為 body_key() 的回傳值
+BODY_TEMPLATES = {
+    "blasius": f"""
+計算結果（模式 A：Blasius 公式）
+{_LINE}
+【計算步驟】
+
+1. 流動參數：
+   - 密度 ρ = {{rho:.4f}} kg/m³
+   - 動力粘度 μ = {{mu:.4e}} Pa·s
+   - 動力學粘度 ν = {{nu:.4e}} m²/s
+   - 流速 U = {{u:.4f}} m/s
+   - 特徵長度 L = {{L:.4f}} m
+
+2. 雷諾數：
+   Re_x = ρ·U·L/μ = {{re_x:.4e}}
+
+3. 摩擦系數（Blasius-Schlichting）：
+   C_f = 0.455 / (log₁₀(Re_x))^2.58
+   C_f = {{cf:.6e}}
+
+4. 摩擦速度：
+   u_τ = √(C_f/2) · U = {{u_tau:.6f}} m/s
+
+5. y+ 計算：
+   y⁺ = y · u_τ / ν = {{y_plus:.6f}}
+"""
+    + _RESULT_TAIL,
+    "cf": f"""
+計算結果（模式 B：直接輸入摩擦系數）
+{_LINE}
+【計算步驟】
+
+1. 輸入參數：
+   - 流速 U = {{u:.4f}} m/s
+   - 摩擦系數 C_f = {{cf:.6e}}
+   - 動力學粘度 ν = {{nu:.4e}} m²/s
+   - 第一層高度 y = {{y:.4e}} m
+
+2. 摩擦速度：
+   u_τ = √(C_f/2) · U = {{u_tau:.6f}} m/s
+
+3. y+ 計算：
+   y⁺ = y · u_τ / ν = {{y_plus:.6f}}
+"""
+    + _RESULT_TAIL,
+    "tau": _TAU_HEAD
+    + "   - 剪應力 τ_w = {tau_w:.6e} Pa\n"
+    + "   - 摩擦速度 u_τ = √(τ_w/ρ) = {u_tau:.6f} m/s\n"
+    + _TAU_STEP
+    + _RESULT_TAIL,
+    "wall_law": f"""
+計算結果（模式 D：壁面定律反解）
+{_LINE}
+【計算步驟】
+
+1. 輸入參數：
+   - 第一層速度 U_p = {{u_p:.4f}} m/s
+   - 第一層中心距離 y = {{y:.4e}} m
+   - 動力學粘度 ν = {{nu:.4e}} m²/s
+
+2. 壁面定律（{{law_name}}，κ = {KAPPA}，E = {WALL_E}）：
+   {{law_formula}}
+   Re_y = U_p·y/ν = {{re_y:.4e}}
+   以 Newton 疊代求解 u⁺ = U_p/u_τ = {{u_plus:.6f}}
+
+3. 摩擦速度：
+   u_τ = U_p / u⁺ = {{u_tau:.6f}} m/s
+
+4. y+ 計算：
+   y⁺ = y · u_τ / ν = {{y_plus:.6f}}
+"""
+    + _RESULT_TAIL,
+    "u_tau": _TAU_HEAD
+    + "   - 摩擦速度 u_τ = {u_tau:.6f} m/s\n"
+    + "   - 對應剪應力 τ_w = u_τ²·ρ = {tau_w:.6e} Pa\n"
+    + _TAU_STEP
+    + _RESULT_TAIL,
+}
+
+# 完整報告；{body} 為上方的計算步驟
+DOCUMENT_TEMPLATES = {
+    "txt": f"""{_RULE}
+{{title}}
+生成時間：{{timestamp}}
+{_RULE}
+
+【輸入參數】
+密度 ρ: {{rho:.6f}} kg/m³
+動力粘度 μ: {{mu:.6e}} Pa·s
+流速 U: {{u:.6f}} m/s
+第一層高度 y: {{y:.6e}} m
+特徵長度 L: {{L:.6f}} m
+計算模式: {{mode_name}}
+
+【計算結果】
+{{body}}
+
+{_RULE}
+報告結束
+{_RULE}
+""",
+    "md": """# {title}
+
+生成時間：{timestamp}
+
+## 輸入參數
+
+| 參數 | 數值 | 單位 |
+| --- | --- | --- |
+| 密度 ρ | {rho:.6f} | kg/m³ |
+| 動力粘度 μ | {mu:.6e} | Pa·s |
+| 流速 U | {u:.6f} | m/s |
+| 第一層高度 y | {y:.6e} | m |
+| 特徵長度 L | {L:.6f} | m |
+| 計算模式 | {mode_name} | |
+
+## 計算結果
+
+| 項目 | 數值 | 單位 |
+| --- | --- | --- |
+| 雷諾數 Re_x | {re_x:.4e} | |
+| 摩擦系數 C_f | {cf:.6e} | |
+| 摩擦速度 u_τ | {u_tau:.6f} | m/s |
+| 剪應力 τ_w | {tau_w:.6e} | Pa |
+| **y⁺** | **{y_plus:.6f}** | |
+| 網格評估 | {regime_label} | |
+
+## 計算步驟
+
+```text
+{body}
+```
+""",
+    "html": """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 4px 10px; text-align: left; }}
+pre {{ background: #f6f8fa; padding: 1em; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>生成時間：{timestamp}</p>
+<h2>輸入參數</h2>
+<table>
+<tr><th>參數</th><th>數值</th><th>單位</th></tr>
+<tr><td>密度 ρ</td><td>{rho:.6f}</td><td>kg/m³</td></tr>
+<tr><td>動力粘度 μ</td><td>{mu:.6e}</td><td>Pa·s</td></tr>
+<tr><td>流速 U</td><td>{u:.6f}</td><td>m/s</td></tr>
+<tr><td>第一層高度 y</td><td>{y:.6e}</td><td>m</td></tr>
+<tr><td>特徵長度 L</td><td>{L:.6f}</td><td>m</td></tr>
+<tr><td>計算模式</td><td>{mode_name}</td><td></td></tr>
+</table>
+<h2>計算結果</h2>
+<table>
+<tr><th>項目</th><th>數值</th><th>單位</th></tr>
+<tr><td>雷諾數 Re_x</td><td>{re_x:.4e}</td><td></td></tr>
+<tr><td>摩擦系數 C_f</td><td>{cf:.6e}</td><td></td></tr>
+<tr><td>摩擦速度 u_τ</td><td>{u_tau:.6f}</td><td>m/s</td></tr>
+<tr><td>剪應力 τ_w</td><td>{tau_w:.6e}</td><td>Pa</td></tr>
+<tr><td><b>y⁺</b></td><td><b>{y_plus:.6f}</b></td><td></td></tr>
+<tr><td>網格評估</td><td>{regime_label}</td><td></td></tr>
+</table>
+<h2>計算步驟</h2>
+<pre>{body}</pre>
+</body>
+</html>
+""",
+}
+
+# 報告預設標題；記錄含 name 時附加於後
+DEFAULT_TITLE = "CFD y+ 計算工具 - 詳細報告"
+
+
+class Template:
+    """
+    預先解析的 str.format 範本
+
+    建立時解析範本並檢查欄位名稱：只允許識別字欄位，不允許屬性、索引、
+    轉換與巢狀格式。render() 以 str.format_map 搭配只含這些欄位的對照表
+    產生文字，使用者提供的範本無法執行程式碼或存取其他物件。
+    `escape` 套用於字串欄位（例如 HTML 跳脫），數值欄位不受影響。
+    """
+
+    def __init__(self, source, escape=None):
+        self.source = source
+        self.escape = escape
+        self.fields = []
+        for _, field, spec, conversion in string.Formatter().parse(source):
+            if field is None:
+                continue
+            if not field.isidentifier() or conversion or "{" in (spec or ""):
+                raise ValueError(f"不支援的範本欄位：{field}")
+            if field not in self.fields:
+                self.fields.append(field)
+
+    def render(self, values):
+        """以欄位字典產生文字"""
+        escape = self.escape
+        fields = {}
+        for key in self.fields:
+            value = values[key]
+            if escape is not None and isinstance(value, str):
+                value = escape(value)
+            fields[key] = value
+        return self.source.format_map(fields)
+
+
+def body_key(record):
+    """記錄對應的計算步驟範本：模式 C 依 source 區分 τw 與 u_τ 輸入"""
+    mode = record["mode"]
+    if mode == MODE_BLASIUS:
+        return "blasius"
+    if mode == MODE_CF:
+        return "cf"
+    if mode == MODE_WALL_LAW:
+        return "wall_law"
+    return "u_tau" if record.get("source") == "u_tau" else "tau"
+
+
+class ReportEngine:
+    """
+    計算報告產生器
+
+    記錄為數值字典：mode、rho、mu、nu、u、y、L、re_x、cf、u_tau、tau_w、
+    y_plus、regime（分區代碼），以及選用的 name 與 source（"tau"/"u_tau"）。
+    範本可部分覆寫；未指定的沿用預設中文範本。
+    """
+
+    def __init__(self, bodies=None, documents=None, bands=DEFAULT_BANDS):
+        self.bands = bands
+        self.bodies = {
+            key: Template(source)
+            for key, source in {**BODY_TEMPLATES, **(bodies or {})}.items()
+        }
+        documents = {**DOCUMENT_TEMPLATES, **(documents or {})}
+        self.documents = {
+            fmt: Template(source, html.escape if fmt == "html" else None)
+            for fmt, source in documents.items()
+        }
+
+    def _values(self, record):
+        regime = int(record["regime"])
+        law_name, law_formula = WALL_LAW_TEXT.get(record.get("law"), ("", ""))
+        return {
+            **record,
+            "law_name": law_name,
+            "law_formula": law_formula,
+            "assessment": self.bands.message(regime),
+            "regime_label": self.bands.label(regime) or "無效",
+            "mode_name": MODE_NAMES[record["mode"]],
+        }
+
+    def body(self, record):
+        """計算步驟文字（主視窗結果區的內容）"""
+        return self.bodies[body_key(record)].render(self._values(record))
+
+    def render(self, record, fmt="txt", timestamp=None):
+        """完整報告文字"""
+        values = self._values(record)
+        name = record.get("name")
+        values["title"] = f"{DEFAULT_TITLE}：{name}" if name else DEFAULT_TITLE
+        values["timestamp"] = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        values["body"] = self.bodies[body_key(record)].render(values)
+        return self.documents[fmt].render(values)
+
+    def write(self, path, record, fmt=None, timestamp=None):
+        """寫出單一報告；未指定格式時依副檔名判斷"""
+        path = Path(path)
+        fmt = fmt or format_of(path)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render(record, fmt, timestamp))
+        return path
+
+    def write_batch(
+        self, records, directory, fmt="txt", workers=None, name_pattern=None
+    ):
+        """
+        批次寫出報告，回傳檔案路徑清單
+
+        同一批次共用生成時間；檔名預設為「序號_名稱」。
+        每份報告組成完整字串後一次寫入，多個執行緒分批並行處理。
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        suffix = FORMATS[fmt]
+        name_pattern = name_pattern or "{index:05d}_{name}"
+        paths = [
+            directory
+            / (
+                name_pattern.format(
+                    index=index, name=_safe_name(record.get("name") or "")
+                ).rstrip("_")
+                + suffix
+            )
+            for index, record in enumerate(records)
+        ]
+
+        def write_range(start):
+            for i in range(start, min(start + _WRITE_BATCH, len(records))):
+                text = self.render(records[i], fmt, timestamp)
+                with open(paths[i], "w", encoding="utf-8") as f:
+                    f.write(text)
+
+        workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(write_range, range(0, len(records), _WRITE_BATCH)))
+        return paths
+
+
+def format_of(path):
+    """依副檔名取得報告格式，無法判斷時為 txt"""
+    suffix = Path(path).suffix.lower()
+    for fmt, ext in FORMATS.items():
+        if suffix == ext or (fmt == "html" and suffix == ".htm"):
+            return fmt
+    return "txt"
+
+
+def _safe_name(name):
+    """將 patch 名稱轉為安全的檔名片段"""
+    return re.sub(r"[^\w.-]+", "_", str(name)).strip("._")
+
+
+def batch_records(rho, mu, u, y, L, cf=None, tau=None, names=None):
+    """
+    一次計算所有 patch 並轉為報告記錄清單
+
+    計算規則與 compute_patches() 相同（τw > 0 → 模式 C，Cf > 0 → 模式 B，
+    其餘為 Blasius）。輸入可為純量或陣列，純量視為單一 patch。
+    """
+    rho, mu, u, y, L = (
+        np.atleast_1d(np.asarray(v, np.float64)) for v in (rho, mu, u, y, L)
+    )
+    cf = None if cf is None else np.atleast_1d(np.asarray(cf, np.float64))
+    tau = None if tau is None else np.atleast_1d(np.asarray(tau, np.float64))
+    result = compute_patches(rho, mu, u, y, L, cf=cf, tau=tau)
+    count = len(result["y_plus"])
+    inputs = np.broadcast_arrays(rho, mu, u, y, L)
+    columns = {
+        key: np.broadcast_to(value, count).tolist()
+        for key, value in zip(("rho", "mu", "u", "y", "L"), inputs)
+    }
+    for key in ("nu", "re_x", "cf", "u_tau", "tau_w", "y_plus", "regime", "mode"):
+        columns[key] = result[key].tolist()
+    columns["name"] = [""] * count if names is None else [str(n) for n in names]
+
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+# 預設中文範本的報告產生器
+DEFAULT_REPORTS = ReportEngine()
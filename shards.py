@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 分片掃描輸出
+長時間的掃描依固定列數切成分片，每個分片完成後以原子方式寫成獨立檔案，
+manifest 記錄已完成的分片；中斷後重新執行會從未完成的分片接續，
+最後可合併為單一可 memmap 的記錄檔
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from batch import (
+    AXIS_HELP,
+    MemoryBudget,
+    Sweep,
+    add_sweep_arguments,
+    fill_records,
+    sweep_from_args,
+)
+from storage import DEFAULT_PRECISION, PRECISIONS, record_dtype
+from validation import ERROR_MESSAGES, error_counts
+
+# manifest 格式版本
+MANIFEST_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+# 預設每個分片的列數（float32 記錄約 51 MB）
+DEFAULT_SHARD_ROWS = 1 << 20
+
+
+def shard_name(shard):
+    return f"shard-{shard:06d}.npy"
+
+
+def _replace_durably(tmp_path, path):
+    """將已寫好的暫存檔同步到磁碟後取代目標檔案"""
+    with open(tmp_path, "rb+") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ShardedSweep:
+    """
+    分片且可接續的掃描輸出
+
+    分片 i 涵蓋列 [i·shard_rows, (i+1)·shard_rows)，範圍只由掃描定義與分片大小
+    決定，重新執行時分片邊界不變。每個分片先寫入暫存檔，完成後才取代為正式
+    檔案，接著更新 manifest（同樣以暫存檔取代）；程序在任何時刻被終止，
+    manifest 中的分片都是完整的，未記錄的分片重新執行時會整片重算並覆寫。
+    分片內仍依記憶體預算分區塊計算。
+    """
+
+    def __init__(
+        self,
+        directory,
+        sweep=None,
+        shard_rows=DEFAULT_SHARD_ROWS,
+        precision=DEFAULT_PRECISION,
+        fast_cf=False,
+    ):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / MANIFEST_NAME
+        if self.manifest_path.exists():
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            if self.manifest.get("version") != MANIFEST_VERSION:
+                raise ValueError(
+                    f"不支援的 manifest 版本：{self.manifest.get('version')}"
+                )
+            # 以 JSON 文字比較（NaN 不等於自身，直接比較清單會誤判）
+            if sweep is not None and (
+                json.dumps(sweep.to_dict()) != json.dumps(self.manifest["sweep"])
+                or shard_rows != self.manifest["shard_rows"]
+                or precision != self.manifest["precision"]
+                or fast_cf != self.manifest["fast_cf"]
+            ):
+                raise ValueError(
+                    "輸出資料夾中已有不同設定的掃描，請改用新的資料夾或相同參數"
+                )
+        elif sweep is None:
+            raise ValueError(f"找不到 manifest：{self.manifest_path}")
+        else:
+            self.manifest = {
+                "version": MANIFEST_VERSION,
+                "sweep": sweep.to_dict(),
+                "rows": len(sweep),
+                "shard_rows": shard_rows,
+                "precision": precision,
+                "fast_cf": fast_cf,
+                "completed": [],
+                "errors": {},
+            }
+        self.sweep = Sweep.from_dict(self.manifest["sweep"])
+        self.shard_rows = self.manifest["shard_rows"]
+        self.precision = self.manifest["precision"]
+        self.fast_cf = self.manifest["fast_cf"]
+        self.dtype = record_dtype(self.precision)
+
+    @property
+    def shard_count(self):
+        return -(-self.manifest["rows"] // self.shard_rows)
+
+    @property
+    def completed(self):
+        return set(self.manifest["completed"])
+
+    def pending(self):
+        """尚未完成的分片編號"""
+        completed = self.completed
+        return [i for i in range(self.shard_count) if i not in completed]
+
+    def shard_range(self, shard):
+        start = shard * self.shard_rows
+        return start, min(start + self.shard_rows, self.manifest["rows"])
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        _replace_durably(tmp_path, self.manifest_path)
+
+    def write_shard(self, shard, budget=None, chunk_rows=None):
+        """計算並寫入一個分片，回傳其錯誤代碼次數分佈"""
+        start, stop = self.shard_range(shard)
+        path = self.directory / shard_name(shard)
+        tmp_path = path.with_name(path.name + ".tmp")
+        errors = np.zeros(256, dtype=np.int64)
+        records = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=self.dtype, shape=(stop - start,)
+        )
+        try:
+            fill_records(
+                records,
+                self.sweep,
+                start,
+                budget=budget,
+                chunk_rows=chunk_rows,
+                fast_cf=self.fast_cf,
+                errors=errors,
+            )
+            records.flush()
+        finally:
+            del records
+        _replace_durably(tmp_path, path)
+        return errors
+
+    def run(self, max_memory=None, chunk_rows=None, progress=None, stop=None):
+        """
+        計算所有未完成的分片
+
+        `progress(完成分片數, 分片總數)` 於每個分片完成後呼叫；`stop()` 回傳
+        True 時在分片邊界停止（之後可再執行 run() 接續）。
+        回傳統計字典：shards、skipped、computed、seconds、errors（累計）。
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if not self.manifest_path.exists():
+            self._save_manifest()
+        budget = MemoryBudget(max_memory) if max_memory else None
+        started = time.perf_counter()
+        pending = self.pending()
+        skipped = self.shard_count - len(pending)
+        computed = 0
+        for shard in pending:
+            if stop is not None and stop():
+                break
+            histogram = self.write_shard(shard, budget, chunk_rows)
+            totals = self.manifest["errors"]
+            for code in np.flatnonzero(histogram[1:]) + 1:
+                key = str(code)
+                totals[key] = totals.get(key, 0) + int(histogram[code])
+            self.manifest["completed"].append(shard)
+            self._save_manifest()
+            computed += 1
+            if progress is not None:
+                progress(skipped + computed, self.shard_count)
+        return {
+            "shards": self.shard_count,
+            "skipped": skipped,
+            "computed": computed,
+            "seconds": time.perf_counter() - started,
+            "errors": self.error_counts(),
+        }
+
+    def error_counts(self):
+        """所有已完成分片的錯誤代碼列數（validation.error_counts 格式）"""
+        histogram = np.zeros(256, dtype=np.int64)
+        for code, count in self.manifest["errors"].items():
+            histogram[int(code)] = count
+        return error_counts(histogram=histogram)
+
+    def merge(self, output):
+        """
+        將所有分片依序合併為單一 .npy 記錄檔
+
+        輸出以 open_memmap 預先配置，每個分片以唯讀 memmap 開啟後直接複製到
+        對應的列範圍，資料只寫入一次；完成後才以暫存檔取代正式檔案。
+        """
+        missing = self.pending()
+        if missing:
+            raise ValueError(f"尚有 {len(missing)} 個分片未完成，無法合併")
+        output = Path(output)
+        tmp_path = output.with_name(output.name + ".tmp")
+        merged = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=self.dtype, shape=(self.manifest["rows"],)
+        )
+        try:
+            for shard in range(self.shard_count):
+                start, stop = self.shard_range(shard)
+                part = np.load(self.directory / shard_name(shard), mmap_mode="r")
+                if part.dtype != self.dtype or len(part) != stop - start:
+                    raise ValueError(f"分片 {shard} 的內容與 manifest 不符")
+                merged[start:stop] = part
+                del part
+            merged.flush()
+        finally:
+            del merged
+        _replace_durably(tmp_path, output)
+        return output
+
+
+def main(argv=None):
+    """命令列入口：run 計算（可重複執行以接續），merge 合併分片"""
+    parser = argparse.ArgumentParser(description="分片且可接續的 y+ 參數掃描")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="計算或接續掃描", epilog=AXIS_HELP)
+    add_sweep_arguments(run)
+    run.add_argument("--dir", required=True, help="分片輸出資料夾")
+    run.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS)
+    run.add_argument(
+        "--precision", choices=sorted(PRECISIONS), default=DEFAULT_PRECISION
+    )
+    run.add_argument("--max-memory", help="記憶體預算，例如 2G、512M")
+    run.add_argument("--chunk-rows", type=int, help="分片內的固定區塊列數")
+    run.add_argument("--fast-cf", action="store_true")
+
+    merge = commands.add_parser("merge", help="合併分片為單一 .npy")
+    merge.add_argument("dir", help="分片輸出資料夾")
+    merge.add_argument("--out", required=True, help="合併後的 .npy 檔案")
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        output = ShardedSweep(args.dir).merge(args.out)
+        print(f"✓ 已合併 → {output}")
+        return
+
+    sharded = ShardedSweep(
+        args.dir,
+        sweep_from_args(args),
+        shard_rows=args.shard_rows,
+        precision=args.precision,
+        fast_cf=args.fast_cf,
+    )
+    stats = sharded.run(
+        args.max_memory,
+        args.chunk_rows,
+        progress=lambda done, total: print(f"   分片 {done}/{total}", flush=True),
+    )
+    print(
+        f"✓ 已完成 {stats['skipped'] + stats['computed']}/{stats['shards']} 個分片"
+        f"（本次計算 {stats['computed']} 個，{stats['seconds']:.2f} 秒）"
+    )
+    for flag, message in ERROR_MESSAGES.items():
+        if stats["errors"][flag]:
+            print(f"⚠ {message}：{stats['errors'][flag]} 列")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(1)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 結果儲存格式
+可選擇儲存精度的緊密結構化記錄：數值欄位為 float32 或 float64，
+網格評估分區與計算模式各以 1 位元組的代碼儲存；計算仍全程使用 float64
+此文件使用 UTF-8 編碼
+"""
+
+import numpy as np
+
+# 可選的儲存精度
+PRECISIONS = {"float32": np.float32, "float64": np.float64}
+
+DEFAULT_PRECISION = "float64"
+
+# 掃描輸入欄位在記錄中的名稱（cf、tau 與輸出欄位同名，加上後綴區分）
+INPUT_FIELDS = {
+    "rho": "rho",
+    "mu": "mu",
+    "u": "u",
+    "y": "y",
+    "L": "L",
+    "cf": "cf_input",
+    "tau": "tau_input",
+}
+
+# 輸出數值欄位
+VALUE_FIELDS = ("re_x", "cf", "u_tau", "tau_w", "y_plus")
+
+# 代碼欄位：分區代碼（regime.INVALID = 255 表示無效）、計算模式與儲存旗標
+CODE_FIELDS = {"regime": np.uint8, "mode": np.int8, "flags": np.uint8}
+
+# 儲存旗標（位元旗標）
+OUT_OF_RANGE = 1  # 有數值超出儲存型別的正規範圍，已寫為 ±inf 或 NaN
+
+
+def storage_dtype(precision=DEFAULT_PRECISION):
+    """數值欄位的儲存型別"""
+    try:
+        return np.dtype(PRECISIONS[precision])
+    except KeyError:
+        raise ValueError(f"未知的儲存精度：{precision}") from None
+
+
+def relative_error_bound(precision=DEFAULT_PRECISION):
+    """
+    儲存造成的相對誤差上限（單位捨入 2^-p）
+
+    y+ 等數值以 float64 計算後只在儲存時捨入一次（就近捨入），
+    因此在型別的正規範圍內，儲存值的相對誤差不超過此值：
+    float32 為 2^-24 ≈ 5.96e-8，float64 為 2^-53 ≈ 1.11e-16。
+    """
+    return float(np.finfo(storage_dtype(precision)).eps) / 2
+
+
+def record_dtype(precision=DEFAULT_PRECISION, inputs=True):
+    """
+    緊密（無對齊填充）的結構化記錄型別
+
+    欄位依序為輸入（`inputs` 為 True 時）、輸出數值與代碼欄位。
+    float32 含輸入時每列 51 位元組，float64 為 99 位元組。
+    """
+    value = storage_dtype(precision)
+    fields = [(name, value) for name in INPUT_FIELDS.values()] if inputs else []
+    fields += [(key, value) for key in VALUE_FIELDS]
+    fields += list(CODE_FIELDS.items())
+    return np.dtype(fields)
+
+
+def store_values(values, out, flags=None):
+    """
+    將 float64 數值捨入一次寫入 `out`（儲存型別由 out 決定）
+
+    超出儲存型別正規範圍的有限值無法保證相對誤差上限，不會默默捨入：
+    過大者寫為 ±inf，過小（非零且低於最小正規數）者寫為 NaN，
+    並在 `flags` 的對應列加上 OUT_OF_RANGE。回傳超出範圍的列遮罩（float64 為 None）。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if out.dtype == np.float64:
+        out[...] = values
+        return None
+    info = np.finfo(out.dtype)
+    magnitude = np.abs(values)
+    with np.errstate(invalid="ignore"):
+        too_large = np.isfinite(magnitude) & (magnitude > info.max)
+        too_small = (magnitude > 0) & (magnitude < info.smallest_normal)
+    with np.errstate(over="ignore"):
+        out[...] = values
+    if too_large.any():
+        out[too_large] = np.copysign(np.inf, values[too_large])
+    if too_small.any():
+        out[too_small] = np.nan
+    outside = too_large | too_small
+    if flags is not None:
+        np.bitwise_or(flags, np.uint8(OUT_OF_RANGE), out=flags, where=outside)
+    return outside
+
+
+def pack_results(outputs, precision=DEFAULT_PRECISION, inputs=None, out=None):
+    """
+    將計算結果打包為結構化記錄陣列
+
+    `outputs` 為 compute_patches/compute_chunk 的欄位字典；指定 `inputs`
+    （掃描的輸入欄位）時一併存入。數值在 float64 計算完成後只捨入一次；
+    分區代碼在捨入前已由 float64 的 y+ 判定，不會因儲存精度而改變。
+    超出儲存型別範圍的數值不中斷打包，依 store_values() 寫入並標記於 `flags`。
+    `out` 可為既有的記錄陣列（例如 memmap 的區段）。
+    """
+    dtype = record_dtype(precision, inputs is not None)
+    rows = len(outputs["y_plus"])
+    if out is None:
+        out = np.empty(rows, dtype)
+    elif out.dtype != dtype or len(out) != rows:
+        raise ValueError("輸出陣列的型別或列數不符")
+
+    flags = np.zeros(rows, dtype=np.uint8)
+    sources = [(key, outputs[key]) for key in VALUE_FIELDS]
+    if inputs is not None:
+        sources += [(field, inputs[key]) for key, field in INPUT_FIELDS.items()]
+    for field, values in sources:
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), rows)
+        store_values(values, out[field], flags)
+    out["regime"] = outputs["regime"]
+    out["mode"] = outputs["mode"]
+    out["flags"] = flags
+    return out
+
+
+def unpack_results(records, dtype=np.float64):
+    """
+    將記錄陣列轉為欄位字典（鍵為記錄的欄位名稱）
+
+    數值欄位轉為 `dtype`（預設 float64，供後續計算）；代碼欄位維持原型別。
+    """
+    return {
+        field: np.asarray(records[field])
+        if field in CODE_FIELDS
+        else records[field].astype(dtype)
+        for field in records.dtype.names
+    }
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 測試共用夾具
+"""
+
+import numpy as np
+import pytest
+
+from batch import Sweep
+
+
+@pytest.fixture
+def make_sweep():
+    """建立掃描定義的工廠；預設 30×20×3 = 1800 列，可以關鍵字覆寫任一軸"""
+
+    def make(**axes):
+        defaults = {
+            "rho": [1.204],
+            "mu": [1.81e-5],
+            "u": np.linspace(1.0, 50.0, 30),
+            "y": np.geomspace(1e-6, 1e-4, 20),
+            "L": [0.5, 1.0, 2.0],
+        }
+        return Sweep(**{**defaults, **axes})
+
+    return make
+
+
+@pytest.fixture
+def sweep(make_sweep):
+    """預設的掃描定義"""
+    return make_sweep()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 批次參數掃描測試
+"""
+
+import csv
+
+import numpy as np
+import pytest
+
+from batch import (
+    MemoryBudget,
+    Sweep,
+    iter_chunks,
+    parse_axis,
+    parse_size,
+    run_sweep,
+)
+from validation import NON_POSITIVE
+from yplus_core import compute_patches
+
+
+class TestBatchSweep:
+    """批次參數掃描測試類"""
+
+    def test_parse_arguments(self):
+        """測試記憶體大小與參數軸解析"""
+        assert parse_size("2G") == 2 << 30
+        assert parse_size("512MiB") == 512 << 20
+        assert parse_size("1.5k") == 1536
+        with pytest.raises(ValueError):
+            parse_size("abc")
+        np.testing.assert_allclose(parse_axis("1e-6:1e-4:3:log"), [1e-6, 1e-5, 1e-4])
+        assert list(parse_axis("1,2.5")) == [1.0, 2.5]
+
+    def test_rows_follow_product_order(self, sweep):
+        """測試列順序為笛卡兒積（最後一軸變化最快）"""
+        assert len(sweep) == 30 * 20 * 3
+        rows = sweep.rows(0, 4)
+        assert list(rows["L"]) == [0.5, 1.0, 2.0, 0.5]
+        assert rows["y"][3] == pytest.approx(sweep.axes["y"][1])
+
+    def test_run_sweep_csv(self, tmp_path, sweep):
+        """測試匯出的 CSV 與直接計算一致"""
+        path = tmp_path / "sweep.csv"
+        stats = run_sweep(sweep, path, chunk_rows=500)
+        assert stats["rows"] == len(sweep) and stats["chunks"] == 4
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))[1:]
+        columns = sweep.rows(0, len(sweep))
+        expected = compute_patches(
+            1.204, 1.81e-5, columns["u"], columns["y"], columns["L"]
+        )["y_plus"]
+        np.testing.assert_allclose(
+            [float(row[11]) for row in rows], expected, rtol=1e-5
+        )
+        assert all(row[5] == "nan" for row in rows)
+
+    def test_input_cf_round_trips(self, tmp_path):
+        """測試 CSV 的輸入 Cf 欄位保留輸入值，不被計算出的 Cf 覆蓋"""
+        cf = [0.003, 0.005]
+        sweep = Sweep(
+            rho=[1.2], mu=[1.8e-5], u=[10.0, 20.0], y=[1e-5], L=[1.0], cf=cf, tau=[0.5]
+        )
+        path = tmp_path / "sweep.csv"
+        run_sweep(sweep, path)
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = list(csv.reader(f))[1:]
+        assert [float(row[5]) for row in rows] == cf * 2
+        # τw 優先於 Cf，計算出的 Cf 由 τw 與 U 換算，與輸入值不同
+        computed = [float(row[8]) for row in rows]
+        np.testing.assert_allclose(
+            computed,
+            [2 * 0.5 / 1.2 / u**2 for u in (10.0, 10.0, 20.0, 20.0)],
+            rtol=1e-5,
+        )
+
+    def test_invalid_rows_counted(self, tmp_path):
+        """測試無效的輸入列不中斷掃描並依錯誤代碼計數"""
+        sweep = Sweep(rho=[1.2], mu=[1.8e-5], u=[-1.0, 10.0], y=[1e-5], L=[0.0, 1.0])
+        stats = run_sweep(sweep, tmp_path / "sweep.csv")
+        assert stats["errors"]["invalid"] == 3
+        assert stats["errors"][NON_POSITIVE] == 3
+
+    def test_budget_limits_chunks(self):
+        """測試記憶體預算決定區塊大小並涵蓋所有列"""
+        sweep = Sweep(
+            rho=[1.2], mu=[1.8e-5], u=np.arange(1.0, 101.0), y=[1e-5], L=np.ones(300)
+        )
+        budget = MemoryBudget("4M")
+
+        def process(columns):
+            # 每列約 2 KiB 的暫存陣列
+            scratch = np.ones((len(columns["u"]), 256))
+            return len(columns["u"]) + 0 * scratch.sum()
+
+        sizes = [rows for _, rows in iter_chunks(sweep, process=process, budget=budget)]
+        assert sum(sizes) == len(sweep)
+        assert len(sizes) > 10
+        assert max(sizes[1:]) <= (4 << 20) * budget.target / 2048
+
+    def test_budget_shrinks_when_exceeded(self):
+        """測試峰值超出預算時即時縮小區塊"""
+        budget = MemoryBudget(1 << 20)
+        assert budget.adjust(100_000, 4 << 20) < 100_000 // 4
+        assert budget.shrinks == 1
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 摩擦系數查表測試
+"""
+
+import numpy as np
+import pytest
+
+from cf_table import CfTable, default_table
+from yplus_core import LAMINAR_RE_LIMIT, blasius_cf, compute_patches
+
+
+class TestCfTable:
+    """摩擦系數查表測試類"""
+
+    def test_error_within_bound(self):
+        """測試整個 Re 範圍的實測相對誤差不超過保證上限"""
+        table = default_table()
+        re_x = 10 ** np.random.default_rng(0).uniform(0.0, 12.0, 200_000)
+        error = np.abs(table(re_x) / blasius_cf(re_x) - 1.0)
+        assert error.max() <= table.error_bound
+        assert table.error_bound < 1e-7
+
+    def test_coarse_table_bound_is_tight(self):
+        """測試較粗的表格誤差上限同樣成立且接近實測值"""
+        table = CfTable(per_octave=64)
+        re_x = 10 ** np.random.default_rng(1).uniform(0.0, 12.0, 200_000)
+        error = np.abs(table(re_x) / blasius_cf(re_x) - 1.0).max()
+        assert error <= table.error_bound
+        assert error > 0.5 * table.error_bound
+
+    def test_fallback_to_exact(self):
+        """測試轉換點附近、表格範圍外與無效的 Re 使用精確公式"""
+        re_x = np.array(
+            [LAMINAR_RE_LIMIT - 1.0, LAMINAR_RE_LIMIT, 0.5, 1e13, 0.0, -1.0]
+        )
+        np.testing.assert_array_equal(default_table()(re_x), blasius_cf(re_x))
+        assert np.isnan(default_table()(np.nan))
+
+    def test_shape_and_scalar(self):
+        """測試保留輸入形狀與純量輸入"""
+        table = default_table()
+        assert table(np.full((3, 2), 1e6)).shape == (3, 2)
+        assert table(1e6) == pytest.approx(blasius_cf(1e6), rel=1e-7)
+
+    def test_compute_patches_fast_cf(self):
+        """測試 compute_patches 的快速模式只影響 Blasius 模式"""
+        u = np.linspace(1.0, 100.0, 50)
+        cf = np.where(np.arange(50) % 2 == 0, np.nan, 0.004)
+        exact = compute_patches(1.204, 1.81e-5, u, 1e-5, 1.0, cf=cf)
+        fast = compute_patches(1.204, 1.81e-5, u, 1e-5, 1.0, cf=cf, fast_cf=True)
+        np.testing.assert_allclose(fast["y_plus"], exact["y_plus"], rtol=1e-7)
+        np.testing.assert_array_equal(fast["cf"][1::2], exact["cf"][1::2])
+
+    def test_invalid_per_octave(self):
+        """測試每八度段數必須為 2 的次方"""
+        with pytest.raises(ValueError):
+            CfTable(per_octave=1000)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 第一層高度最佳化測試
+"""
+
+import numpy as np
+import pytest
+
+from optimizer import (
+    growth_ratio,
+    main,
+    operating_points,
+    optimize_first_cell,
+    stack_thickness,
+    y_plus_matrix,
+)
+from regime import DEFAULT_BANDS
+
+POINTS = [
+    {"name": "巡航", "u": 60.0, "L": 2.0, "fluid": "空氣 (20°C)"},
+    {"name": "最大速度", "u": 90.0, "L": 2.0, "fluid": "空氣 (20°C)"},
+    {"name": "起飛", "u": 30.0, "L": 2.0, "rho": 1.225, "mu": 1.79e-5},
+]
+
+
+class TestOptimizer:
+    """第一層高度最佳化測試類"""
+
+    def test_largest_height_in_band(self):
+        """測試最大高度使所有運轉點落在範圍內，且由最高速點決定"""
+        bounds = DEFAULT_BANDS.bounds(DEFAULT_BANDS.code_of("標準精確"))
+        result = optimize_first_cell(POINTS, bounds)
+        assert result["feasible"]
+        assert result["name"][result["limiting"]] == "最大速度"
+        assert result["y_plus"].max() == pytest.approx(5.0)
+        assert np.all(result["y_plus"] >= 1.0)
+
+    def test_matches_candidate_sweep(self):
+        """測試解析上界與候選高度掃描的結果一致"""
+        result = optimize_first_cell(POINTS, (1.0, 5.0))
+        heights = np.geomspace(1e-7, 1e-3, 20001)
+        y_plus = y_plus_matrix(heights, operating_points(POINTS))
+        ok = np.all((y_plus >= 1.0) & (y_plus <= 5.0), axis=1)
+        assert heights[ok].max() == pytest.approx(result["y"], rel=1e-3)
+
+    def test_infeasible_band(self):
+        """測試範圍過窄時回報不可行"""
+        result = optimize_first_cell(POINTS, (1.0, 1.5))
+        assert not result["feasible"]
+        assert result["y_min"] > result["y_max"]
+
+    def test_growth_ratio(self):
+        """測試成長率使總厚度恰好覆蓋邊界層"""
+        growth = growth_ratio(1e-5, 30, 0.03)
+        assert stack_thickness(1e-5, growth, 30) == pytest.approx(0.03)
+        assert growth_ratio(1e-5, 5, 0.03, max_growth=1.2) is None
+        result = optimize_first_cell(POINTS, (1.0, 5.0), layers=5, max_growth=1.2)
+        assert result["growth"] is None and result["layers_needed"] > 5
+
+    def test_cli_unbounded_band(self, tmp_path, capsys):
+        """測試沒有上限的分區由命令列回報錯誤而非拋出例外"""
+        path = tmp_path / "points.csv"
+        path.write_text("name,u,L,fluid\n巡航,60,2,空氣 (20°C)\n", encoding="utf-8")
+        with pytest.raises(SystemExit) as excinfo:
+            main([str(path), "--band", "過於粗糙"])
+        assert excinfo.value.code == 2
+        assert "y+ 範圍必須有上限" in capsys.readouterr().err
+
+        main([str(path), "--band", "過於粗糙", "--y-plus-max", "1000"])
+        assert "最大第一層高度" in capsys.readouterr().out
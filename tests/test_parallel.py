@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 共享記憶體平行計算測試
+"""
+
+import subprocess
+import sys
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import parallel
+from yplus_core import regime_codes, y_plus_from_tau
+
+
+class TestSharedMemoryParallel:
+    """共享記憶體平行計算測試類"""
+
+    def test_matches_serial(self, monkeypatch):
+        """測試多個工作程序的結果與單程序計算完全相同"""
+        monkeypatch.setattr(parallel, "PARALLEL_THRESHOLD", 0)
+        rng = np.random.default_rng(0)
+        tau = rng.normal(size=(10_000, 3))
+        y = rng.uniform(1e-6, 1e-4, 10_000)
+        u_tau, y_plus, regime = parallel.parallel_y_plus(tau, y, 1.2, 1.8e-5, workers=2)
+        expected_u_tau, expected = y_plus_from_tau(tau, y, 1.2, 1.8e-5)
+        np.testing.assert_array_equal(u_tau, expected_u_tau)
+        np.testing.assert_array_equal(y_plus, expected)
+        np.testing.assert_array_equal(regime, regime_codes(expected))
+
+    def test_segments_released_on_error(self, monkeypatch):
+        """測試計算發生例外時共享記憶體區段仍被刪除"""
+
+        def failing_kernel(*args):
+            raise RuntimeError("kernel failed")
+
+        monkeypatch.setattr(parallel, "y_plus_from_tau", failing_kernel)
+        with pytest.raises(RuntimeError), parallel.SharedColumns() as shared:
+            shared.put("tau", np.ones(100))
+            shared.put("y", np.full(1, 1e-5))
+            try:
+                parallel.evaluate_shared(shared, 1.2, 1.8e-5, workers=1)
+            finally:
+                # 含 evaluate_shared 建立的輸出欄位
+                names = [name for name, _, _ in shared.descriptor().values()]
+        assert len(names) == 6
+        for name in names:
+            with pytest.raises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+
+    def test_attach_does_not_take_ownership(self):
+        """測試其他程序附加後結束時不會刪除區段"""
+        root = Path(parallel.__file__).parent
+        with parallel.SharedColumns() as shared:
+            shared.put("tau", np.arange(10.0))
+            script = (
+                "import parallel\n"
+                f"columns, segments = parallel.attach({shared.descriptor()!r})\n"
+                "assert columns['tau'][9] == 9.0\n"
+                "del columns\n"
+                "for segment in segments:\n"
+                "    segment.close()\n"
+            )
+            done = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=root,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            assert "leaked" not in done.stderr
+            assert shared["tau"][9] == 9.0
+            name = shared.descriptor()["tau"][0]
+            segment = shared_memory.SharedMemory(name=name)
+            segment.close()
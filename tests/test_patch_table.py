@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 多 patch 表格測試
+"""
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def patch_table():
+    pytest.importorskip("PySide6")
+    import patch_table
+
+    return patch_table
+
+
+class TestPatchTableModel:
+    """多 patch 表格模型測試類"""
+
+    @pytest.fixture
+    def model(self, patch_table):
+        model = patch_table.PatchTableModel()
+        text = "名稱\tU\ty\tL\tCf\tτw\nwing\t10\t1e-5\t1\t\t\nflap\t40\t1e-4\t0.5\t0.004\t\n"
+        model.set_patches(patch_table.parse_patch_rows(text))
+        return model
+
+    def test_parse_and_compute(self, model):
+        """測試貼上解析與一次計算"""
+        assert model.rowCount() == 2
+        assert np.all(np.isfinite(model.column("y_plus")))
+
+    def test_sort_and_filter(self, model):
+        """測試在陣列上排序與篩選"""
+        from PySide6.QtCore import Qt
+
+        column = model.keys.index("y_plus")
+        model.sort(column, Qt.DescendingOrder)
+        yp = model.column("y_plus")[model.visible_rows()]
+        assert yp[0] >= yp[1]
+
+        model.set_filter(y_plus_max=float(yp[1]))
+        assert model.rowCount() == 1
+
+    @pytest.mark.parametrize(
+        "descending, expected",
+        [(False, ["a", "d", "c", "b"]), (True, ["c", "a", "d", "b"])],
+    )
+    def test_sort_nan_last_and_stable(self, patch_table, descending, expected):
+        """測試 NaN 在升降冪都排在最後，相等值維持原順序"""
+        from PySide6.QtCore import Qt
+
+        model = patch_table.PatchTableModel()
+        text = "a,10,1e-5,1\nb,10,1e-5,\nc,10,1e-5,2\nd,10,1e-5,1\n"
+        model.set_patches(patch_table.parse_patch_rows(text))
+        order = Qt.DescendingOrder if descending else Qt.AscendingOrder
+        model.sort(model.keys.index("L"), order)
+        names = model.column("name")[model.visible_rows()]
+        assert list(names) == expected
+
+    @pytest.fixture
+    def checked(self, patch_table):
+        """附加 QAbstractItemModelTester 的模型；回傳 (模型, 測試器警告清單)"""
+        from PySide6.QtCore import qInstallMessageHandler
+        from PySide6.QtTest import QAbstractItemModelTester
+
+        warnings = []
+        previous = qInstallMessageHandler(
+            lambda mode, context, message: warnings.append(message)
+        )
+        model = patch_table.PatchTableModel()
+        rows = "".join(f"p{i},{10 + i},1e-5,1\n" for i in range(5))
+        model.set_patches(patch_table.parse_patch_rows(rows))
+        model.set_filter(y_plus_max=100.0)
+        tester = QAbstractItemModelTester(
+            model, QAbstractItemModelTester.FailureReportingMode.Warning
+        )
+        yield model, warnings
+        del tester
+        qInstallMessageHandler(previous)
+
+    def test_sort_keeps_filtered_rows(self, checked):
+        """測試排序只重排目前的列，持久索引跟隨原本的 patch"""
+        from PySide6.QtCore import QPersistentModelIndex, Qt
+
+        model, warnings = checked
+        assert model.rowCount() == 5
+        tracked = QPersistentModelIndex(model.index(1, 0))
+        # 編輯後不再符合篩選條件，但在下次篩選前仍保留
+        model.setData(model.index(0, model.keys.index("u")), "1e6")
+        assert model.rowCount() == 5
+
+        model.sort(model.keys.index("u"), Qt.DescendingOrder)
+        assert model.rowCount() == 5
+        assert tracked.isValid()
+        assert model.data(model.index(tracked.row(), 0)) == "p1"
+        assert list(model.column("name")[model.visible_rows()]) == [
+            "p0",
+            "p4",
+            "p3",
+            "p2",
+            "p1",
+        ]
+        assert warnings == []
+
+    def test_recompute_resets_view(self, checked):
+        """測試流體性質改變後重新篩選，模型以重設通知檢視"""
+        model, warnings = checked
+        model.set_fluid(1.204, 1e-9)
+        assert model.rowCount() == 0
+        model.set_fluid(1.204, 1.81e-5)
+        assert model.rowCount() == 5
+        assert warnings == []
+
+
+class TestPatchTableView:
+    """多 patch 表格檢視測試類"""
+
+    def test_invalid_paste_warns(self, patch_table, monkeypatch):
+        """測試無效的貼上內容顯示警告而不拋出例外"""
+        from PySide6.QtWidgets import QApplication
+
+        app = QApplication.instance() or QApplication([])
+        warnings = []
+        monkeypatch.setattr(
+            patch_table.QMessageBox,
+            "warning",
+            lambda *args: warnings.append(args[2]),
+        )
+        view = patch_table.PatchTableView()
+        view.setModel(patch_table.PatchTableModel())
+        app.clipboard().setText("wing\t10\tabc\t1\n")
+        view.paste_from_clipboard()
+        assert len(warnings) == 1
+        assert view.model().rowCount() == 0
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 網格評估分區測試
+"""
+
+import numpy as np
+import pytest
+
+from regime import DEFAULT_BANDS, INVALID, PRESETS, RegimeBands, histogram
+
+
+class TestRegimeBands:
+    """網格評估分區測試類"""
+
+    def test_default_band_edges(self):
+        """測試預設分區與原本的評估條件一致（含緩衝層）"""
+        values = [0.5, 1.0, 5.0, 5.1, 30.0, 30.5, 300.0, 301.0, np.nan]
+        codes = DEFAULT_BANDS.classify(values)
+        assert codes.dtype == np.uint8
+        assert list(codes) == [0, 1, 1, 2, 2, 3, 3, 4, INVALID]
+        assert [DEFAULT_BANDS.classify_one(v) for v in values] == list(codes)
+
+    def test_buffer_layer_message(self):
+        """測試緩衝層有對應的評估說明"""
+        assert "5 < y⁺ ≤ 30" in DEFAULT_BANDS.message(2)
+
+    def test_counts_and_area_fractions(self):
+        """測試各分區計數與面積加權比例"""
+        y_plus = np.array([0.5, 2.0, 2.0, 50.0, np.nan])
+        area = np.array([1.0, 1.0, 1.0, 5.0, 100.0])
+        summary = DEFAULT_BANDS.summarize(y_plus, weights=area)
+        assert list(summary["counts"]) == [1, 2, 0, 1, 0]
+        assert summary["invalid"] == 1
+        assert summary["weighted_fractions"][3] == pytest.approx(5.0 / 8.0)
+
+    def test_custom_bands(self):
+        """測試自訂分區邊界與預設組"""
+        bands = RegimeBands("custom", (11.0,), ("線性", "對數"))
+        assert list(bands.classify([10.0, 11.0, 12.0])) == [0, 0, 1]
+        assert PRESETS["wall_function"].classify_one(30.0) == 1
+        with pytest.raises(ValueError):
+            RegimeBands("bad", (5.0, 1.0), ("a", "b", "c"))
+
+    def test_histogram(self):
+        """測試對數間距直方圖"""
+        counts, edges = histogram([0.1, 1.0, 10.0, 1e9], bins=4, y_range=(0.1, 1000.0))
+        assert list(counts) == [1, 1, 1, 1]
+        assert edges[0] == pytest.approx(0.1)
+
+    def test_histogram_chunks(self):
+        """測試跨多個區塊的直方圖與權重（含 NaN 與範圍外的值）"""
+        from regime import _CHUNK
+
+        values = np.geomspace(1e-5, 1e6, 3 * _CHUNK + 17)
+        values[::101] = np.nan
+        weights = np.linspace(0.5, 1.5, len(values))
+        counts, edges = histogram(values, bins=10, y_range=(1e-3, 1e4))
+        valid = values[~np.isnan(values)]
+        expected, _ = np.histogram(np.clip(valid, edges[0], edges[-1] * 0.999), edges)
+        np.testing.assert_array_equal(counts, expected)
+
+        weighted, _ = histogram(values, bins=10, y_range=(1e-3, 1e4), weights=weights)
+        assert weighted.sum() == pytest.approx(weights[~np.isnan(values)].sum())
+        scaled, _ = histogram(values, bins=10, y_range=(1e-3, 1e4), weights=2.0)
+        np.testing.assert_allclose(scaled, 2 * counts)
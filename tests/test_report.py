@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 報告產生器測試
+"""
+
+import numpy as np
+import pytest
+
+from report import DEFAULT_REPORTS, ReportEngine, Template, batch_records
+from yplus_core import MODE_TAU
+
+
+def _records():
+    return batch_records(
+        1.204,
+        1.81e-5,
+        [10.0, 10.0, 10.0],
+        1e-6,
+        [1.0, 1.0, 1.0],
+        cf=[np.nan, 0.003, np.nan],
+        tau=[np.nan, np.nan, 0.1],
+        names=["inlet", "wall", "<outlet>"],
+    )
+
+
+class TestReportEngine:
+    """報告產生器測試類"""
+
+    def test_body_keeps_wording(self):
+        """測試預設範本保留主視窗的中文計算步驟"""
+        blasius, cf, tau = _records()
+        assert "計算結果（模式 A：Blasius 公式）" in DEFAULT_REPORTS.body(blasius)
+        assert "摩擦系數 C_f = 3.000000e-03" in DEFAULT_REPORTS.body(cf)
+        text = DEFAULT_REPORTS.body(tau)
+        assert tau["mode"] == MODE_TAU
+        assert "剪應力 τ_w = 1.000000e-01 Pa" in text
+        assert f"y⁺ = {tau['y_plus']:.6f}" in text
+        assert "精確解析邊界層" in text
+
+    def test_document_formats(self):
+        """測試 TXT、Markdown、HTML 完整報告"""
+        record = _records()[2]
+        txt = DEFAULT_REPORTS.render(record, "txt", timestamp="T")
+        assert txt.startswith("═" * 50 + "\nCFD y+ 計算工具 - 詳細報告")
+        assert "計算模式: 直接輸入 τw/u_τ" in txt
+        assert "| 網格評估 | 精確解析 | |" in DEFAULT_REPORTS.render(record, "md")
+        html_text = DEFAULT_REPORTS.render(record, "html")
+        assert "&lt;outlet&gt;" in html_text and "<outlet>" not in html_text
+
+    def test_write_batch(self, tmp_path):
+        """測試批次寫出，每筆記錄一個檔案"""
+        paths = DEFAULT_REPORTS.write_batch(_records(), tmp_path, "md", workers=2)
+        assert [p.name for p in paths] == [
+            "00000_inlet.md",
+            "00001_wall.md",
+            "00002_outlet.md",
+        ]
+        assert "# CFD y+ 計算工具 - 詳細報告：wall" in paths[1].read_text("utf-8")
+
+    def test_custom_template(self):
+        """測試覆寫範本與欄位檢查"""
+        engine = ReportEngine(documents={"txt": "{name}: y+={y_plus:.2f}"})
+        assert engine.render(_records()[0]) == "inlet: y+=0.03"
+        with pytest.raises(ValueError):
+            Template("{values[0]}")
+        # 範本只能引用欄位名稱，不會被當作程式碼執行
+        for source in (
+            "{y_plus.__class__}",
+            "{y_plus!r}",
+            "{name:{spec}}",
+            "{__import__('os').getcwd()}",
+        ):
+            with pytest.raises(ValueError):
+                Template(source)
+
+    def test_scalar_inputs(self):
+        """測試純量輸入產生單一記錄"""
+        records = batch_records(1.204, 1.81e-5, 10.0, 1e-6, 1.0)
+        assert len(records) == 1
+        assert records[0]["u"] == 10.0
+        assert records[0]["y_plus"] == pytest.approx(_records()[0]["y_plus"])
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 分片掃描輸出測試
+"""
+
+import numpy as np
+import pytest
+
+from batch import run_sweep
+from shards import ShardedSweep, shard_name
+
+
+@pytest.fixture
+def sweep(make_sweep):
+    """含 U ≤ 0 無效列的 6000 列掃描"""
+    return make_sweep(u=np.linspace(-1.0, 60.0, 50), y=np.geomspace(1e-6, 1e-3, 40))
+
+
+class TestShards:
+    """分片掃描輸出測試類"""
+
+    def test_resume_after_interrupt(self, tmp_path, sweep):
+        """測試中斷後從未完成的分片接續，合併結果與一次完成相同"""
+        sharded = ShardedSweep(tmp_path / "out", sweep, shard_rows=1000)
+        done = []
+        stats = sharded.run(
+            chunk_rows=300,
+            progress=lambda count, total: done.append(count),
+            stop=lambda: len(done) >= 2,
+        )
+        assert stats["computed"] == 2 and stats["shards"] == 6
+        # 模擬在第三個分片寫入途中被終止：只留下暫存檔
+        (tmp_path / "out" / (shard_name(2) + ".tmp")).write_bytes(b"partial")
+
+        resumed = ShardedSweep(tmp_path / "out", sweep, shard_rows=1000)
+        assert resumed.pending() == [2, 3, 4, 5]
+        stats = resumed.run(chunk_rows=300)
+        assert stats["skipped"] == 2 and stats["computed"] == 4
+        assert stats["errors"]["invalid"] == 120
+
+        resumed.merge(tmp_path / "merged.npy")
+        run_sweep(sweep, tmp_path / "direct.npy")
+        merged = np.load(tmp_path / "merged.npy", mmap_mode="r")
+        direct = np.load(tmp_path / "direct.npy")
+        assert merged.tobytes() == direct.tobytes()
+        assert not list((tmp_path / "out").glob("*.tmp"))
+
+    def test_settings_must_match(self, tmp_path, sweep):
+        """測試既有資料夾的掃描設定不同時拒絕接續"""
+        ShardedSweep(tmp_path, sweep, shard_rows=1000).run(stop=lambda: True)
+        with pytest.raises(ValueError):
+            ShardedSweep(tmp_path, sweep, shard_rows=500)
+        with pytest.raises(ValueError):
+            ShardedSweep(tmp_path, sweep, shard_rows=1000, precision="float32")
+
+    def test_merge_requires_all_shards(self, tmp_path, sweep):
+        """測試分片未全部完成時不可合併"""
+        sharded = ShardedSweep(tmp_path, sweep, shard_rows=1000)
+        sharded.run(stop=lambda: sharded.completed)
+        with pytest.raises(ValueError):
+            sharded.merge(tmp_path / "merged.npy")
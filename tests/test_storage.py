@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 結果儲存格式測試
+"""
+
+import numpy as np
+import pytest
+
+from batch import compute_chunk, run_sweep
+from parallel import SharedColumns, evaluate_shared, parallel_y_plus
+from storage import (
+    OUT_OF_RANGE,
+    pack_results,
+    record_dtype,
+    relative_error_bound,
+    unpack_results,
+)
+
+
+@pytest.fixture
+def sweep(make_sweep):
+    """涵蓋極小與極大 y+ 的掃描，用於檢查 float32 誤差"""
+    return make_sweep(
+        u=np.geomspace(0.1, 300.0, 60),
+        y=np.geomspace(1e-8, 1e-2, 50),
+        L=[0.01, 1.0, 50.0],
+    )
+
+
+class TestStorage:
+    """結果儲存格式測試類"""
+
+    def test_record_layout(self):
+        """測試緊密記錄的每列大小"""
+        assert record_dtype("float32").itemsize == 51
+        assert record_dtype("float64").itemsize == 99
+        assert record_dtype("float32", inputs=False).itemsize == 23
+        with pytest.raises(ValueError):
+            record_dtype("float16")
+
+    def test_float32_error_bound(self, sweep):
+        """測試 float32 儲存的 y+ 相對誤差不超過 2^-24，分區代碼不變"""
+        inputs = sweep.rows(0, len(sweep))
+        outputs = compute_chunk(inputs)
+        columns = unpack_results(pack_results(outputs, "float32", inputs))
+        error = np.abs(columns["y_plus"] / outputs["y_plus"] - 1.0)
+        assert relative_error_bound("float32") == 2.0**-24
+        assert error.max() <= relative_error_bound("float32")
+        np.testing.assert_array_equal(columns["regime"], outputs["regime"])
+        assert np.isnan(columns["cf_input"]).all()
+
+    def test_out_of_range_flagged(self, sweep):
+        """測試超出 float32 正規範圍的數值不會被默默捨入，也不中斷打包"""
+        outputs = compute_chunk(sweep.rows(0, 4))
+        outputs["tau_w"] = np.array([1.0, -1e39, 2.0, 3.0])
+        outputs["u_tau"] = np.array([1.0, 1.0, 1e-40, 0.0])
+        records = pack_results(outputs, "float32")
+        assert records["tau_w"][1] == -np.inf
+        assert np.isnan(records["u_tau"][2])
+        assert records["u_tau"][3] == 0.0
+        assert records["flags"].tolist() == [0, OUT_OF_RANGE, OUT_OF_RANGE, 0]
+        exact = pack_results(outputs, "float64")
+        assert exact["tau_w"][1] == -1e39
+        assert not exact["flags"].any()
+
+    def test_sweep_npy_output(self, tmp_path, sweep):
+        """測試掃描匯出為 float32 記錄檔並可用 memmap 開啟"""
+        path = tmp_path / "sweep.npy"
+        run_sweep(sweep, path, chunk_rows=1000, precision="float32")
+        records = np.load(path, mmap_mode="r")
+        assert records.dtype == record_dtype("float32") and len(records) == len(sweep)
+        expected = compute_chunk(sweep.rows(0, len(sweep)))["y_plus"]
+        np.testing.assert_allclose(records["y_plus"], expected, rtol=2.0**-24)
+
+    def test_parallel_float32(self):
+        """測試共享記憶體計算可輸出 float32"""
+        tau = np.linspace(0.1, 5.0, 1000)
+        u_tau, y_plus, regime = parallel_y_plus(
+            tau, 1e-5, 1.2, 1.8e-5, workers=1, precision="float32"
+        )
+        _, exact, codes = parallel_y_plus(tau, 1e-5, 1.2, 1.8e-5, workers=1)
+        assert y_plus.dtype == np.float32 and u_tau.dtype == np.float32
+        np.testing.assert_allclose(y_plus, exact, rtol=2.0**-24)
+        np.testing.assert_array_equal(regime, codes)
+
+    def test_parallel_out_of_range_flagged(self):
+        """測試共享記憶體計算對超出 float32 範圍的面寫入 NaN 並標記"""
+        with SharedColumns() as shared:
+            shared.put("tau", np.array([0.3, 1e-90, 0.0]))
+            shared.put("y", np.array([1e-5]))
+            evaluate_shared(shared, 1.2, 1.8e-5, workers=1, precision="float32")
+            assert np.isnan(shared["y_plus"][1]) and shared["y_plus"][2] == 0.0
+            assert shared["flags"].tolist() == [0, OUT_OF_RANGE, 0]
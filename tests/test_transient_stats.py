@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 暫態 y+ 統計測試
+"""
+
+import numpy as np
+import pytest
+
+from transient_stats import YPlusAccumulator
+from yplus_core import y_plus_from_tau
+
+
+def _steps(count=200, faces=50, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.5, 40.0, (count, faces)), rng.uniform(0.5, 2.0, count)
+
+
+class TestTransientStats:
+    """暫態 y+ 統計測試類"""
+
+    def test_matches_direct_statistics(self):
+        """測試串流統計與保留所有時間步的直接計算一致"""
+        steps, dt = _steps()
+        accumulator = YPlusAccumulator(50)
+        for y_plus, weight in zip(steps, dt):
+            accumulator.update(y_plus, weight)
+        mean = np.average(steps, axis=0, weights=dt)
+        np.testing.assert_allclose(accumulator.mean, mean, rtol=1e-12)
+        np.testing.assert_allclose(
+            accumulator.rms(), np.sqrt(np.average(steps**2, axis=0, weights=dt))
+        )
+        np.testing.assert_allclose(
+            accumulator.std(),
+            np.sqrt(np.average((steps - mean) ** 2, axis=0, weights=dt)),
+        )
+        np.testing.assert_array_equal(accumulator.min, steps.min(axis=0))
+        np.testing.assert_array_equal(accumulator.max, steps.max(axis=0))
+
+    def test_merge_equals_sequential(self):
+        """測試分段累積後合併與依序累積相同"""
+        steps, dt = _steps()
+        whole, first, second = (YPlusAccumulator(50) for _ in range(3))
+        for i, (y_plus, weight) in enumerate(zip(steps, dt)):
+            whole.update(y_plus, weight)
+            (first if i % 3 else second).update(y_plus, weight)
+        first.merge(second)
+        assert first.steps == whole.steps
+        np.testing.assert_allclose(first.mean, whole.mean, rtol=1e-12)
+        np.testing.assert_allclose(first.m2, whole.m2, rtol=1e-10)
+        np.testing.assert_array_equal(first.max, whole.max)
+
+    def test_checkpoint_resume(self, tmp_path):
+        """測試存檔後續算與不中斷的結果相同"""
+        steps, _ = _steps()
+        whole = YPlusAccumulator(50)
+        for y_plus in steps:
+            whole.update(y_plus)
+        partial = YPlusAccumulator(50)
+        for y_plus in steps[:120]:
+            partial.update(y_plus)
+        partial.save(tmp_path / "stats.npz", {"step": 120})
+        resumed, meta = YPlusAccumulator.load(tmp_path / "stats.npz")
+        for y_plus in steps[120:]:
+            resumed.update(y_plus)
+        assert meta == {"step": 120}
+        np.testing.assert_array_equal(resumed.mean, whole.mean)
+        np.testing.assert_array_equal(resumed.m2, whole.m2)
+        assert not (tmp_path / "stats.npz.tmp").exists()
+
+    def test_update_tau(self):
+        """測試由壁面剪應力向量累積 y+"""
+        tau = np.array([[0.5, 0.0, 0.0], [0.0, 2.0, 0.0]])
+        accumulator = YPlusAccumulator(2).update_tau(tau, 1e-5, 1.2, 1.8e-5)
+        _, expected = y_plus_from_tau(tau, 1e-5, 1.2, 1.8e-5)
+        np.testing.assert_array_equal(accumulator.mean, expected)
+        with pytest.raises(ValueError):
+            accumulator.update(np.ones(3))
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 向量化輸入驗證測試
+"""
+
+import numpy as np
+
+from regime import INVALID
+from validation import (
+    MISSING_CF,
+    MISSING_TAU,
+    MODE_INVALID,
+    NON_FINITE,
+    NON_POSITIVE,
+    RE_OUT_OF_RANGE,
+    UNKNOWN_MODE,
+    compute_checked,
+    describe,
+    error_counts,
+    validate_patches,
+)
+from yplus_core import MODE_BLASIUS, MODE_CF, MODE_TAU, MODE_WALL_LAW, compute_patches
+
+
+class TestValidation:
+    """向量化輸入驗證測試類"""
+
+    def test_error_codes(self):
+        """測試各種無效輸入的錯誤代碼"""
+        u = np.array([10.0, -1.0, np.nan, np.inf, 10.0, 10.0, 10.0, 1e12])
+        cf = np.array([np.nan, np.nan, np.nan, np.nan, np.nan, 0.004, np.nan, np.nan])
+        mode = [MODE_BLASIUS] * 4 + [MODE_CF, MODE_CF, MODE_TAU, MODE_BLASIUS]
+        codes = validate_patches(1.2, 1.8e-5, u, 1e-5, 1.0, cf=cf, mode=mode)
+        assert codes.tolist() == [
+            0,
+            NON_POSITIVE,
+            NON_FINITE,
+            NON_FINITE,
+            MISSING_CF,
+            0,
+            MISSING_TAU,
+            RE_OUT_OF_RANGE,
+        ]
+        assert describe(NON_POSITIVE | NON_FINITE) == [
+            "參數必須為正數",
+            "參數必須為有限數值",
+        ]
+
+    def test_u_tau_satisfies_tau_mode(self):
+        """測試模式 C 可由 u_τ 提供並換算為 τw"""
+        codes = validate_patches(1.2, 1.8e-5, 10.0, 1e-5, 1.0, u_tau=0.3, mode=MODE_TAU)
+        assert codes == 0
+        result = compute_checked(1.2, 1.8e-5, 10.0, 1e-5, 1.0, u_tau=0.3, mode=MODE_TAU)
+        assert np.isclose(result["u_tau"], 0.3)
+
+    def test_unknown_mode(self):
+        """測試不支援的模式標記為錯誤，不會改以 Blasius 計算"""
+        mode = np.array([MODE_BLASIUS, MODE_WALL_LAW, 7])
+        codes = validate_patches(1.2, 1.8e-5, 10.0, 1e-5, 1.0, cf=0.004, mode=mode)
+        assert codes.tolist() == [0, UNKNOWN_MODE, UNKNOWN_MODE]
+        result = compute_checked(1.2, 1.8e-5, 10.0, 1e-5, 1.0, cf=0.004, mode=mode)
+        assert np.isfinite(result["y_plus"][0])
+        assert np.isnan(result["y_plus"][1:]).all()
+        assert (result["mode"][1:] == MODE_INVALID).all()
+        assert error_counts(codes)[UNKNOWN_MODE] == 2
+
+    def test_invalid_rows_skipped(self):
+        """測試無效列不中斷計算，有效列與直接計算相同"""
+        u = np.linspace(-5.0, 50.0, 1000)
+        u[::97] = np.nan
+        result = compute_checked(1.2, 1.8e-5, u, 1e-5, 1.0)
+        valid = result["error"] == 0
+        expected = compute_patches(1.2, 1.8e-5, u[valid], 1e-5, 1.0)
+        np.testing.assert_array_equal(result["y_plus"][valid], expected["y_plus"])
+        assert np.isnan(result["y_plus"][~valid]).all()
+        assert (result["regime"][~valid] == INVALID).all()
+        assert (result["mode"][~valid] == MODE_INVALID).all()
+
+    def test_counts(self):
+        """測試各錯誤代碼的列數統計"""
+        codes = np.array([0, NON_POSITIVE, NON_POSITIVE | NON_FINITE, MISSING_CF])
+        counts = error_counts(codes)
+        assert counts[NON_POSITIVE] == 2
+        assert counts[NON_FINITE] == 1
+        assert counts[MISSING_CF] == 1
+        assert counts["invalid"] == 3
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - VTK/VTP 串流讀取測試
+"""
+
+import base64
+import zlib
+
+import numpy as np
+import pytest
+
+from vtk_reader import SurfaceFile, surface_y_plus
+from yplus_core import y_plus_from_tau
+
+TAU = np.array([[0.3, 0.0, 0.0], [0.0, -0.4, 0.0], [0.1, 0.2, 0.2]])
+DIST = np.array([1e-5, 2e-5, 4e-5])
+
+LEGACY_ASCII = """# vtk DataFile Version 3.0
+wall
+ASCII
+DATASET POLYDATA
+POINTS 5 float
+0 0 0 1 0 0 1 1 0
+0 1 0 2 0 0
+POLYGONS 3 12
+3 0 1 2
+3 0 2 3
+3 1 4 2
+CELL_DATA 3
+VECTORS wallShearStress float
+0.3 0 0 0 -0.4 0
+0.1 0.2 0.2
+SCALARS wallDistance double 1
+LOOKUP_TABLE default
+1e-5 2e-5 4e-5
+POINT_DATA 5
+SCALARS p float 1
+LOOKUP_TABLE default
+0 1 2 3 4
+"""
+
+
+def _legacy_binary():
+    """建立與 LEGACY_ASCII 相同內容的舊版 BINARY 檔案（big-endian）"""
+    head = b"# vtk DataFile Version 3.0\nwall\nBINARY\nDATASET POLYDATA\n"
+    points = np.zeros((5, 3), ">f4")
+    polygons = np.array([3, 0, 1, 2, 3, 0, 2, 3, 3, 1, 4, 2], ">i4")
+    return (
+        head
+        + b"POINTS 5 float\n"
+        + points.tobytes()
+        + b"\nPOLYGONS 3 12\n"
+        + polygons.tobytes()
+        + b"\nCELL_DATA 3\nVECTORS wallShearStress float\n"
+        + TAU.astype(">f4").tobytes()
+        + b"\nSCALARS wallDistance double 1\nLOOKUP_TABLE default\n"
+        + DIST.astype(">f8").tobytes()
+        + b"\n"
+    )
+
+
+def _payload(array, compressed):
+    """[標頭][資料]；壓縮時以 32 位元組的小區塊切分，區塊邊界不對齊 tuple"""
+    data = array.tobytes()
+    if not compressed:
+        return np.array([len(data)], "<u4").tobytes() + data
+    chunks = [zlib.compress(data[i : i + 32]) for i in range(0, len(data), 32)]
+    last = len(data) - (len(chunks) - 1) * 32
+    sizes = [len(chunk) for chunk in chunks]
+    head = np.array([len(chunks), 32, last] + sizes, "<u4").tobytes()
+    return head + b"".join(chunks)
+
+
+def _vtp(layout, compressed=False):
+    """
+    建立最小 VTP 檔案內容
+
+    `layout` 為 raw、base64（appended 資料）或 inline（DataArray 內的 base64）。
+    """
+    arrays = [
+        ("Float32", "wallShearStress", 3, TAU.astype("<f4")),
+        ("Float64", "wallDistance", 1, DIST.astype("<f8")),
+    ]
+    tags = []
+    blocks = []
+    position = 0
+    for type_name, name, components, array in arrays:
+        raw = _payload(array, compressed)
+        if layout != "raw":
+            raw = base64.b64encode(raw)
+        attrs = f'type="{type_name}" Name="{name}" NumberOfComponents="{components}"'
+        if layout == "inline":
+            tags.append(
+                f'<DataArray {attrs} format="binary">\n{raw.decode()}\n</DataArray>'
+            )
+        else:
+            tags.append(f'<DataArray {attrs} format="appended" offset="{position}"/>')
+            blocks.append(raw)
+            position += len(raw)
+    compressor = ' compressor="vtkZLibDataCompressor"' if compressed else ""
+    data_arrays = "\n        ".join(tags)
+    header = f"""<?xml version="1.0"?>
+<VTKFile type="PolyData" version="1.0" byte_order="LittleEndian" header_type="UInt32"{compressor}>
+  <PolyData>
+    <Piece NumberOfPoints="5" NumberOfPolys="3">
+      <CellData>
+        {data_arrays}
+      </CellData>
+    </Piece>
+  </PolyData>
+"""
+    if layout == "inline":
+        return header.encode() + b"</VTKFile>\n"
+    return (
+        header.encode()
+        + f'  <AppendedData encoding="{layout}">\n   _'.encode()
+        + b"".join(blocks)
+        + b"\n  </AppendedData>\n</VTKFile>\n"
+    )
+
+
+class TestVTKReader:
+    """VTK/VTP 讀取測試類"""
+
+    @pytest.fixture(
+        params=[
+            "legacy",
+            "legacy-binary",
+            "raw",
+            "base64",
+            "inline",
+            "raw-zlib",
+            "base64-zlib",
+            "inline-zlib",
+        ]
+    )
+    def surface_path(self, request, tmp_path):
+        if request.param == "legacy":
+            path = tmp_path / "wall.vtk"
+            path.write_text(LEGACY_ASCII, encoding="utf-8")
+        elif request.param == "legacy-binary":
+            path = tmp_path / "wall.vtk"
+            path.write_bytes(_legacy_binary())
+        else:
+            layout, _, compressor = request.param.partition("-")
+            path = tmp_path / "wall.vtp"
+            path.write_bytes(_vtp(layout, compressed=bool(compressor)))
+        return path
+
+    @pytest.mark.parametrize("block_size, lengths", [(1, [1, 1, 1]), (2, [2, 1])])
+    def test_read_blocks(self, surface_path, block_size, lengths):
+        """測試逐區塊讀取並對齊兩個陣列"""
+        surface = SurfaceFile(surface_path)
+        blocks = list(
+            surface.iter_aligned(
+                ["wallShearStress", "wallDistance"], block_size=block_size
+            )
+        )
+        # 各陣列的 tuple 位元組數不同，區塊仍恰為 block_size 個 tuple
+        assert [len(tau) for tau, _ in blocks] == lengths
+        assert [len(d) for _, d in blocks] == lengths
+        tau = np.concatenate([tau for tau, _ in blocks])
+        dist = np.concatenate([d for _, d in blocks])
+        assert np.allclose(tau, TAU)
+        assert np.allclose(dist, DIST)
+
+    def test_write_back_y_plus(self, surface_path, tmp_path):
+        """測試寫回 y+ 陣列後可再次讀取"""
+        output = tmp_path / ("out" + surface_path.suffix)
+        summary = surface_y_plus(surface_path, 1.2, 1.8e-5, output_path=output)
+        expected = y_plus_from_tau(TAU, DIST, 1.2, 1.8e-5)[1]
+        assert summary["count"] == 3
+        assert summary["max"] == pytest.approx(expected.max())
+
+        written = np.concatenate(list(SurfaceFile(output).iter_blocks("yPlus")))
+        assert np.allclose(written, expected, rtol=1e-6)
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 監看資料夾模式測試
+"""
+
+import numpy as np
+import pytest
+
+from watch_folder import ShearFieldWatcher, read_openfoam_field
+
+FOAM_FIELD = """FoamFile
+{
+    format      ascii;
+    class       volVectorField;
+    object      wallShearStress;
+}
+dimensions      [0 2 -2 0 0 0 0];
+internalField   uniform (0 0 0);
+boundaryField
+{
+    inlet
+    {
+        type            calculated;
+        value           uniform (0 0 0);
+    }
+    wall
+    {
+        type            calculated;
+        value           nonuniform List<vector>
+3
+(
+(-0.3 0 0)
+(0 0.4 0)
+(0 0 -0.5)
+)
+;
+    }
+}
+"""
+
+
+class TestWatchFolder:
+    """監看資料夾測試類"""
+
+    def test_read_openfoam_field(self):
+        """測試解析 OpenFOAM 非均勻邊界值"""
+        tau = read_openfoam_field(FOAM_FIELD)
+        assert tau.shape == (3, 3)
+        assert tau[2, 2] == pytest.approx(-0.5)
+
+    def test_incremental_poll(self, tmp_path):
+        """測試只處理新檔案，已處理的檔案不重算"""
+        for step in ("0.1", "0.2"):
+            (tmp_path / step).mkdir()
+            with open(tmp_path / step / "wallShearStress", "w", encoding="utf-8") as f:
+                f.write(FOAM_FIELD)
+
+        watcher = ShearFieldWatcher(tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0)
+        rows = watcher.poll()
+        assert [row[0] for row in rows] == [0.1, 0.2]
+        assert rows[0][2] == 3
+        assert watcher.poll() == []
+
+        # 重新啟動後讀取 manifest，只處理新的時間步
+        (tmp_path / "0.3").mkdir()
+        np.savetxt(tmp_path / "0.3" / "wallShearStress", [0.3, 0.4])
+        restarted = ShearFieldWatcher(tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0)
+        rows = restarted.poll()
+        assert [row[0] for row in rows] == [0.3]
+
+        with open(tmp_path / "yplus_summary.csv", encoding="utf-8-sig") as f:
+            assert len(f.read().strip().splitlines()) == 4
+
+    def test_non_numeric_folders_last(self, tmp_path):
+        """測試時間步依數值排序，無法解析時間的資料夾依名稱排在最後"""
+        for step in ("constant", "1", "0.1", "latest", "0.02"):
+            (tmp_path / step).mkdir()
+            with open(tmp_path / step / "wallShearStress", "w", encoding="utf-8") as f:
+                f.write(FOAM_FIELD)
+
+        watcher = ShearFieldWatcher(tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0)
+        rows = watcher.poll()
+        assert [row[1].split("/")[0] for row in rows] == [
+            "0.02",
+            "0.1",
+            "1",
+            "constant",
+            "latest",
+        ]
+
+    def test_stats_resume(self, tmp_path):
+        """測試逐面時間統計在重新啟動後接續，不重複計入時間步"""
+        for step, value in (("0.1", 0.3), ("0.2", 0.5)):
+            (tmp_path / step).mkdir()
+            np.savetxt(tmp_path / step / "wallShearStress", [value, 2 * value])
+        stats_path = tmp_path / "stats.npz"
+        watcher = ShearFieldWatcher(
+            tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0, stats_path=stats_path
+        )
+        watcher.poll()
+
+        (tmp_path / "0.3").mkdir()
+        np.savetxt(tmp_path / "0.3" / "wallShearStress", [0.7, 1.4])
+        # manifest 遺失時檔案會重新處理，但已計入統計的時間步不會重複
+        (tmp_path / ".yplus_manifest.json").unlink()
+        restarted = ShearFieldWatcher(
+            tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0, stats_path=stats_path
+        )
+        assert len(restarted.poll()) == 3
+        assert restarted.stats.steps == 3
+        expected = np.mean(
+            [
+                watcher.evaluate(tmp_path / s / "wallShearStress")
+                for s in ("0.1", "0.2", "0.3")
+            ],
+            axis=0,
+        )
+        np.testing.assert_allclose(restarted.stats.mean, expected)
+
+    def test_bad_files_recorded(self, tmp_path):
+        """測試無法解析或沒有面資料的檔案不中斷監看，並記錄於 manifest"""
+        for step in ("0.1", "0.2", "0.3"):
+            (tmp_path / step).mkdir()
+        (tmp_path / "0.1" / "wallShearStress").write_text("abc def\n", encoding="utf-8")
+        (tmp_path / "0.2" / "wallShearStress").write_text("# 空白\n", encoding="utf-8")
+        np.savetxt(tmp_path / "0.3" / "wallShearStress", [0.3, 0.4])
+
+        watcher = ShearFieldWatcher(tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0)
+        rows = watcher.poll()
+        assert [row[0] for row in rows] == [0.3]
+        assert set(watcher.failed) == {"0.1/wallShearStress", "0.2/wallShearStress"}
+
+        # 重新啟動後不會重試未變動的失敗檔案，檔案修正後才重新處理
+        restarted = ShearFieldWatcher(tmp_path, 1.2, 1.8e-5, 1e-5, settle_time=0)
+        assert restarted.poll() == []
+        np.savetxt(tmp_path / "0.1" / "wallShearStress", [0.5, 0.6, 0.7])
+        rows = restarted.poll()
+        assert [row[0] for row in rows] == [0.1]
+        assert set(restarted.failed) == {"0.2/wallShearStress"}
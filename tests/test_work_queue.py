@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 分散式掃描工作佇列測試
+"""
+
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from batch import compute_chunk
+from validation import NON_POSITIVE
+from work_queue import (
+    PROTOCOL_VERSION,
+    Coordinator,
+    pack_result,
+    recv_message,
+    row_bytes,
+    run_distributed,
+    run_worker,
+    send_message,
+    unpack_result,
+)
+
+
+def _start_workers(coordinator, count):
+    threads = [
+        threading.Thread(target=run_worker, args=coordinator.address, daemon=True)
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _collect(coordinator):
+    parts = []
+    stats = coordinator.run(lambda start, columns: parts.append((start, columns)), 30)
+    return stats, parts
+
+
+def _lost_worker(coordinator, hold):
+    """取得一個區塊後不回傳：hold 為 True 時保持連線，否則直接斷線"""
+    coordinator.start()
+    sock = socket.create_connection(coordinator.address)
+    send_message(sock, {"type": "hello", "version": PROTOCOL_VERSION})
+    recv_message(sock)
+    send_message(sock, {"type": "request"})
+    header, _ = recv_message(sock)
+    if not hold:
+        sock.close()
+    return sock, header
+
+
+class TestWorkQueue:
+    """分散式掃描工作佇列測試類"""
+
+    def test_pack_roundtrip(self, sweep):
+        """測試二進位結果打包與解開"""
+        result = compute_chunk(sweep.rows(0, 100))
+        columns = unpack_result(pack_result(result), 100)
+        for key, values in columns.items():
+            np.testing.assert_array_equal(values, result[key])
+
+    def test_workers_merge_in_order(self, sweep):
+        """測試多個工作程序的結果依區塊順序合併且與單機計算相同"""
+        coordinator = Coordinator(sweep, chunk_rows=97)
+        _start_workers(coordinator, 3)
+        stats, parts = _collect(coordinator)
+        assert [start for start, _ in parts] == [
+            start for start, _ in coordinator.chunks
+        ]
+        expected = compute_chunk(sweep.rows(0, len(sweep)))
+        merged = np.concatenate([columns["y_plus"] for _, columns in parts])
+        np.testing.assert_array_equal(merged, expected["y_plus"])
+        assert stats["retries"] == 0
+
+    def test_dropped_chunk_is_retried(self, sweep):
+        """測試斷線工作程序的區塊重新分派給其他工作程序"""
+        coordinator = Coordinator(sweep, chunk_rows=200)
+        _, header = _lost_worker(coordinator, hold=False)
+        assert header["type"] == "chunk"
+        _start_workers(coordinator, 2)
+        stats, parts = _collect(coordinator)
+        assert stats["retries"] >= 1
+        assert sum(len(columns["y_plus"]) for _, columns in parts) == len(sweep)
+
+    def test_expired_lease_is_retried(self, sweep):
+        """測試逾時未回傳的區塊在租約到期後重新分派"""
+        coordinator = Coordinator(sweep, chunk_rows=500, lease_timeout=0.2)
+        sock, _ = _lost_worker(coordinator, hold=True)
+        try:
+            _start_workers(coordinator, 1)
+            stats, parts = _collect(coordinator)
+        finally:
+            sock.close()
+        assert stats["retries"] >= 1
+        assert len(parts) == 4
+
+    def test_csv_output(self, tmp_path, sweep):
+        """測試分散式匯出與單機 CSV 相同"""
+        from batch import run_sweep
+
+        coordinator = Coordinator(sweep, chunk_rows=300)
+        _start_workers(coordinator, 2)
+        run_distributed(coordinator, tmp_path / "dist.csv", timeout=30)
+        run_sweep(sweep, tmp_path / "local.csv")
+        assert (tmp_path / "dist.csv").read_bytes() == (
+            tmp_path / "local.csv"
+        ).read_bytes()
+
+    def test_too_many_attempts(self, sweep):
+        """測試區塊重試次數超過上限時回報錯誤"""
+        coordinator = Coordinator(sweep, chunk_rows=2000, max_attempts=1)
+        _lost_worker(coordinator, hold=False)
+        with pytest.raises(RuntimeError):
+            _collect(coordinator)
+
+    @pytest.mark.parametrize("chunk", [-1, 1])
+    def test_invalid_chunk_rejected(self, chunk, sweep):
+        """測試超出範圍的區塊編號被拒絕，不影響其他工作程序"""
+        coordinator = Coordinator(sweep, chunk_rows=2000)
+        sock, _ = _lost_worker(coordinator, hold=True)
+        try:
+            sock.settimeout(5)
+            send_message(
+                sock,
+                {"type": "result", "chunk": chunk, "rows": len(sweep)},
+                bytes(len(sweep) * row_bytes()),
+            )
+            # 協調者關閉連線
+            assert recv_message(sock) == (None, None)
+        finally:
+            sock.close()
+        _start_workers(coordinator, 1)
+        _, parts = _collect(coordinator)
+        expected = compute_chunk(sweep.rows(0, len(sweep)))
+        np.testing.assert_array_equal(parts[0][1]["y_plus"], expected["y_plus"])
+
+    def test_error_codes_returned(self, make_sweep):
+        """測試每列錯誤代碼隨結果回傳並計入統計"""
+        sweep = make_sweep(u=[-1.0, 10.0], y=[1e-5], L=[1.0])
+        coordinator = Coordinator(sweep, chunk_rows=1)
+        _start_workers(coordinator, 1)
+        stats, parts = _collect(coordinator)
+        expected = compute_chunk(sweep.rows(0, len(sweep)))
+        merged = np.concatenate([columns["error"] for _, columns in parts])
+        np.testing.assert_array_equal(merged, expected["error"])
+        assert stats["errors"][NON_POSITIVE] == 1
+        assert stats["errors"]["invalid"] == 1
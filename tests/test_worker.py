@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - JSON-Lines 工作程序測試
+"""
+
+import io
+import json
+
+import pytest
+
+from worker import SMALL_BATCH, handle_lines, serve
+
+REQUESTS = [
+    {
+        "id": 1,
+        "mode": "blasius",
+        "rho": 1.204,
+        "mu": 1.81e-5,
+        "u": 10,
+        "y": 1e-6,
+        "L": 1,
+    },
+    {
+        "id": 2,
+        "mode": "cf",
+        "rho": 998.2,
+        "mu": 1.002e-3,
+        "u": 2,
+        "y": 5e-5,
+        "cf": 0.005,
+    },
+    {"id": 3, "mode": "tau", "rho": 1.2, "mu": 1.8e-5, "y": 1e-5, "tau": 0.3},
+    {"id": 4, "mode": "tau", "rho": 1.2, "mu": 1.8e-5, "y": 1e-5, "u_tau": 0.5},
+    {"id": 5, "mode": "target", "rho": 1.2, "mu": 1.8e-5, "u": 10, "L": 1, "y_plus": 1},
+]
+
+
+def _lines(requests):
+    return [json.dumps(request).encode("utf-8") for request in requests]
+
+
+class TestWorker:
+    """工作程序測試類"""
+
+    def test_serve_round_trip(self):
+        """測試每行請求對應一行結果，錯誤以 error 欄位回報"""
+        data = b"\n".join(_lines(REQUESTS) + [b"not json"]) + b"\n"
+        out = io.BytesIO()
+        serve(io.BytesIO(data), out)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+
+        assert [r["id"] for r in results[:5]] == [1, 2, 3, 4, 5]
+        assert results[2]["y_plus"] == pytest.approx(1e-5 * 0.5 / 1.5e-5)
+        assert results[3]["y_plus"] == pytest.approx(results[2]["y_plus"])
+        assert results[4]["y_plus"] == 1.0
+        assert "error" in results[5]
+
+    def test_scalar_and_batch_paths_agree(self):
+        """測試小批次純量路徑與向量化路徑結果一致"""
+        single = [json.loads(handle_lines([line])[0]) for line in _lines(REQUESTS)]
+        batch = handle_lines(_lines(REQUESTS * SMALL_BATCH))[: len(REQUESTS)]
+        for expected, line in zip(single, batch):
+            result = json.loads(line)
+            for key in ("y_plus", "y", "u_tau", "cf", "re_x"):
+                assert result[key] == pytest.approx(expected[key], nan_ok=True)
+            assert result["regime"] == expected["regime"]
+
+    def test_invalid_value_reported(self):
+        """測試非正數欄位回傳錯誤而不中斷"""
+        line = json.dumps({"id": 9, "mode": "cf", "rho": 1, "mu": 1, "u": 1, "y": -1})
+        result = json.loads(handle_lines([line.encode()])[0])
+        assert result["id"] == 9
+        assert "y" in result["error"]
+
+    def test_non_positive_u_in_tau_mode(self):
+        """測試 τw 模式 U 為零或負數時，兩條路徑都回傳 null 的 Cf"""
+        requests = [
+            {"id": i, "mode": "tau", "rho": 1.2, "mu": 1.8e-5, "y": 1e-5, "tau": 0.3}
+            for i in range(3)
+        ]
+        requests[1]["u"] = 0
+        requests[2]["u"] = -5
+        single = [json.loads(handle_lines([line])[0]) for line in _lines(requests)]
+        batch = handle_lines(_lines(requests * SMALL_BATCH))[: len(requests)]
+        for expected, line in zip(single, batch):
+            result = json.loads(line)
+            assert result["cf"] is None
+            assert result.keys() == expected.keys()
+            for key, value in expected.items():
+                if isinstance(value, float):
+                    assert result[key] == pytest.approx(value)
+                else:
+                    assert result[key] == value
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            '{"id": 7, "mode": "cf", "rho": 1, "mu": 1, "y": 1, "cf": 0.1, "u": 1'
+            + "0" * 400
+            + "}",
+            '{"id": 7, "mode": "cf", "rho": 1, "mu": 1, "y": 1, "cf": 0.1, "u": Infinity}',
+            '{"id": 7, "mode": "tau", "rho": 1, "mu": 1, "y": 1, "tau": NaN, "u_tau": 1}',
+        ],
+    )
+    def test_out_of_range_value_reported(self, text):
+        """測試過大或非有限的數值回傳錯誤，工作程序繼續處理後續請求"""
+        out = io.BytesIO()
+        serve(io.BytesIO(text.encode() + b"\n" + _lines(REQUESTS[:1])[0]), out)
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert results[0]["id"] == 7
+        assert "error" in results[0]
+        assert results[1]["id"] == 1
+        assert "error" not in results[1]
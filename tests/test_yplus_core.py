@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ Calculator - 向量化計算核心測試
+"""
+
+import numpy as np
+import pytest
+
+from yplus_core import (
+    MODE_BLASIUS,
+    MODE_CF,
+    MODE_TAU,
+    blasius_cf,
+    compute_patches,
+    regime_codes,
+    u_tau_from_wall_law,
+    y_plus_lam,
+)
+
+
+class TestYPlusCore:
+    """向量化核心測試類"""
+
+    def test_blasius_turbulent_branch(self):
+        """測試空氣流過平板（湍流分支）"""
+        result = compute_patches(1.204, 1.810e-5, 10.0, 1e-6, 1.0)
+        re_x = 1.204 * 10.0 * 1.0 / 1.810e-5
+        cf = 0.455 / np.log10(re_x) ** 2.58
+        y_plus = 1e-6 * np.sqrt(cf / 2) * 10.0 / (1.810e-5 / 1.204)
+        assert result["re_x"][()] == pytest.approx(re_x)
+        assert result["y_plus"][()] == pytest.approx(y_plus)
+
+    def test_blasius_laminar_branch(self):
+        """測試層流分支"""
+        assert blasius_cf(1e4) == pytest.approx(0.664 / 100.0)
+
+    def test_row_mode_selection(self):
+        """測試逐列模式選擇：τw 優先，其次 Cf，最後 Blasius"""
+        u = np.array([10.0, 10.0, 10.0])
+        result = compute_patches(
+            1.2,
+            1.8e-5,
+            u,
+            1e-5,
+            1.0,
+            cf=np.array([np.nan, 0.004, 0.004]),
+            tau=np.array([np.nan, np.nan, 0.3]),
+        )
+        assert list(result["mode"]) == [MODE_BLASIUS, MODE_CF, MODE_TAU]
+        assert result["u_tau"][1] == pytest.approx(np.sqrt(0.002) * 10.0)
+        assert result["u_tau"][2] == pytest.approx(np.sqrt(0.3 / 1.2))
+
+    def test_regime_band_edges(self):
+        """測試分區邊界的歸屬"""
+        codes = regime_codes([0.5, 1.0, 5.0, 5.1, 30.0, 300.0, 301.0])
+        assert list(codes) == [0, 1, 1, 2, 2, 3, 4]
+
+    def test_spalding_inversion(self):
+        """測試 Spalding 定律反解：代回定律的殘差為零且各列皆收斂"""
+        rng = np.random.default_rng(0)
+        u_p = rng.uniform(0.01, 100.0, 10_000)
+        y = 10 ** rng.uniform(-7, -1, 10_000)
+        u_tau, y_plus, converged = u_tau_from_wall_law(u_p, y, 1.5e-5)
+        assert converged.all()
+        u_plus = u_p / u_tau
+        k = 0.41 * u_plus
+        spalding = u_plus + (np.exp(k) - 1 - k - k**2 / 2 - k**3 / 6) / 9.8
+        np.testing.assert_allclose(spalding, y_plus, rtol=1e-9)
+
+    def test_log_law_inversion(self):
+        """測試對數律反解與黏性底層的線性律"""
+        u_tau, y_plus, converged = u_tau_from_wall_law(
+            [8.0, 0.1, -1.0, 0.0], 1e-3, 1.5e-5, law="log"
+        )
+        assert list(converged) == [True, True, True, False]
+        assert 8.0 / u_tau[0] == pytest.approx(np.log(9.8 * y_plus[0]) / 0.41)
+        assert y_plus[1] < y_plus_lam()
+        assert 0.1 / u_tau[1] == pytest.approx(y_plus[1])
+        assert np.isnan(y_plus[3])
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 暫態 y+ 統計
+逐時間步累積每個面的 y+ 時間平均、RMS、最小值與最大值，
+不需保留所有時間步；可跨程序合併，並可存檔後續算
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import csv
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from yplus_core import y_plus_from_tau
+
+# 存檔格式版本
+STATS_VERSION = 1
+
+STATS_FIELDS = ["面", "y+ 平均值", "y+ RMS", "y+ 標準差", "y+ 最小值", "y+ 最大值"]
+
+
+class YPlusAccumulator:
+    """
+    逐面 y+ 的串流統計
+
+    以加權 Welford 演算法更新平均值與離均差平方和 M2（權重可為時間步長），
+    避免「平方和 − 平方的和」在大量時間步後的相消誤差；最小值與最大值逐步更新。
+    所有運算皆對面向量化，並使用預先配置的暫存陣列就地寫入，
+    每個時間步不會配置新的面陣列。
+    """
+
+    def __init__(self, n_faces):
+        self.n_faces = int(n_faces)
+        self.steps = 0
+        self.weight = 0.0
+        self.mean = np.zeros(self.n_faces)
+        self.m2 = np.zeros(self.n_faces)
+        self.min = np.full(self.n_faces, np.inf)
+        self.max = np.full(self.n_faces, -np.inf)
+        self._delta = np.empty(self.n_faces)
+        self._scratch = np.empty(self.n_faces)
+
+    def update(self, y_plus, weight=1.0):
+        """加入一個時間步的逐面 y+；`weight` 通常為時間步長"""
+        y_plus = np.asarray(y_plus, dtype=np.float64)
+        if y_plus.shape != (self.n_faces,):
+            raise ValueError(f"面數不符：{y_plus.shape}，預期 ({self.n_faces},)")
+        if not weight > 0:
+            raise ValueError("權重必須為正數")
+        self.steps += 1
+        self.weight += weight
+        delta, scratch = self._delta, self._scratch
+        # δ = x − 平均；平均 += δ·w/W；M2 += w·δ·(x − 新平均)
+        np.subtract(y_plus, self.mean, out=delta)
+        np.multiply(delta, weight / self.weight, out=scratch)
+        self.mean += scratch
+        np.subtract(y_plus, self.mean, out=scratch)
+        delta *= weight
+        delta *= scratch
+        self.m2 += delta
+        np.minimum(self.min, y_plus, out=self.min)
+        np.maximum(self.max, y_plus, out=self.max)
+        return self
+
+    def update_tau(self, tau, y, rho, mu, weight=1.0):
+        """由一個時間步的壁面剪應力（純量或向量）計算 y+ 後加入"""
+        _, y_plus = y_plus_from_tau(tau, y, rho, mu)
+        return self.update(y_plus, weight)
+
+    def merge(self, other):
+        """
+        合併另一個累積器（例如其他程序處理的時間步）
+
+        以 Chan 等人的平行公式合併平均值與 M2，結果與依序加入所有時間步相同
+        （至捨入誤差）。就地更新並回傳 self。
+        """
+        if other.n_faces != self.n_faces:
+            raise ValueError("面數不符，無法合併")
+        if other.steps == 0:
+            return self
+        total = self.weight + other.weight
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * (self.weight * other.weight / total)
+        self.mean += delta * (other.weight / total)
+        self.weight = total
+        self.steps += other.steps
+        np.minimum(self.min, other.min, out=self.min)
+        np.maximum(self.max, other.max, out=self.max)
+        return self
+
+    def variance(self):
+        """時間加權的母體變異數"""
+        if self.steps == 0:
+            return np.full(self.n_faces, np.nan)
+        return self.m2 / self.weight
+
+    def std(self):
+        """y+ 擾動的標準差"""
+        return np.sqrt(self.variance())
+
+    def rms(self):
+        """y+ 的均方根 √(平均² + 變異數)"""
+        return np.sqrt(self.mean * self.mean + self.variance())
+
+    def save(self, path, meta=None):
+        """
+        原子性存檔（先寫暫存檔再取代），中斷時不會留下不完整的檔案
+
+        `meta` 為可 JSON 序列化的附加資訊，與統計一起存入同一個檔案。
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        header = {
+            "version": STATS_VERSION,
+            "steps": self.steps,
+            "weight": self.weight,
+            "meta": meta or {},
+        }
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                header=np.array(json.dumps(header, ensure_ascii=False)),
+                mean=self.mean,
+                m2=self.m2,
+                min=self.min,
+                max=self.max,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """讀取存檔，回傳 (累積器, meta)"""
+        with np.load(path) as data:
+            header = json.loads(str(data["header"]))
+            if header.get("version") != STATS_VERSION:
+                raise ValueError(f"不支援的統計檔版本：{header.get('version')}")
+            accumulator = cls(len(data["mean"]))
+            for key in ("mean", "m2", "min", "max"):
+                getattr(accumulator, key)[...] = data[key]
+        accumulator.steps = int(header["steps"])
+        accumulator.weight = float(header["weight"])
+        return accumulator, header["meta"]
+
+    def rows(self):
+        """逐面統計列（面編號、平均、RMS、標準差、最小、最大）"""
+        return zip(
+            range(self.n_faces),
+            self.mean.tolist(),
+            self.rms().tolist(),
+            self.std().tolist(),
+            self.min.tolist(),
+            self.max.tolist(),
+        )
+
+
+def write_csv(accumulator, path):
+    """匯出逐面統計 CSV"""
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(STATS_FIELDS)
+        writer.writerows(
+            [face] + [f"{value:.6g}" for value in values]
+            for face, *values in accumulator.rows()
+        )
+
+
+def main(argv=None):
+    """命令列入口：合併多個統計存檔並匯出逐面統計"""
+    parser = argparse.ArgumentParser(description="合併暫態 y+ 統計存檔")
+    parser.add_argument("inputs", nargs="+", help="統計存檔（.npz）")
+    parser.add_argument("--out", help="合併後的統計存檔")
+    parser.add_argument("--csv", help="逐面統計 CSV")
+    args = parser.parse_args(argv)
+
+    accumulator, _ = YPlusAccumulator.load(args.inputs[0])
+    for path in args.inputs[1:]:
+        accumulator.merge(YPlusAccumulator.load(path)[0])
+    if args.out:
+        accumulator.save(args.out)
+    if args.csv:
+        write_csv(accumulator, args.csv)
+    print(
+        f"✓ {accumulator.n_faces} 個面，{accumulator.steps} 個時間步；"
+        f"時間平均 y+ 範圍 {accumulator.mean.min():.4g} ~ {accumulator.mean.max():.4g}"
+    )
+
+
+if __name__ == "__main__":
+    main()
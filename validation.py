@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 向量化輸入驗證
+一次檢查整批輸入，每列產生錯誤代碼位元遮罩（0 為有效），不拋出例外；
+計算時只處理有效列，無效列的結果為 NaN
+此文件使用 UTF-8 編碼
+"""
+
+import numpy as np
+
+from regime import INVALID
+from yplus_core import (
+    MODE_BLASIUS,
+    MODE_CF,
+    MODE_TAU,
+    compute_patches,
+    reynolds_number,
+)
+
+# 錯誤代碼（位元旗標，可同時成立）
+NON_POSITIVE = 1  # ρ、μ、U、y、L 有零或負值
+NON_FINITE = 2  # 輸入有 NaN 或 ±inf（選用的 Cf/τw/u_τ 以 NaN 表示未提供）
+MISSING_CF = 4  # 指定模式 B 但 Cf 未提供或非正數
+MISSING_TAU = 8  # 指定模式 C 但 τw 與 u_τ 皆未提供或非正數
+RE_OUT_OF_RANGE = 16  # 模式 A 的 Re_x 超出 Blasius-Schlichting 公式的適用範圍
+UNKNOWN_MODE = 32  # 指定的模式不是 A/B/C（壁面定律反解等需另行計算）
+
+ERROR_MESSAGES = {
+    NON_POSITIVE: "參數必須為正數",
+    NON_FINITE: "參數必須為有限數值",
+    MISSING_CF: "模式 B 需要正的摩擦系數 Cf",
+    MISSING_TAU: "模式 C 需要正的剪應力 τw 或摩擦速度 u_τ",
+    RE_OUT_OF_RANGE: "雷諾數超出 Blasius-Schlichting 公式的適用範圍",
+    UNKNOWN_MODE: "不支援的計算模式",
+}
+
+# validate_patches/compute_checked 可指定的模式
+SUPPORTED_MODES = (MODE_BLASIUS, MODE_CF, MODE_TAU)
+
+# 模式 A 可接受的 Re_x 範圍；湍流關聯式的資料涵蓋到約 1e10
+RE_RANGE = (1.0, 1e10)
+
+# 無效列的計算模式
+MODE_INVALID = -1
+
+
+def _flag(codes, flag, mask):
+    """在 mask 成立的列就地加上錯誤旗標（不配置與列數等長的暫存陣列）"""
+    np.bitwise_or(codes, np.uint8(flag), out=codes, where=mask)
+
+
+def _flag_value(codes, values, required):
+    """依單一欄位更新錯誤代碼；`required` 為 False 時 NaN 表示未提供"""
+    values = np.asarray(values, dtype=np.float64)
+    if required:
+        _flag(codes, NON_FINITE, ~np.isfinite(values))
+        with np.errstate(invalid="ignore"):
+            _flag(codes, NON_POSITIVE, values <= 0)
+    else:
+        _flag(codes, NON_FINITE, np.isinf(values))
+
+
+def validate_patches(rho, mu, u, y, L, cf=None, tau=None, u_tau=None, mode=None):
+    """
+    驗證一批輸入，回傳每列的錯誤代碼（uint8 位元遮罩，0 為有效）
+
+    `mode` 為各列指定的計算模式（MODE_BLASIUS/MODE_CF/MODE_TAU，可為純量），
+    其他代碼標記為 UNKNOWN_MODE；未指定時與 compute_patches 相同，
+    依 τw、Cf 是否提供逐列選擇。
+    """
+    shape = np.broadcast_shapes(
+        *(
+            np.shape(v)
+            for v in (rho, mu, u, y, L, cf, tau, u_tau, mode)
+            if v is not None
+        )
+    )
+    codes = np.zeros(shape, dtype=np.uint8)
+    for values in (rho, mu, u, y, L):
+        _flag_value(codes, values, True)
+    for values in (cf, tau, u_tau):
+        if values is not None:
+            _flag_value(codes, values, False)
+
+    has_cf = _positive(cf)
+    has_tau = _positive(tau) | _positive(u_tau)
+    if mode is None:
+        blasius = ~has_tau & ~has_cf
+    else:
+        mode = np.asarray(mode)
+        _flag(codes, UNKNOWN_MODE, ~np.isin(mode, SUPPORTED_MODES))
+        _flag(codes, MISSING_CF, (mode == MODE_CF) & ~has_cf)
+        _flag(codes, MISSING_TAU, (mode == MODE_TAU) & ~has_tau)
+        blasius = mode == MODE_BLASIUS
+
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        re_x = reynolds_number(rho, u, L, mu)
+        in_range = (re_x >= RE_RANGE[0]) & (re_x <= RE_RANGE[1])
+    # 其他輸入已無效的列，Re_x 沒有意義，不另標記
+    _flag(codes, RE_OUT_OF_RANGE, blasius & ~in_range & (codes == 0))
+    return codes
+
+
+def _positive(values):
+    if values is None:
+        return np.False_
+    with np.errstate(invalid="ignore"):
+        return np.asarray(values, dtype=np.float64) > 0
+
+
+def error_histogram(codes, out=None):
+    """錯誤代碼的次數分佈（256 格）；`out` 為累加用的既有陣列"""
+    histogram = np.bincount(np.ravel(codes), minlength=256)
+    if out is None:
+        return histogram
+    out += histogram
+    return out
+
+
+def error_counts(codes=None, histogram=None):
+    """
+    各錯誤代碼的列數 {代碼: 列數}，另含 "invalid"（任一錯誤的列數）
+
+    以次數分佈彙總，只需對代碼陣列掃描一次；可傳入 error_histogram() 的結果。
+    """
+    if histogram is None:
+        histogram = error_histogram(codes)
+    values = np.arange(len(histogram))
+    counts = {
+        flag: int(histogram[(values & flag) != 0].sum()) for flag in ERROR_MESSAGES
+    }
+    counts["invalid"] = int(histogram[1:].sum())
+    return counts
+
+
+def describe(code):
+    """單一列錯誤代碼的說明清單"""
+    return [message for flag, message in ERROR_MESSAGES.items() if code & flag]
+
+
+def compute_checked(
+    rho, mu, u, y, L, cf=None, tau=None, u_tau=None, mode=None, fast_cf=False
+):
+    """
+    先驗證再計算的 compute_patches
+
+    只有有效列進入計算：全部有效時直接計算，否則先壓縮出有效列再計算並放回，
+    無效列的數值欄位為 NaN、分區代碼為 INVALID、模式為 MODE_INVALID。
+    `u_tau` 在未提供 τw 的列換算為 τw = ρ·u_τ²。指定 `mode` 時各列只使用
+    該模式的輸入。回傳 compute_patches 的欄位字典，另含 `error`（錯誤代碼）。
+    """
+    codes = validate_patches(rho, mu, u, y, L, cf, tau, u_tau, mode)
+    shape = codes.shape
+    columns = [
+        np.broadcast_to(np.asarray(v, dtype=np.float64), shape)
+        for v in (rho, mu, u, y, L)
+    ]
+    cf = None if cf is None else np.broadcast_to(np.asarray(cf, np.float64), shape)
+    if u_tau is not None:
+        u_tau = np.asarray(u_tau, dtype=np.float64)
+        with np.errstate(invalid="ignore"):
+            converted = columns[0] * u_tau * u_tau
+            tau = converted if tau is None else np.where(tau > 0, tau, converted)
+    tau = None if tau is None else np.broadcast_to(np.asarray(tau, np.float64), shape)
+    if mode is not None:
+        mode = np.broadcast_to(np.asarray(mode), shape)
+        if cf is not None:
+            cf = np.where(mode == MODE_CF, cf, np.nan)
+        if tau is not None:
+            tau = np.where(mode == MODE_TAU, tau, np.nan)
+
+    valid = codes == 0
+    if valid.all():
+        result = compute_patches(*columns, cf=cf, tau=tau, fast_cf=fast_cf)
+        result["error"] = codes
+        return result
+
+    def pick(values):
+        return None if values is None else values[valid]
+
+    partial = compute_patches(
+        *(pick(v) for v in columns), cf=pick(cf), tau=pick(tau), fast_cf=fast_cf
+    )
+    result = {}
+    for key, values in partial.items():
+        if key == "regime":
+            full = np.full(shape, INVALID, dtype=values.dtype)
+        elif key == "mode":
+            full = np.full(shape, MODE_INVALID, dtype=values.dtype)
+        else:
+            full = np.full(shape, np.nan)
+        full[valid] = values
+        result[key] = full
+    result["error"] = codes
+    return result
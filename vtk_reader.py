@@ -0,0 +1,804 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - VTK/VTP 表面串流讀取
+逐區塊讀取舊版 VTK 與 XML VTP 檔案中的壁面剪應力與壁面距離陣列，
+不需將整個檔案載入記憶體，並可將 y+ 寫回為新陣列
+此文件使用 UTF-8 編碼
+"""
+
+import base64
+import binascii
+import contextlib
+import re
+import shutil
+import tempfile
+import zlib
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from yplus_core import regime_codes, y_plus_from_tau
+
+# 預設每區塊的 tuple 數
+BLOCK_SIZE = 1 << 20
+# 掃描檔案時每次讀取的位元組數
+_CHUNK = 1 << 20
+
+# 舊版 VTK 二進位為 big-endian
+_LEGACY_TYPES = {
+    "bit": None,
+    "unsigned_char": ">u1",
+    "char": ">i1",
+    "unsigned_short": ">u2",
+    "short": ">i2",
+    "unsigned_int": ">u4",
+    "int": ">i4",
+    "unsigned_long": ">u8",
+    "long": ">i8",
+    "float": ">f4",
+    "double": ">f8",
+    "vtktypeint64": ">i8",
+    "vtktypeuint64": ">u8",
+    "vtkidtype": ">i8",
+}
+
+_XML_TYPES = {
+    "Int8": "i1",
+    "UInt8": "u1",
+    "Int16": "i2",
+    "UInt16": "u2",
+    "Int32": "i4",
+    "UInt32": "u4",
+    "Int64": "i8",
+    "UInt64": "u8",
+    "Float32": "f4",
+    "Float64": "f8",
+}
+
+_TAG = re.compile(rb"<(/?)([A-Za-z]\w*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*?)(/?)>")
+_ATTR = re.compile(rb"([A-Za-z_][\w.-]*)\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+
+
+class ArrayInfo:
+    """檔案中一個資料陣列的位置與格式"""
+
+    def __init__(
+        self,
+        name,
+        association,
+        dtype,
+        components,
+        tuples,
+        encoding,
+        offset,
+        piece=0,
+    ):
+        self.name = name
+        # "point" 或 "cell"
+        self.association = association
+        self.dtype = np.dtype(dtype)
+        self.components = components
+        self.tuples = tuples
+        # ascii / binary（舊版原始資料）/ base64 / raw（XML appended）
+        self.encoding = encoding
+        # 資料起點在檔案中的位元組位置
+        self.offset = offset
+        self.piece = piece
+
+    def __repr__(self):
+        return (
+            f"ArrayInfo({self.name!r}, {self.association}, {self.dtype}, "
+            f"{self.components}x{self.tuples}, {self.encoding})"
+        )
+
+
+class _Base64Reader:
+    """從檔案位置開始以串流方式解碼 base64，遇到 `<` 時結束"""
+
+    def __init__(self, f, offset):
+        self.f = f
+        self.f.seek(offset)
+        self.pending = b""
+        self.decoded = bytearray()
+        self.done = False
+
+    def _fill(self):
+        chunk = self.f.read(_CHUNK)
+        end = chunk.find(b"<")
+        if not chunk or end >= 0:
+            chunk = chunk[: max(end, 0)]
+            self.done = True
+        text = self.pending + re.sub(rb"\s+", b"", chunk)
+        usable = len(text) if self.done else len(text) // 4 * 4
+        self.pending = text[usable:]
+        self.decoded += _b64decode_segments(text[:usable])
+
+    def read(self, n):
+        while len(self.decoded) < n and not self.done:
+            self._fill()
+        data = bytes(self.decoded[:n])
+        del self.decoded[:n]
+        return data
+
+
+def _b64decode_segments(text):
+    """解碼可能由多段（各自含補位 `=`）串接而成的 base64"""
+    if b"=" not in text:
+        return binascii.a2b_base64(text)
+    parts = []
+    start = 0
+    for match in re.finditer(rb"=+", text):
+        parts.append(binascii.a2b_base64(text[start : match.end()]))
+        start = match.end()
+    if start < len(text):
+        parts.append(binascii.a2b_base64(text[start:]))
+    return b"".join(parts)
+
+
+def _read_exact(source, n):
+    data = source.read(n)
+    if len(data) != n:
+        raise ValueError("檔案資料長度不足")
+    return data
+
+
+class SurfaceFile:
+    """
+    VTK 表面檔案的陣列索引
+
+    開啟時只掃描標頭與各陣列的位置（二進位資料以 seek 略過），
+    之後以 `iter_blocks()` 逐區塊讀取指定陣列。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.arrays = []
+        with open(path, "rb") as f:
+            head = f.read(64)
+        if head.startswith(b"# vtk DataFile"):
+            self.format = "legacy"
+            _scan_legacy(self)
+        elif b"<" in head:
+            self.format = "xml"
+            _scan_xml(self)
+        else:
+            raise ValueError("無法辨識的 VTK 檔案格式")
+
+    def find(self, name, association=None):
+        """回傳指定名稱的陣列（多個 piece 時依序回傳清單）"""
+        found = [
+            info
+            for info in self.arrays
+            if info.name == name
+            and (association is None or info.association == association)
+        ]
+        if not found:
+            raise KeyError(f"找不到陣列：{name}")
+        associations = {info.association for info in found}
+        if len(associations) > 1:
+            raise KeyError(f"陣列 {name} 同時存在於點與面資料，請指定 association")
+        return found
+
+    def iter_blocks(self, name, association=None, block_size=BLOCK_SIZE):
+        """逐區塊讀取陣列；向量回傳 (k, n) 陣列，純量回傳 (k,)"""
+        for info in self.find(name, association):
+            with open(self.path, "rb") as f:
+                yield from _iter_array(self, f, info, block_size)
+
+    def iter_aligned(self, names, association=None, block_size=BLOCK_SIZE):
+        """同步讀取多個陣列，每次回傳對齊的區塊 tuple"""
+        infos = [self.find(name, association) for name in names]
+        for piece_infos in zip(*infos):
+            if len({info.tuples for info in piece_infos}) != 1:
+                raise ValueError("陣列長度不一致")
+            with contextlib.ExitStack() as stack:
+                iterators = [
+                    _iter_array(
+                        self,
+                        stack.enter_context(open(self.path, "rb")),
+                        info,
+                        block_size,
+                    )
+                    for info in piece_infos
+                ]
+                yield from zip(*iterators)
+
+
+# ========== 陣列讀取 ==========
+
+
+def _iter_array(surface, f, info, block_size):
+    shape = (-1, info.components) if info.components > 1 else (-1,)
+    if info.encoding == "ascii":
+        for block in _iter_ascii(f, info, block_size):
+            yield block.reshape(shape)
+        return
+
+    for raw in _iter_binary(surface, f, info, block_size):
+        yield np.frombuffer(raw, dtype=info.dtype).astype(np.float64).reshape(shape)
+
+
+def _iter_ascii(f, info, block_size):
+    """從檔案位置開始逐區塊解析 ASCII 數值（XML 中遇到 `<` 即結束）"""
+    f.seek(info.offset)
+    remaining = info.tuples * info.components
+    step = block_size * info.components
+    tokens = []
+    tail = b""
+    while remaining > 0:
+        chunk = f.read(_CHUNK)
+        end = chunk.find(b"<")
+        final = not chunk or end >= 0
+        text = tail + (chunk[:end] if end >= 0 else chunk)
+        parts = text.split()
+        tail = b""
+        if not final and parts and not text[-1:].isspace():
+            # 最後一個數值可能被區塊邊界截斷，留待下次解析
+            tail = parts.pop()
+        tokens.extend(parts)
+        while tokens and (len(tokens) >= min(step, remaining) or final):
+            take = min(step, remaining, len(tokens))
+            yield np.fromiter(map(float, tokens[:take]), np.float64, take)
+            del tokens[:take]
+            remaining -= take
+            if remaining == 0:
+                return
+        if final:
+            raise ValueError(f"陣列 {info.name} 的 ASCII 資料不足")
+
+
+def _iter_binary(surface, f, info, block_size):
+    """逐區塊回傳陣列的原始位元組，每區塊恰為 block_size 個 tuple（最後一塊除外）"""
+    step = block_size * info.components * info.dtype.itemsize
+    total = info.tuples * info.components * info.dtype.itemsize
+
+    if info.encoding == "binary":
+        f.seek(info.offset)
+        for start in range(0, total, step):
+            yield _read_exact(f, min(step, total - start))
+        return
+
+    if info.encoding == "raw":
+        f.seek(info.offset)
+        source = f
+    else:
+        source = _Base64Reader(f, info.offset)
+
+    header = np.dtype(surface.header_type)
+    if surface.compressor is None:
+        _read_exact(source, header.itemsize)
+        for start in range(0, total, step):
+            yield _read_exact(source, min(step, total - start))
+        return
+
+    # 壓縮資料：[區塊數, 區塊大小, 最後區塊大小, 各區塊壓縮後大小...]
+    # 壓縮區塊的邊界與 tuple 無關，解壓後跨區塊累積，依 tuple 數切出區塊
+    counts = np.frombuffer(_read_exact(source, 3 * header.itemsize), dtype=header)
+    sizes = np.frombuffer(_read_exact(source, int(counts[0]) * header.itemsize), header)
+    buffer = bytearray()
+    for size in sizes:
+        buffer += zlib.decompress(_read_exact(source, int(size)))
+        start = 0
+        while len(buffer) - start >= step:
+            yield bytes(buffer[start : start + step])
+            start += step
+        del buffer[:start]
+    if len(buffer) % (info.components * info.dtype.itemsize):
+        raise ValueError(f"陣列 {info.name} 的壓縮資料長度不符")
+    if buffer:
+        yield bytes(buffer)
+
+
+# ========== 舊版 VTK 掃描 ==========
+
+
+def _scan_legacy(surface):
+    with open(surface.path, "rb") as f:
+        f.readline()
+        f.readline()
+        mode = f.readline().strip().upper()
+        if mode not in (b"ASCII", b"BINARY"):
+            raise ValueError("舊版 VTK 檔案必須為 ASCII 或 BINARY")
+        binary = mode == b"BINARY"
+        surface.binary = binary
+        surface.sections = []
+        association = None
+        count = 0
+
+        def skip(n, vtk_type):
+            if binary:
+                f.seek(n * _legacy_dtype(vtk_type).itemsize, 1)
+            else:
+                _skip_ascii(f, n)
+
+        def record(name, vtk_type, components):
+            encoding = "binary" if binary else "ascii"
+            surface.arrays.append(
+                ArrayInfo(
+                    name,
+                    association,
+                    _legacy_dtype(vtk_type),
+                    components,
+                    count,
+                    encoding,
+                    f.tell(),
+                )
+            )
+            skip(count * components, vtk_type)
+
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            words = line.decode("utf-8", "replace").split()
+            if not words:
+                continue
+            key = words[0].upper()
+
+            if key in ("POINTS",):
+                skip(int(words[1]) * 3, words[2])
+            elif key in ("VERTICES", "LINES", "POLYGONS", "TRIANGLE_STRIPS", "CELLS"):
+                position = f.tell()
+                follow = f.readline().split()
+                if follow and follow[0].upper() == b"OFFSETS":
+                    # 5.x 格式：OFFSETS/CONNECTIVITY 兩段
+                    skip(int(words[1]), follow[1].decode())
+                    follow = _next_words(f)
+                    skip(int(words[2]), follow[1].decode())
+                else:
+                    f.seek(position)
+                    skip(int(words[2]), "int")
+            elif key == "CELL_TYPES":
+                skip(int(words[1]), "int")
+            elif key in ("X_COORDINATES", "Y_COORDINATES", "Z_COORDINATES"):
+                skip(int(words[1]), words[2])
+            elif key in ("POINT_DATA", "CELL_DATA"):
+                association = "point" if key == "POINT_DATA" else "cell"
+                count = int(words[1])
+                surface.sections.append((association, count))
+            elif key == "SCALARS":
+                components = int(words[3]) if len(words) > 3 else 1
+                position = f.tell()
+                follow = f.readline().split()
+                if not follow or follow[0].upper() != b"LOOKUP_TABLE":
+                    f.seek(position)
+                record(words[1], words[2], components)
+            elif key in ("VECTORS", "NORMALS"):
+                record(words[1], words[2], 3)
+            elif key == "TENSORS":
+                record(words[1], words[2], 9)
+            elif key == "TEXTURE_COORDINATES":
+                record(words[1], words[3], int(words[2]))
+            elif key == "FIELD":
+                for _ in range(int(words[2])):
+                    name, components, tuples, vtk_type = _next_words(f)[:4]
+                    saved = count
+                    count = int(tuples)
+                    record(name.decode(), vtk_type.decode(), int(components))
+                    count = saved
+            elif key == "LOOKUP_TABLE":
+                size = int(words[2])
+                if binary:
+                    f.seek(size * 4, 1)
+                else:
+                    _skip_ascii(f, size * 4)
+            elif key == "METADATA":
+                while f.readline().strip():
+                    pass
+            elif key == "COLOR_SCALARS":
+                if binary:
+                    f.seek(count * int(words[2]), 1)
+                else:
+                    _skip_ascii(f, count * int(words[2]))
+        surface.end_offset = f.tell()
+
+
+def _legacy_dtype(vtk_type):
+    dtype = _LEGACY_TYPES.get(vtk_type.lower())
+    if dtype is None:
+        raise ValueError(f"不支援的資料型別：{vtk_type}")
+    return np.dtype(dtype)
+
+
+def _next_words(f):
+    while True:
+        line = f.readline()
+        if not line:
+            raise ValueError("檔案意外結束")
+        words = line.split()
+        if words:
+            return words
+
+
+def _skip_ascii(f, n):
+    """略過 n 個 ASCII 數值（以行為單位讀取）"""
+    while n > 0:
+        line = f.readline()
+        if not line:
+            raise ValueError("ASCII 資料不足")
+        n -= len(line.split())
+
+
+# ========== XML VTP 掃描 ==========
+
+
+def _scan_xml(surface):
+    """串流掃描 XML 標籤，記錄各 DataArray 的位置，遇到 AppendedData 即停止"""
+    surface.byte_order = "<"
+    surface.header_type = "<u4"
+    surface.compressor = None
+    surface.appended_start = None
+    surface.section_ends = []
+
+    pending = []
+    piece = -1
+    piece_counts = {}
+    association = None
+
+    with open(surface.path, "rb") as f:
+        base = 0
+        buffer = b""
+        while True:
+            chunk = f.read(_CHUNK)
+            if not chunk:
+                break
+            buffer += chunk
+            consumed = 0
+            stop = False
+            for match in _TAG.finditer(buffer):
+                closing, name, attr_text, empty = match.groups()
+                consumed = match.end()
+                attrs = {
+                    key.decode(): (v1 or v2).decode()
+                    for key, v1, v2 in _ATTR.findall(attr_text)
+                }
+                name = name.decode()
+
+                if name == "VTKFile" and not closing:
+                    order = attrs.get("byte_order", "LittleEndian")
+                    surface.byte_order = "<" if order == "LittleEndian" else ">"
+                    header = "u8" if attrs.get("header_type") == "UInt64" else "u4"
+                    surface.header_type = surface.byte_order + header
+                    surface.compressor = attrs.get("compressor")
+                    if surface.compressor not in (None, "vtkZLibDataCompressor"):
+                        raise ValueError(f"不支援的壓縮格式：{surface.compressor}")
+                elif name == "Piece" and not closing:
+                    piece += 1
+                    cells = sum(
+                        int(attrs.get(key, 0))
+                        for key in (
+                            "NumberOfCells",
+                            "NumberOfVerts",
+                            "NumberOfLines",
+                            "NumberOfStrips",
+                            "NumberOfPolys",
+                        )
+                    )
+                    piece_counts[piece] = {
+                        "point": int(attrs.get("NumberOfPoints", 0)),
+                        "cell": cells,
+                    }
+                elif name in ("PointData", "CellData"):
+                    if closing:
+                        surface.section_ends.append(
+                            (piece, association, base + match.start())
+                        )
+                        association = None
+                    elif not empty:
+                        association = "point" if name == "PointData" else "cell"
+                elif name == "DataArray" and not closing and association:
+                    pending.append(
+                        (attrs, association, piece, base + match.end(), bool(empty))
+                    )
+                elif name == "AppendedData" and not closing:
+                    marker = buffer.find(b"_", match.end())
+                    while marker < 0:
+                        more = f.read(_CHUNK)
+                        if not more:
+                            raise ValueError("AppendedData 缺少 '_' 標記")
+                        buffer += more
+                        marker = buffer.find(b"_", match.end())
+                    surface.appended_start = base + marker + 1
+                    surface.appended_encoding = attrs.get("encoding", "raw")
+                    stop = True
+                    break
+            if stop:
+                break
+            # 保留尚未完整的標籤
+            last_open = buffer.rfind(b"<", consumed)
+            keep = last_open if last_open >= 0 else len(buffer)
+            base += keep
+            buffer = buffer[keep:]
+
+    for attrs, association, piece_index, content, empty in pending:
+        array_format = attrs.get("format", "ascii")
+        if array_format == "appended":
+            encoding = "raw" if surface.appended_encoding == "raw" else "base64"
+            offset = surface.appended_start + int(attrs.get("offset", 0))
+        elif array_format == "binary":
+            encoding, offset = "base64", content
+        else:
+            encoding, offset = "ascii", content
+        if empty and array_format != "appended":
+            continue
+        dtype = surface.byte_order + _XML_TYPES[attrs.get("type", "Float32")]
+        surface.arrays.append(
+            ArrayInfo(
+                attrs.get("Name", ""),
+                association,
+                dtype,
+                int(attrs.get("NumberOfComponents", 1)),
+                piece_counts[piece_index][association],
+                encoding,
+                offset,
+                piece_index,
+            )
+        )
+
+
+# ========== y+ 計算與寫回 ==========
+
+
+def surface_y_plus(
+    path,
+    rho,
+    mu,
+    shear="wallShearStress",
+    distance="wallDistance",
+    y=None,
+    kinematic=False,
+    association=None,
+    output_path=None,
+    output_name="yPlus",
+    block_size=BLOCK_SIZE,
+):
+    """
+    逐區塊計算表面檔案中每個點/面的 y+
+
+    `y` 不為 None 時使用固定的第一層高度，否則讀取 `distance` 陣列。
+    `kinematic` 表示剪應力為 τw/ρ。指定 `output_path` 時另存一份含
+    `output_name` 陣列（float32）的檔案。回傳 y+ 統計摘要。
+    """
+    surface = SurfaceFile(path)
+    shear_infos = surface.find(shear, association)
+    association = shear_infos[0].association
+
+    def blocks():
+        if y is None:
+            aligned = surface.iter_aligned([shear, distance], association, block_size)
+        else:
+            aligned = (
+                (tau, y) for tau in surface.iter_blocks(shear, association, block_size)
+            )
+        for tau, wall_distance in aligned:
+            if kinematic:
+                tau = tau * rho
+            yield y_plus_from_tau(tau, wall_distance, rho, mu)[1]
+
+    summary = _Summary()
+    if output_path is None:
+        for values in blocks():
+            summary.add(values)
+    else:
+
+        def tracked():
+            for values in blocks():
+                summary.add(values)
+                yield values.astype(np.float32)
+
+        if surface.format == "legacy":
+            _write_legacy(surface, output_path, output_name, shear_infos[0], tracked())
+        else:
+            _write_xml(surface, output_path, output_name, shear_infos, tracked())
+    return summary.result()
+
+
+class _Summary:
+    """逐區塊累積 y+ 統計"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.regimes = np.zeros(len(DEFAULT_BANDS), dtype=np.int64)
+
+    def add(self, values):
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.regimes += DEFAULT_BANDS.counts(regime_codes(values))
+
+    def result(self):
+        return {
+            "count": self.count,
+            "min": self.minimum,
+            "mean": self.total / self.count if self.count else float("nan"),
+            "max": self.maximum,
+            "regimes": dict(zip(DEFAULT_BANDS.labels, self.regimes.tolist())),
+        }
+
+
+def _write_legacy(surface, output_path, name, info, values):
+    """複製原檔並在結尾附加 y+ 陣列"""
+    shutil.copyfile(surface.path, output_path)
+    with open(output_path, "rb+") as f:
+        f.seek(0, 2)
+        if f.tell():
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        header = ""
+        # 最後一段不是同類型的屬性資料時，需重新宣告 POINT_DATA/CELL_DATA
+        if surface.sections[-1] != (info.association, info.tuples):
+            header = f"{info.association.upper()}_DATA {info.tuples}\n"
+        header += f"SCALARS {name} float 1\nLOOKUP_TABLE default\n"
+        f.write(header.encode("utf-8"))
+        for block in values:
+            if surface.binary:
+                f.write(block.astype(">f4").tobytes())
+            else:
+                f.write("\n".join(f"{v:.7g}" for v in block.tolist()).encode())
+                f.write(b"\n")
+        if surface.binary:
+            f.write(b"\n")
+
+
+def _write_xml(surface, output_path, name, shear_infos, values):
+    """在原陣列所在的 PointData/CellData 中加入 y+ 陣列"""
+    association = shear_infos[0].association
+    appended = surface.appended_start is not None
+    header = np.dtype(surface.header_type)
+    base64_mode = not appended or surface.appended_encoding == "base64"
+
+    # 先將每個 piece 的資料編碼到暫存檔，取得長度後再組合輸出
+    with contextlib.ExitStack() as stack:
+        payloads = []
+        for info in shear_infos:
+            tmp = stack.enter_context(tempfile.TemporaryFile())
+            with tempfile.TemporaryFile() as raw:
+                written = 0
+                while written < info.tuples:
+                    block = next(values)
+                    raw.write(block.astype(surface.byte_order + "f4").tobytes())
+                    written += len(block)
+                raw.seek(0)
+                _encode_payload(raw, tmp, info.tuples * 4, header, surface, base64_mode)
+            payloads.append((info, tmp, tmp.tell()))
+        _assemble_xml(surface, output_path, name, association, payloads)
+
+
+def _assemble_xml(surface, output_path, name, association, payloads):
+    """複製原檔並在各 piece 的資料段插入已編碼的 y+ 陣列"""
+    appended = surface.appended_start is not None
+    with open(surface.path, "rb") as src, open(output_path, "wb") as dst:
+        if appended:
+            src.seek(0, 2)
+            size = src.tell()
+            src.seek(max(size - 4096, 0))
+            tail = src.read()
+            data_end = size - len(tail) + tail.rfind(b"</AppendedData>")
+            offset = data_end - surface.appended_start
+
+        position = 0
+        ends = {
+            piece: at
+            for piece, assoc, at in surface.section_ends
+            if assoc == association
+        }
+        for info, tmp, length in payloads:
+            at = ends[info.piece]
+            _copy_range(src, dst, position, at)
+            position = at
+            if appended:
+                tag = (
+                    f'<DataArray type="Float32" Name="{name}" '
+                    f'format="appended" offset="{offset}"/>\n'
+                )
+                dst.write(tag.encode("utf-8"))
+                offset += length
+            else:
+                tag = f'<DataArray type="Float32" Name="{name}" format="binary">\n'
+                dst.write(tag.encode("utf-8"))
+                tmp.seek(0)
+                shutil.copyfileobj(tmp, dst)
+                dst.write(b"\n</DataArray>\n")
+
+        if appended:
+            _copy_range(src, dst, position, data_end)
+            position = data_end
+            for _, tmp, _ in payloads:
+                tmp.seek(0)
+                shutil.copyfileobj(tmp, dst)
+        src.seek(position)
+        shutil.copyfileobj(src, dst)
+
+
+def _copy_range(src, dst, start, end):
+    src.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = src.read(min(_CHUNK, remaining))
+        if not chunk:
+            break
+        dst.write(chunk)
+        remaining -= len(chunk)
+
+
+def _encode_payload(raw, out, nbytes, header, surface, base64_mode):
+    """依檔案的壓縮/編碼設定寫出 [標頭][資料]"""
+    with contextlib.ExitStack() as stack:
+        if surface.compressor is None:
+            head = np.array([nbytes], dtype=header).tobytes()
+            source = raw
+        else:
+            source = stack.enter_context(tempfile.TemporaryFile())
+            head = _compress(raw, source, nbytes, header)
+        blocks = iter(lambda: source.read(_CHUNK // 3 * 3), b"")
+
+        if base64_mode:
+            out.write(base64.b64encode(head))
+            carry = b""
+            for chunk in blocks:
+                chunk = carry + chunk
+                usable = len(chunk) // 3 * 3
+                out.write(base64.b64encode(chunk[:usable]))
+                carry = chunk[usable:]
+            out.write(base64.b64encode(carry))
+        else:
+            out.write(head)
+            for chunk in blocks:
+                out.write(chunk)
+
+
+def _compress(raw, compressed, nbytes, header):
+    """以 zlib 逐區塊壓縮到 `compressed`，回傳壓縮標頭"""
+    block_size = 1 << 15
+    sizes = []
+    for chunk in iter(lambda: raw.read(block_size), b""):
+        packed = zlib.compress(chunk)
+        compressed.write(packed)
+        sizes.append(len(packed))
+    last = nbytes - (len(sizes) - 1) * block_size if sizes else 0
+    compressed.seek(0)
+    return np.array([len(sizes), block_size, last] + sizes, dtype=header).tobytes()
+
+
+def main(argv=None):
+    """命令列入口"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="由 VTK/VTP 表面檔案計算 y+")
+    parser.add_argument("path", help="舊版 .vtk 或 XML .vtp 檔案")
+    parser.add_argument("--rho", type=float, required=True, help="密度 ρ (kg/m³)")
+    parser.add_argument("--mu", type=float, required=True, help="動力粘度 μ (Pa·s)")
+    parser.add_argument("--y", type=float, help="固定第一層高度 y (m)")
+    parser.add_argument("--shear", default="wallShearStress")
+    parser.add_argument("--distance", default="wallDistance")
+    parser.add_argument("--kinematic", action="store_true", help="τw 為 τw/ρ")
+    parser.add_argument("--output", help="另存含 yPlus 陣列的檔案")
+    args = parser.parse_args(argv)
+
+    summary = surface_y_plus(
+        args.path,
+        args.rho,
+        args.mu,
+        shear=args.shear,
+        distance=args.distance,
+        y=args.y,
+        kinematic=args.kinematic,
+        output_path=args.output,
+    )
+    print(f"面數：{summary['count']}")
+    print(
+        f"y+ 最小/平均/最大：{summary['min']:.6g} / {summary['mean']:.6g} / {summary['max']:.6g}"
+    )
+    for label, count in summary["regimes"].items():
+        print(f"  {label}：{count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 監看資料夾模式
+監看求解器輸出的時間步資料夾，只計算新出現或有變動的壁面剪應力檔案，
+並將每個時間步的 y+ 摘要附加到 CSV
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from transient_stats import YPlusAccumulator
+from yplus_core import regime_codes, y_plus_from_tau
+
+# OpenFOAM 邊界場中的非均勻清單：patch 名稱 { ... value nonuniform List<vector> N (
+_FOAM_PATCH = re.compile(
+    r"(\w+)\s*\{[^{}]*?value\s+nonuniform\s+List<(vector|scalar)>\s*(\d+)\s*\(",
+    re.DOTALL,
+)
+
+SUMMARY_FIELDS = [
+    "時間",
+    "檔案",
+    "面數",
+    "y+ 最小值",
+    "y+ 平均值",
+    "y+ 最大值",
+] + [f"{label} 比例" for label in DEFAULT_BANDS.labels]
+
+
+def read_openfoam_field(text, patches=None):
+    """
+    解析 ASCII 格式 OpenFOAM 場檔案中的非均勻邊界值
+
+    只讀取 `value nonuniform List<...>` 的 patch；`patches` 可限制 patch 名稱。
+    多個 patch 依檔案順序串接。向量場回傳 (N, 3) 陣列，純量場回傳 (N,)。
+    """
+    if "format" in text[:2000] and re.search(r"format\s+binary", text[:2000]):
+        raise ValueError("不支援二進位格式的 OpenFOAM 場檔案")
+
+    start = text.find("boundaryField")
+    blocks = []
+    for match in _FOAM_PATCH.finditer(text, max(start, 0)):
+        name, kind, count = match.group(1), match.group(2), int(match.group(3))
+        if patches is not None and name not in patches:
+            continue
+        end = text.find(";", match.end())
+        body = text[match.end() : end].replace("(", " ").replace(")", " ")
+        width = 3 if kind == "vector" else 1
+        values = np.array(body.split()[: count * width], dtype=np.float64)
+        if len(values) != count * width:
+            raise ValueError(f"patch {name} 資料長度不符")
+        blocks.append(values.reshape(-1, 3) if width == 3 else values)
+
+    if not blocks:
+        raise ValueError("找不到非均勻的邊界值")
+    return np.concatenate(blocks)
+
+
+def read_shear_field(path, patches=None):
+    """
+    讀取一個逐面壁面剪應力檔案
+
+    支援 OpenFOAM 場檔案，以及每列一個面的純文字/CSV 數值檔
+    （1 欄為 τw 大小、3 欄為 τw 向量；`#` 開頭為註解）。
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if "FoamFile" in text[:2000]:
+        return read_openfoam_field(text, patches)
+    if not any(line.split("#", 1)[0].strip() for line in text.splitlines()):
+        raise ValueError("檔案中沒有面資料")
+
+    delimiter = "," if "," in text.split("\n", 1)[0] else None
+    values = np.loadtxt(path, delimiter=delimiter, comments="#", ndmin=2)
+    if values.shape[1] == 1:
+        return values[:, 0]
+    return values[:, :3]
+
+
+class ShearFieldWatcher:
+    """
+    壁面剪應力輸出監看器
+
+    以 manifest（路徑 → mtime/大小）記錄已處理檔案，重新啟動後不會重算；
+    每次輪詢只讀取新檔案或 mtime/大小改變的檔案。無法讀取或解析的檔案
+    記錄於 manifest 的 failed 中並略過，直到檔案再次變動才重試。
+    指定 `stats_path` 時另以 YPlusAccumulator 累積逐面時間統計；
+    統計存檔內記錄已計入的檔案，中斷後重新啟動不會重複或遺漏時間步。
+    """
+
+    def __init__(
+        self,
+        root,
+        rho,
+        mu,
+        y,
+        pattern="*/wallShearStress",
+        summary_path=None,
+        manifest_path=None,
+        patches=None,
+        kinematic=False,
+        settle_time=1.0,
+        stats_path=None,
+    ):
+        self.root = Path(root)
+        self.rho = rho
+        self.mu = mu
+        self.y = y
+        self.pattern = pattern
+        self.summary_path = Path(summary_path or self.root / "yplus_summary.csv")
+        self.manifest_path = Path(manifest_path or self.root / ".yplus_manifest.json")
+        self.patches = patches
+        # 不可壓縮求解器輸出 τw/ρ（m²/s²），需乘上密度
+        self.kinematic = kinematic
+        # 檔案最後修改後需經過的秒數，避免讀到寫入中的檔案
+        self.settle_time = settle_time
+        self.manifest, self.failed = self._load_manifest()
+        self.stats_path = Path(stats_path) if stats_path else None
+        self.stats = None
+        self._stats_files = {}
+        if self.stats_path and self.stats_path.exists():
+            self.stats, meta = YPlusAccumulator.load(self.stats_path)
+            self._stats_files = meta.get("files", {})
+
+    def _load_manifest(self):
+        """回傳 (已處理檔案, 失敗檔案 → [mtime, 大小, 錯誤訊息])"""
+        if not self.manifest_path.exists():
+            return {}, {}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("files", {}), data.get("failed", {})
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"files": self.manifest, "failed": self.failed}, f, ensure_ascii=False
+            )
+        os.replace(tmp_path, self.manifest_path)
+
+    def pending_files(self):
+        """回傳尚未處理（或已變動）且已寫入完成的檔案"""
+        now = time.time()
+        pending = []
+        for path in self.root.glob(self.pattern):
+            if not path.is_file():
+                continue
+            stat = path.stat()
+            key = path.relative_to(self.root).as_posix()
+            signature = [stat.st_mtime_ns, stat.st_size]
+            if self.manifest.get(key) == signature:
+                continue
+            if self.failed.get(key, [])[:2] == signature:
+                continue
+            if now - stat.st_mtime < self.settle_time:
+                continue
+            pending.append((_time_of(path), key, path, stat))
+        pending.sort(key=_pending_order)
+        return pending
+
+    def evaluate(self, path):
+        """計算單一檔案的逐面 y+"""
+        tau = read_shear_field(path, self.patches)
+        if not len(tau):
+            raise ValueError("檔案中沒有面資料")
+        if self.kinematic:
+            tau = tau * self.rho
+        return y_plus_from_tau(tau, self.y, self.rho, self.mu)[1]
+
+    def process_file(self, path, y_plus=None):
+        """計算單一檔案的逐面 y+ 並回傳摘要列"""
+        if y_plus is None:
+            y_plus = self.evaluate(path)
+        if not len(y_plus):
+            raise ValueError("檔案中沒有面資料")
+        fractions = DEFAULT_BANDS.fractions(regime_codes(y_plus))
+        return [
+            _time_of(path),
+            path.relative_to(self.root).as_posix(),
+            len(y_plus),
+            f"{y_plus.min():.6g}",
+            f"{y_plus.mean():.6g}",
+            f"{y_plus.max():.6g}",
+        ] + [f"{value:.6f}" for value in fractions]
+
+    def poll(self):
+        """
+        處理所有待處理檔案，附加摘要列並更新 manifest；回傳新增的列
+
+        單一檔案失敗時記錄於 manifest 並繼續處理其他檔案。manifest 先於摘要
+        寫入：在兩者之間中斷時最多缺少摘要列，重新啟動後不會重複附加。
+        """
+        rows = []
+        changed = False
+        for _, key, path, stat in self.pending_files():
+            signature = [stat.st_mtime_ns, stat.st_size]
+            try:
+                y_plus = self.evaluate(path)
+                row = self.process_file(path, y_plus)
+                if self.stats_path and key not in self._stats_files:
+                    if self.stats is None:
+                        self.stats = YPlusAccumulator(len(y_plus))
+                    self.stats.update(y_plus)
+                    self._stats_files[key] = signature
+            except (OSError, ValueError) as e:
+                print(f"⚠ 無法處理 {key}：{e}", file=sys.stderr)
+                self.failed[key] = signature + [str(e)]
+                changed = True
+                continue
+            rows.append(row)
+            self.manifest[key] = signature
+            self.failed.pop(key, None)
+            changed = True
+
+        if self.stats is not None and rows:
+            self.stats.save(self.stats_path, {"files": self._stats_files})
+        if changed:
+            self._save_manifest()
+
+        if rows:
+            new_file = not self.summary_path.exists()
+            with open(self.summary_path, "a", newline="", encoding="utf-8-sig") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(SUMMARY_FIELDS)
+                writer.writerows(rows)
+        return rows
+
+    def run(self, interval=2.0, stop=None):
+        """
+        持續監看直到 `stop()` 回傳 True
+
+        若已安裝 inotify_simple（Linux）則等待檔案系統事件，否則定時輪詢。
+        """
+        notifier = _make_notifier(self.root)
+        while stop is None or not stop():
+            self.poll()
+            if notifier is None:
+                time.sleep(interval)
+            else:
+                notifier.wait(interval)
+
+
+def _pending_order(item):
+    """待處理檔案的排序鍵：依時間遞增，無法解析時間（NaN）的排在最後，再依路徑"""
+    step, key = item[:2]
+    missing = math.isnan(step)
+    return missing, 0.0 if missing else step, key
+
+
+def _time_of(path):
+    """由時間步資料夾名稱取得時間，無法解析時回傳 NaN"""
+    try:
+        return float(path.parent.name)
+    except ValueError:
+        return float("nan")
+
+
+class _DirectoryNotifier:
+    """以 inotify 監看根目錄及其時間步子資料夾"""
+
+    def __init__(self, root, inotify, flags):
+        self.root = Path(root)
+        self.inotify = inotify
+        self.flags = flags
+        self.mask = flags.CREATE | flags.CLOSE_WRITE | flags.MOVED_TO
+        self.root_wd = inotify.add_watch(str(self.root), self.mask)
+        for sub in self.root.iterdir():
+            if sub.is_dir():
+                inotify.add_watch(str(sub), self.mask)
+
+    def wait(self, timeout):
+        """等待事件或逾時；新建立的時間步資料夾加入監看"""
+        for event in self.inotify.read(timeout=int(timeout * 1000)):
+            if event.wd == self.root_wd and event.mask & self.flags.ISDIR:
+                self.inotify.add_watch(str(self.root / event.name), self.mask)
+
+
+def _make_notifier(root):
+    try:
+        from inotify_simple import INotify, flags
+    except ImportError:
+        return None
+    return _DirectoryNotifier(root, INotify(), flags)
+
+
+def main(argv=None):
+    """命令列入口"""
+    parser = argparse.ArgumentParser(description="監看求解器輸出並增量計算 y+")
+    parser.add_argument("root", help="求解器案例或輸出資料夾")
+    parser.add_argument("--rho", type=float, required=True, help="密度 ρ (kg/m³)")
+    parser.add_argument("--mu", type=float, required=True, help="動力粘度 μ (Pa·s)")
+    parser.add_argument("--y", type=float, required=True, help="第一層高度 y (m)")
+    parser.add_argument("--pattern", default="*/wallShearStress")
+    parser.add_argument("--patch", action="append", dest="patches")
+    parser.add_argument("--kinematic", action="store_true", help="τw 為 τw/ρ")
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--once", action="store_true", help="只處理一次後結束")
+    parser.add_argument("--stats", help="逐面時間統計存檔（.npz），可中斷後續算")
+    args = parser.parse_args(argv)
+
+    watcher = ShearFieldWatcher(
+        args.root,
+        args.rho,
+        args.mu,
+        args.y,
+        pattern=args.pattern,
+        patches=args.patches,
+        kinematic=args.kinematic,
+        stats_path=args.stats,
+    )
+    if args.once:
+        rows = watcher.poll()
+        print(f"✓ 已處理 {len(rows)} 個檔案")
+        return
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
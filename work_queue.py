@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 分散式掃描工作佇列
+協調者以 TCP 將掃描區塊分派給多台機器上的工作程序，
+工作程序以批次引擎計算後回傳緊湊的二進位結果，協調者依區塊順序合併；
+不需要外部訊息代理，所有節點可在同一台機器（localhost）上測試
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import collections
+import csv
+import json
+import socket
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from batch import (
+    AXIS_HELP,
+    CSV_HEADER,
+    DEFAULT_CHUNK_ROWS,
+    Sweep,
+    add_sweep_arguments,
+    compute_chunk,
+    format_csv_rows,
+    sweep_from_args,
+)
+from validation import ERROR_MESSAGES, error_counts, error_histogram
+
+# 通訊協定版本；握手時檢查
+PROTOCOL_VERSION = 2
+
+# 結果的二進位排列：依序為各欄位的連續陣列（固定小端序，跨平台一致）
+RESULT_LAYOUT = (
+    ("re_x", "<f8"),
+    ("cf", "<f8"),
+    ("u_tau", "<f8"),
+    ("tau_w", "<f8"),
+    ("y_plus", "<f8"),
+    ("regime", "u1"),
+    ("mode", "i1"),
+    ("error", "u1"),
+)
+
+# 每個訊息的前綴：標頭長度與二進位內容長度（網路位元組順序）
+_PREFIX = struct.Struct("!II")
+
+# 標頭的長度上限，避免錯誤的連線造成巨大配置
+MAX_HEADER_SIZE = 1 << 24
+
+# 沒有可分派的區塊但仍有租約未完成時，工作程序等待的秒數
+WAIT_SECONDS = 0.05
+
+
+class ProtocolError(Exception):
+    """通訊協定錯誤"""
+
+
+def send_message(sock, header, payload=b""):
+    """送出一個訊息：前綴 + JSON 標頭 + 二進位內容"""
+    data = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    sock.sendall(_PREFIX.pack(len(data), len(payload)) + data)
+    if payload:
+        sock.sendall(payload)
+
+
+def _recv_exact(sock, size):
+    """讀取剛好 size 位元組；連線在訊息邊界關閉時回傳 None"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            if received == 0:
+                return None
+            raise ProtocolError("連線在訊息中途關閉")
+        received += count
+    return buffer
+
+
+def recv_message(sock):
+    """接收一個訊息，回傳 (標頭字典, 二進位內容)；連線關閉時回傳 (None, None)"""
+    prefix = _recv_exact(sock, _PREFIX.size)
+    if prefix is None:
+        return None, None
+    header_size, payload_size = _PREFIX.unpack(prefix)
+    if header_size > MAX_HEADER_SIZE:
+        raise ProtocolError(f"標頭過大：{header_size} 位元組")
+    header = _recv_exact(sock, header_size) if header_size else b"{}"
+    payload = _recv_exact(sock, payload_size) if payload_size else b""
+    if header is None or payload is None:
+        raise ProtocolError("連線在訊息中途關閉")
+    return json.loads(header.decode("utf-8")), payload
+
+
+def row_bytes():
+    """每列結果的位元組數"""
+    return sum(np.dtype(dtype).itemsize for _, dtype in RESULT_LAYOUT)
+
+
+def pack_result(columns):
+    """將輸出欄位打包為二進位內容（每列 43 位元組）"""
+    return b"".join(
+        np.ascontiguousarray(columns[key], dtype=dtype).tobytes()
+        for key, dtype in RESULT_LAYOUT
+    )
+
+
+def unpack_result(payload, rows):
+    """解開 pack_result() 的內容，回傳欄位陣列字典（唯讀視圖，不複製）"""
+    if len(payload) != rows * row_bytes():
+        raise ProtocolError(
+            f"結果大小不符：{len(payload)} 位元組，預期 {rows * row_bytes()}"
+        )
+    columns, offset = {}, 0
+    for key, dtype in RESULT_LAYOUT:
+        dtype = np.dtype(dtype)
+        columns[key] = np.frombuffer(payload, dtype, rows, offset)
+        offset += rows * dtype.itemsize
+    return columns
+
+
+class Coordinator:
+    """
+    掃描區塊的協調者
+
+    掃描依列號切成固定區塊，工作程序連線後先取得掃描定義，之後逐一索取區塊。
+    每個分派出去的區塊有租約期限：工作程序斷線或逾時未回傳時，區塊放回佇列
+    重新分派（最多 `max_attempts` 次）；重複回傳的結果只採用第一份。
+    完成的結果依區塊順序交給 `run()` 的 sink，記憶體中只保留尚未輪到的結果。
+    """
+
+    def __init__(
+        self,
+        sweep,
+        chunk_rows=DEFAULT_CHUNK_ROWS,
+        lease_timeout=60.0,
+        max_attempts=5,
+        host="127.0.0.1",
+        port=0,
+        fast_cf=False,
+    ):
+        self.sweep = sweep
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.fast_cf = fast_cf
+        self.chunks = [
+            (start, min(start + chunk_rows, len(sweep)))
+            for start in range(0, len(sweep), chunk_rows)
+        ]
+        self.attempts = [0] * len(self.chunks)
+        self.retries = 0
+        self.workers = 0
+        self.errors = np.zeros(256, dtype=np.int64)
+
+        self._pending = collections.deque(range(len(self.chunks)))
+        self._leases = {}  # 區塊編號 → (期限, 連線編號)
+        self._results = {}  # 已完成但尚未輪到的結果
+        self._next = 0
+        self._done = False
+        self._started = False
+        self._error = None
+        self._cond = threading.Condition()
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    # --- 區塊狀態 -------------------------------------------------------
+
+    def _lease(self, connection):
+        """分派下一個區塊；沒有可分派時回傳 None"""
+        with self._cond:
+            while self._pending:
+                chunk = self._pending.popleft()
+                if chunk in self._results or chunk < self._next:
+                    continue
+                self.attempts[chunk] += 1
+                self._leases[chunk] = (
+                    time.monotonic() + self.lease_timeout,
+                    connection,
+                )
+                return chunk
+            return None
+
+    def _requeue(self, chunk):
+        """將區塊放回佇列最前面（呼叫端持有鎖）"""
+        self._leases.pop(chunk, None)
+        if self.attempts[chunk] >= self.max_attempts:
+            self._error = RuntimeError(
+                f"區塊 {chunk} 已嘗試 {self.attempts[chunk]} 次仍未完成"
+            )
+        else:
+            self.retries += 1
+            self._pending.appendleft(chunk)
+        self._cond.notify_all()
+
+    def _release(self, connection):
+        """連線結束：收回該連線持有的所有租約"""
+        with self._cond:
+            for chunk, (_, owner) in list(self._leases.items()):
+                if owner == connection:
+                    self._requeue(chunk)
+
+    def _expire(self):
+        """收回逾時的租約"""
+        now = time.monotonic()
+        with self._cond:
+            for chunk, (deadline, _) in list(self._leases.items()):
+                if deadline < now:
+                    self._requeue(chunk)
+
+    def _complete(self, chunk, payload, rows):
+        """記錄區塊結果；驗證失敗時拋出 ProtocolError"""
+        if not 0 <= chunk < len(self.chunks):
+            raise ProtocolError(f"區塊編號超出範圍：{chunk}")
+        start, stop = self.chunks[chunk]
+        if rows != stop - start:
+            raise ProtocolError(f"區塊 {chunk} 的列數不符")
+        columns = unpack_result(payload, rows)
+        with self._cond:
+            self._leases.pop(chunk, None)
+            if chunk >= self._next and chunk not in self._results:
+                self._results[chunk] = columns
+                self._cond.notify_all()
+
+    # --- 連線處理 -------------------------------------------------------
+
+    def _handle(self, sock, connection):
+        """處理一個工作程序連線"""
+        try:
+            while True:
+                header, payload = recv_message(sock)
+                if header is None:
+                    return
+                kind = header.get("type")
+                if kind == "hello":
+                    if header.get("version") != PROTOCOL_VERSION:
+                        raise ProtocolError("通訊協定版本不符")
+                    send_message(
+                        sock,
+                        {
+                            "type": "sweep",
+                            "sweep": self.sweep.to_dict(),
+                            "fast_cf": self.fast_cf,
+                        },
+                    )
+                elif kind == "request":
+                    send_message(sock, self._assignment(connection))
+                elif kind == "result":
+                    self._complete(int(header["chunk"]), payload, int(header["rows"]))
+                else:
+                    raise ProtocolError(f"未知的訊息類型：{kind}")
+        except (OSError, ValueError, KeyError, ProtocolError):
+            # 斷線或格式錯誤的連線一律視為工作程序遺失，租約由 finally 收回
+            pass
+        finally:
+            self._release(connection)
+            sock.close()
+
+    def _assignment(self, connection):
+        """回應工作程序的索取：區塊、等待或結束"""
+        if self._done:
+            return {"type": "done"}
+        chunk = self._lease(connection)
+        if chunk is None:
+            return {"type": "wait", "seconds": WAIT_SECONDS}
+        start, stop = self.chunks[chunk]
+        return {"type": "chunk", "chunk": chunk, "start": start, "stop": stop}
+
+    def _accept(self):
+        """接受連線的執行緒"""
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._cond:
+                self.workers += 1
+                connection = self.workers
+            threading.Thread(
+                target=self._handle, args=(sock, connection), daemon=True
+            ).start()
+
+    # --- 主迴圈 ---------------------------------------------------------
+
+    def start(self):
+        """開始接受工作程序連線（run() 會自動呼叫）；可重複呼叫"""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def run(self, sink, timeout=None):
+        """
+        等待所有區塊完成，依區塊順序呼叫 sink(起始列, 結果欄位)
+
+        sink 在呼叫端的執行緒中執行；`timeout` 秒內未完成時拋出 TimeoutError。
+        回傳統計字典：rows、chunks、retries、workers、seconds、
+        errors（validation.error_counts）。
+        """
+        started = time.monotonic()
+        self.start()
+        poll = min(max(self.lease_timeout / 4, 0.01), 0.5)
+        try:
+            while self._next < len(self.chunks):
+                with self._cond:
+                    while self._next not in self._results and self._error is None:
+                        if timeout is not None and time.monotonic() - started > timeout:
+                            raise TimeoutError("分散式掃描逾時")
+                        self._cond.wait(poll)
+                        self._expire()
+                    if self._error is not None:
+                        raise self._error
+                    columns = self._results.pop(self._next)
+                start, _ = self.chunks[self._next]
+                error_histogram(columns["error"], out=self.errors)
+                sink(start, columns)
+                with self._cond:
+                    self._next += 1
+        finally:
+            self.close()
+        return {
+            "rows": len(self.sweep),
+            "chunks": len(self.chunks),
+            "retries": self.retries,
+            "workers": self.workers,
+            "seconds": time.monotonic() - started,
+            "errors": error_counts(histogram=self.errors),
+        }
+
+    def close(self):
+        """停止接受連線；已連線的工作程序在下次索取時收到結束訊息"""
+        with self._cond:
+            self._done = True
+            self._cond.notify_all()
+        self._server.close()
+
+
+def run_worker(host, port, retry_seconds=10.0):
+    """
+    工作程序：連線到協調者，持續索取區塊並回傳結果直到收到結束訊息
+
+    協調者尚未啟動時每 0.2 秒重試連線，最多 `retry_seconds` 秒。
+    回傳完成的區塊數。
+    """
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+            break
+        except ConnectionRefusedError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+    completed = 0
+    with sock:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        send_message(sock, {"type": "hello", "version": PROTOCOL_VERSION})
+        header, _ = recv_message(sock)
+        if header is None or header.get("type") != "sweep":
+            raise ProtocolError("協調者未回傳掃描定義")
+        sweep = Sweep.from_dict(header["sweep"])
+        fast_cf = bool(header.get("fast_cf"))
+
+        while True:
+            send_message(sock, {"type": "request"})
+            header, _ = recv_message(sock)
+            kind = None if header is None else header.get("type")
+            if kind in (None, "done"):
+                return completed
+            if kind == "wait":
+                time.sleep(float(header.get("seconds", WAIT_SECONDS)))
+                continue
+            start, stop = int(header["start"]), int(header["stop"])
+            result = compute_chunk(sweep.rows(start, stop), fast_cf)
+            send_message(
+                sock,
+                {"type": "result", "chunk": header["chunk"], "rows": stop - start},
+                pack_result(result),
+            )
+            completed += 1
+
+
+def run_distributed(coordinator, output, progress=None, timeout=None):
+    """由協調者收集所有區塊，依順序匯出為 CSV（與 batch.run_sweep 相同格式）"""
+    sweep = coordinator.sweep
+    with open(output, "w", newline="", encoding="utf-8-sig") as f:
+        csv.writer(f).writerow(CSV_HEADER)
+
+        def sink(start, columns):
+            stop = start + len(columns["y_plus"])
+            f.write(format_csv_rows(sweep.rows(start, stop), columns))
+            if progress is not None:
+                progress(start, len(sweep))
+
+        return coordinator.run(sink, timeout)
+
+
+def _address(text):
+    """解析 host:port"""
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def main(argv=None):
+    """命令列入口：serve 啟動協調者，work 啟動工作程序"""
+    parser = argparse.ArgumentParser(description="y+ 分散式參數掃描")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="啟動協調者", epilog=AXIS_HELP)
+    add_sweep_arguments(serve)
+    serve.add_argument("--out", required=True, help="輸出 CSV 檔案")
+    serve.add_argument("--listen", default="127.0.0.1:5555", help="監聽位址")
+    serve.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    serve.add_argument("--lease-timeout", type=float, default=60.0)
+    serve.add_argument("--fast-cf", action="store_true")
+
+    work = commands.add_parser("work", help="啟動工作程序")
+    work.add_argument("--connect", default="127.0.0.1:5555", help="協調者位址")
+    args = parser.parse_args(argv)
+
+    if args.command == "work":
+        count = run_worker(*_address(args.connect))
+        print(f"✓ 已完成 {count} 個區塊")
+        return
+
+    host, port = _address(args.listen)
+    coordinator = Coordinator(
+        sweep_from_args(args),
+        chunk_rows=args.chunk_rows,
+        lease_timeout=args.lease_timeout,
+        host=host,
+        port=port,
+        fast_cf=args.fast_cf,
+    )
+    print(f"協調者監聽 {coordinator.address[0]}:{coordinator.address[1]}")
+    stats = run_distributed(coordinator, args.out)
+    print(
+        f"✓ 已計算 {stats['rows']} 列（{stats['chunks']} 個區塊，"
+        f"{stats['workers']} 個工作程序連線，重新分派 {stats['retries']} 次，"
+        f"{stats['seconds']:.2f} 秒）→ {args.out}"
+    )
+    if stats["errors"]["invalid"]:
+        print(f"⚠ {stats['errors']['invalid']} 列輸入無效（結果為 NaN）：")
+        for flag, message in ERROR_MESSAGES.items():
+            if stats["errors"][flag]:
+                print(f"   {message}：{stats['errors'][flag]} 列")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        sys.exit(1)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - JSON-Lines 常駐工作程序
+從 stdin 每行讀取一個 JSON 請求，將已緩衝的請求合併為一批向量化計算，
+並在 stdout 每行輸出一個 JSON 結果
+此文件使用 UTF-8 編碼
+"""
+
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+from yplus_core import blasius_cf, regime_code, regime_codes
+
+# 請求中可用的數值欄位
+FIELDS = ("rho", "mu", "u", "y", "L", "cf", "tau", "u_tau", "y_plus")
+
+# 各模式的必要欄位；target 模式由目標 y+ 反推第一層高度
+REQUIRED = {
+    "blasius": ("rho", "mu", "u", "y", "L"),
+    "cf": ("rho", "mu", "u", "y", "cf"),
+    "tau": ("rho", "mu", "y"),
+    "target": ("rho", "mu", "y_plus"),
+}
+
+# 讀取 stdin 時每次最多取得的位元組數
+READ_SIZE = 1 << 16
+
+# 少於此數量的請求改用純量計算，避免 NumPy 小陣列的固定開銷
+SMALL_BATCH = 8
+
+# 重複使用編碼器，避免每次 dumps() 重新建立
+_encode = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _parse_request(line):
+    """解析單行請求，回傳 (id, 模式, 數值列) 或 (id, 錯誤訊息, None)"""
+    try:
+        request = json.loads(line.decode("utf-8") if isinstance(line, bytes) else line)
+    except ValueError as e:
+        return None, f"JSON 格式錯誤：{e}", None
+    if not isinstance(request, dict):
+        return None, "請求必須為 JSON 物件", None
+
+    request_id = request.get("id")
+    mode = request.get("mode", "blasius")
+    if mode not in REQUIRED:
+        return request_id, f"未知的模式：{mode}", None
+
+    try:
+        row = [float(request.get(key, math.nan)) for key in FIELDS]
+    except (TypeError, ValueError, OverflowError):
+        return request_id, "數值欄位格式錯誤", None
+
+    values = dict(zip(FIELDS, row))
+    # 未提供的欄位以 NaN 表示；提供的值必須為有限數值
+    non_finite = [
+        key for key in FIELDS if key in request and not math.isfinite(values[key])
+    ]
+    if non_finite:
+        return request_id, f"欄位必須為有限數值：{', '.join(non_finite)}", None
+    missing = [key for key in REQUIRED[mode] if not values[key] > 0]
+    if missing:
+        return request_id, f"欄位必須為正數：{', '.join(missing)}", None
+    if mode == "tau" and not (values["tau"] > 0 or values["u_tau"] > 0):
+        return request_id, "剪應力 τw 或摩擦速度 u_τ 必須為正數", None
+    if mode == "target" and not (
+        values["u_tau"] > 0
+        or values["tau"] > 0
+        or (values["u"] > 0 and (values["cf"] > 0 or values["L"] > 0))
+    ):
+        return request_id, "需要 u_τ、τw、Cf+U 或 U+L 其中之一", None
+    return request_id, mode, row
+
+
+def solve_batch(modes, table):
+    """
+    向量化計算一批請求
+
+    `modes` 為模式名稱清單，`table` 為 (n, len(FIELDS)) 陣列，缺值為 NaN。
+    回傳各欄位的結果陣列字典。
+    """
+    rho, mu, u, y, L, cf, tau, u_tau_in, target = table.T
+    modes = np.asarray(modes)
+    is_cf = modes == "cf"
+    is_tau = modes == "tau"
+    is_target = modes == "target"
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        nu = mu / rho
+        re_x = rho * u * L / mu
+
+        # 摩擦系數：模式 B 直接使用，模式 A（及無其他資訊的 target）使用 Blasius
+        use_cf = is_cf | (is_target & (cf > 0))
+        cf_out = np.where(use_cf, cf, np.where(L > 0, blasius_cf(re_x), np.nan))
+        u_tau = np.sqrt(cf_out / 2.0) * u
+
+        # 模式 C：τw 優先於 u_τ；target：u_τ 優先於 τw，兩者皆優先於 Cf
+        use_u_tau = ((is_tau & ~(tau > 0)) | is_target) & (u_tau_in > 0)
+        use_tau = (is_tau | is_target) & (tau > 0) & ~use_u_tau
+        u_tau = np.where(use_tau, np.sqrt(tau / rho), u_tau)
+        u_tau = np.where(use_u_tau, u_tau_in, u_tau)
+        # 與 solve_one 相同，U 非正數時不換算 Cf
+        cf_from_u_tau = np.where(u > 0, 2.0 * (u_tau / u) ** 2, np.nan)
+        cf_out = np.where(use_tau | use_u_tau, cf_from_u_tau, cf_out)
+
+        y_out = np.where(is_target, target * nu / u_tau, y)
+        y_plus = np.where(is_target, target, y * u_tau / nu)
+
+    return {
+        "y_plus": y_plus,
+        "y": y_out,
+        "u_tau": u_tau,
+        "tau_w": rho * u_tau * u_tau,
+        "cf": cf_out,
+        "re_x": re_x,
+        "regime": regime_codes(y_plus),
+    }
+
+
+def solve_one(mode, row):
+    """以純量計算單一請求，結果與 solve_batch() 相同"""
+    rho, mu, u, y, L, cf, tau, u_tau_in, target = row
+    nu = mu / rho
+    re_x = rho * u * L / mu
+
+    if mode == "cf" or (mode == "target" and cf > 0):
+        cf_out = cf
+    elif L > 0:
+        cf_out = blasius_cf(re_x)
+    else:
+        cf_out = math.nan
+    u_tau = math.sqrt(cf_out / 2.0) * u if cf_out > 0 else math.nan
+
+    use_u_tau = (mode == "target" or (mode == "tau" and not tau > 0)) and u_tau_in > 0
+    use_tau = mode in ("tau", "target") and tau > 0 and not use_u_tau
+    if use_tau:
+        u_tau = math.sqrt(tau / rho)
+    elif use_u_tau:
+        u_tau = u_tau_in
+    if (use_tau or use_u_tau) and u > 0:
+        cf_out = 2.0 * (u_tau / u) ** 2
+    elif use_tau or use_u_tau:
+        cf_out = math.nan
+
+    if mode == "target":
+        y_out, y_plus = target * nu / u_tau, target
+    else:
+        y_out, y_plus = y, y * u_tau / nu
+
+    return {
+        "y_plus": y_plus,
+        "y": y_out,
+        "u_tau": u_tau,
+        "tau_w": rho * u_tau * u_tau,
+        "cf": cf_out,
+        "re_x": re_x,
+        "regime": regime_code(y_plus),
+    }
+
+
+def _clean(value):
+    """NaN 與 ±inf 不是合法 JSON，以 null 表示"""
+    return value if math.isfinite(value) else None
+
+
+def handle_lines(lines):
+    """處理一批請求行，回傳依序對應的結果行（bytes）"""
+    parsed = [_parse_request(line) for line in lines if line.strip()]
+    valid = [i for i, (_, _, row) in enumerate(parsed) if row is not None]
+
+    results = [None] * len(parsed)
+    if 0 < len(valid) < SMALL_BATCH:
+        for i in valid:
+            request_id, mode, row = parsed[i]
+            columns = solve_one(mode, row)
+            result = {"id": request_id, "mode": mode}
+            for key in ("y_plus", "y", "u_tau", "tau_w", "cf", "re_x"):
+                result[key] = _clean(columns[key])
+            result["regime"] = DEFAULT_BANDS.label(columns["regime"])
+            results[i] = result
+    elif valid:
+        table = np.array([parsed[i][2] for i in valid], dtype=np.float64)
+        modes = [parsed[i][1] for i in valid]
+        columns = solve_batch(modes, table)
+        lists = {key: value.tolist() for key, value in columns.items()}
+        for j, i in enumerate(valid):
+            result = {"id": parsed[i][0], "mode": modes[j]}
+            for key in ("y_plus", "y", "u_tau", "tau_w", "cf", "re_x"):
+                result[key] = _clean(lists[key][j])
+            result["regime"] = DEFAULT_BANDS.label(lists["regime"][j])
+            results[i] = result
+
+    for i, (request_id, message, row) in enumerate(parsed):
+        if row is None:
+            results[i] = {"id": request_id, "error": message}
+
+    return [_encode(result).encode("utf-8") + b"\n" for result in results]
+
+
+def serve(infile, outfile):
+    """
+    常駐處理直到輸入結束
+
+    每次以 read1() 取得目前可讀的資料（至多一次系統呼叫），
+    其中所有完整的行合併為一批計算，輸出後立即 flush。
+    """
+    pending = b""
+    while True:
+        chunk = infile.read1(READ_SIZE)
+        if not chunk:
+            break
+        *lines, pending = (pending + chunk).split(b"\n")
+        if lines:
+            outfile.writelines(handle_lines(lines))
+            outfile.flush()
+    if pending.strip():
+        outfile.writelines(handle_lines([pending]))
+        outfile.flush()
+
+
+def main(argv=None):
+    """命令列入口（console script：yplus-worker）"""
+    parser = argparse.ArgumentParser(
+        description="JSON-Lines y+ 常駐工作程序：stdin 每行一個請求，stdout 每行一個結果"
+    )
+    parser.parse_args(argv)
+    try:
+        serve(sys.stdin.buffer, sys.stdout.buffer)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+CFD y+ 計算工具 - 向量化計算核心
+以 NumPy 陣列一次計算多個壁面 patch，純量輸入亦可使用
+此文件使用 UTF-8 編碼
+"""
+
+from math import log10, sqrt
+
+import numpy as np
+
+from regime import DEFAULT_BANDS
+
+# 計算模式（與主視窗的模式按鈕 ID 一致）
+MODE_BLASIUS = 0
+MODE_CF = 1
+MODE_TAU = 2
+MODE_WALL_LAW = 3
+
+# 預設流體（主視窗與第一層高度最佳化共用）
+FLUID_PRESETS = {
+    "空氣 (25°C)": {"rho": 1.184, "mu": 1.849e-5},
+    "空氣 (20°C)": {"rho": 1.204, "mu": 1.810e-5},
+    "水 (20°C)": {"rho": 998.2, "mu": 1.002e-3},
+    "水 (25°C)": {"rho": 997.0, "mu": 0.894e-3},
+}
+
+# 層流/湍流邊界層轉換雷諾數
+LAMINAR_RE_LIMIT = 5e5
+
+# 壁面定律常數（與 OpenFOAM 壁面函數預設值一致）
+KAPPA = 0.41
+WALL_E = 9.8
+
+# 網格評估分區：y+ < 1、1 ≤ y+ ≤ 5、5 < y+ ≤ 30、30 < y+ ≤ 300、y+ > 300
+REGIME_EDGES = DEFAULT_BANDS.edges
+REGIME_LABELS = DEFAULT_BANDS.labels
+
+
+def kinematic_viscosity(rho, mu):
+    """動力學粘度 ν = μ/ρ"""
+    return np.divide(mu, rho)
+
+
+def reynolds_number(rho, u, L, mu):
+    """雷諾數 Re_x = ρ·U·L/μ"""
+    return np.multiply(np.multiply(rho, u), L) / mu
+
+
+def blasius_cf(re_x):
+    """Blasius-Schlichting 摩擦系數（層流 0.664/√Re，湍流 0.455/(log₁₀Re)^2.58）"""
+    if isinstance(re_x, float):
+        # 純量快速路徑（常駐工作程序的單筆請求）
+        if re_x < LAMINAR_RE_LIMIT:
+            return 0.664 / sqrt(re_x) if re_x > 0 else float("nan")
+        return 0.455 / log10(re_x) ** 2.58
+    re_x = np.asarray(re_x, dtype=np.float64)
+    laminar = re_x < LAMINAR_RE_LIMIT
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cf = np.where(laminar, 0.664 / np.sqrt(re_x), 0.455 / np.log10(re_x) ** 2.58)
+    return cf if cf.ndim else cf[()]
+
+
+def boundary_layer_thickness(re_x, L):
+    """平板邊界層厚度（層流 δ = 4.91·L/√Re，湍流 δ = 0.37·L/Re^0.2）"""
+    re_x = np.asarray(re_x, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(
+            re_x < LAMINAR_RE_LIMIT, 4.91 / np.sqrt(re_x), 0.37 / re_x**0.2
+        )
+    return delta * L
+
+
+def u_tau_from_cf(cf, u):
+    """摩擦速度 u_τ = √(C_f/2)·U"""
+    return np.sqrt(np.divide(cf, 2.0)) * u
+
+
+def u_tau_from_tau(tau, rho):
+    """摩擦速度 u_τ = √(τ_w/ρ)"""
+    return np.sqrt(np.divide(tau, rho))
+
+
+def y_plus(y, u_tau, nu):
+    """y+ = y·u_τ/ν"""
+    return np.multiply(y, u_tau) / nu
+
+
+def y_plus_from_tau(tau, y, rho, mu):
+    """
+    由壁面剪應力計算 y+（模式 C 的 τw 路徑）
+
+    τw 可為純量大小或最後一維為 3 的向量，向量取其大小。
+    回傳 (u_τ, y+)。
+    """
+    tau = np.asarray(tau, dtype=np.float64)
+    if tau.ndim == 2 and tau.shape[1] == 3:
+        tau = np.sqrt(np.einsum("ij,ij->i", tau, tau))
+    u_tau = u_tau_from_tau(np.abs(tau), rho)
+    return u_tau, y_plus(y, u_tau, kinematic_viscosity(rho, mu))
+
+
+def _spalding(u_plus, re_y, kappa, E):
+    """Spalding 定律殘差 f(u⁺) = u⁺ + g(u⁺) − Re_y/u⁺ 及其導數"""
+    k = kappa * u_plus
+    exp_k = np.exp(k)
+    g = (exp_k - 1.0 - k - k * k / 2.0 - k * k * k / 6.0) / E
+    dg = kappa * (exp_k - 1.0 - k - k * k / 2.0) / E
+    return u_plus + g - re_y / u_plus, 1.0 + dg + re_y / (u_plus * u_plus)
+
+
+def _log_law(u_plus, re_y, kappa, E):
+    """對數律殘差 f(u⁺) = u⁺ − ln(E·Re_y/u⁺)/κ 及其導數"""
+    return (
+        u_plus - np.log(E * re_y / u_plus) / kappa,
+        1.0 + 1.0 / (kappa * u_plus),
+    )
+
+
+WALL_LAWS = {"spalding": _spalding, "log": _log_law}
+
+
+def y_plus_lam(kappa=KAPPA, E=WALL_E):
+    """黏性底層與對數律的交點 y⁺_lam（y⁺ = ln(E·y⁺)/κ）"""
+    yp = 11.0
+    for _ in range(10):
+        yp = np.log(max(E * yp, 1.0)) / kappa
+    return float(yp)
+
+
+def u_tau_from_wall_law(
+    u_p, y, nu, law="spalding", kappa=KAPPA, E=WALL_E, tol=1e-10, max_iter=50
+):
+    """
+    由第一層網格中心的壁面平行速度反解壁面定律，求 u_τ 與 y+（模式 D）
+
+    以 u⁺ = U_p/u_τ 為未知數，Re_y = U_p·y/ν，解 y⁺ = Re_y/u⁺ 代入壁面定律。
+    `law` 為 "spalding"（全 y+ 範圍的 Spalding 定律）或 "log"
+    （y⁺ < y⁺_lam 使用線性律 u⁺ = y⁺，其餘為對數律）。
+
+    所有列一起進行向量化 Newton 疊代，每列以 [lo, hi] 區間保護，
+    步長超出區間時改為二分；已收斂的列移出作用中的索引，不再計算。
+    回傳 (u_τ, y+, 是否收斂)。
+    """
+    residual = WALL_LAWS[law]
+    u_p, y, nu = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (u_p, y, nu))
+    )
+    shape = u_p.shape
+    speed = np.abs(u_p).ravel()
+    re_y = speed * y.ravel() / nu.ravel()
+
+    # u⁺ 的區間：f(0⁺) < 0，且 g ≥ 0 使 f(√Re_y) ≥ 0（線性律的解）
+    u_plus = np.sqrt(re_y)
+    valid = re_y > 0
+    if law == "log":
+        # 線性律區域的解即為 √Re_y
+        converged = valid & (u_plus < y_plus_lam(kappa, E))
+    else:
+        converged = np.zeros(re_y.shape, dtype=bool)
+
+    active = np.flatnonzero(valid & ~converged)
+    lo = np.zeros(len(active))
+    hi = u_plus[active].copy()
+    if law == "log":
+        lo = np.full(len(active), y_plus_lam(kappa, E) * 0.5)
+        hi = np.maximum(hi, lo * 4.0)
+    # 初始值：線性律 u⁺ = √Re_y 與對數律（幾次固定點疊代）中較小者
+    r = re_y[active]
+    x = np.full(len(active), 20.0)
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        for _ in range(4):
+            x = np.log(np.maximum(E * r / x, 1.0)) / kappa
+        x = np.clip(x, lo + (hi - lo) * 1e-3, hi)
+
+        for _ in range(max_iter):
+            if len(active) == 0:
+                break
+            f, df = residual(x, r, kappa, E)
+            positive = f > 0
+            hi = np.where(positive, x, hi)
+            lo = np.where(positive, lo, x)
+            step = f / df
+            x_new = x - step
+            outside = ~((x_new >= lo) & (x_new <= hi))
+            x_new = np.where(outside, 0.5 * (lo + hi), x_new)
+
+            done = np.abs(x_new - x) <= tol * x_new
+            u_plus[active] = x_new
+            converged[active[done]] = True
+            keep = ~done
+            active, x, r, lo, hi = (
+                active[keep],
+                x_new[keep],
+                r[keep],
+                lo[keep],
+                hi[keep],
+            )
+
+    u_plus[~valid] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u_tau = speed / u_plus
+        yp = re_y / u_plus
+    return u_tau.reshape(shape), yp.reshape(shape), converged.reshape(shape)
+
+
+def regime_codes(y_plus_values):
+    """將 y+ 轉為預設網格評估分區代碼（對應 REGIME_LABELS，NaN 為 INVALID）"""
+    return DEFAULT_BANDS.classify(y_plus_values)
+
+
+def regime_code(y_plus_value):
+    """單一 y+ 的網格評估分區代碼（純量版 regime_codes）"""
+    return DEFAULT_BANDS.classify_one(y_plus_value)
+
+
+def compute_patches(rho, mu, u, y, L, cf=None, tau=None, fast_cf=False):
+    """
+    一次計算所有 patch 的 y+
+
+    逐列選擇計算模式：τw > 0 使用模式 C，否則 Cf > 0 使用模式 B，
+    其餘使用 Blasius 公式（模式 A）。缺值以 NaN 表示。
+    `fast_cf` 為 True 時模式 A 改用查表內插（見 cf_table，相對誤差約 1e-7）。
+    回傳欄位陣列字典。
+    """
+    rho, mu, u, y, L = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (rho, mu, u, y, L))
+    )
+    n = u.shape
+    cf_in = np.full(n, np.nan) if cf is None else np.asarray(cf, dtype=np.float64)
+    tau_in = np.full(n, np.nan) if tau is None else np.asarray(tau, dtype=np.float64)
+
+    nu = kinematic_viscosity(rho, mu)
+    re_x = reynolds_number(rho, u, L, mu)
+
+    use_tau = tau_in > 0
+    use_cf = ~use_tau & (cf_in > 0)
+    mode = np.full(n, MODE_BLASIUS, dtype=np.int8)
+    mode[use_cf] = MODE_CF
+    mode[use_tau] = MODE_TAU
+
+    if fast_cf:
+        from cf_table import default_table
+
+        cf_model = default_table()(re_x)
+    else:
+        cf_model = blasius_cf(re_x)
+    cf_out = np.where(use_cf, cf_in, cf_model)
+    with np.errstate(invalid="ignore"):
+        u_tau = np.where(
+            use_tau, u_tau_from_tau(np.abs(tau_in), rho), u_tau_from_cf(cf_out, u)
+        )
+    # 模式 C 沒有 Cf，改以 τw 反推 C_f = 2·τw/(ρ·U²)
+    cf_out = np.where(use_tau, 2.0 * tau_in / (rho * u * u), cf_out)
+    tau_w = rho * u_tau * u_tau
+    yp = y_plus(y, u_tau, nu)
+
+    return {
+        "nu": nu,
+        "re_x": re_x,
+        "cf": cf_out,
+        "u_tau": u_tau,
+        "tau_w": tau_w,
+        "y_plus": yp,
+        "regime": regime_codes(yp),
+        "mode": mode,
+    }